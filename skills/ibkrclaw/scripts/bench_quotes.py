@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+行情批量查询基准：逐个 get_quote vs 一次 get_quotes（均为冷合约缓存），
+以及合约缓存命中后的 get_quotes，输出每个 symbol 的平均耗时。
+需要已登录的 IB Gateway（只读查询，不下单）；使用内存缓存，不读写 contracts.json。
+
+用法：
+  python bench_quotes.py                    # 默认 50 只自选股
+  python bench_quotes.py AAPL MSFT NVDA     # 指定 symbol
+  python bench_quotes.py --batch 25         # 每批 reqTickers 的合约数
+"""
+
+import argparse
+import sys
+import time
+from typing import Dict, List
+
+from ibkr_readonly import IB_QUOTE_BATCH, ContractCache, IBKRReadOnlyClient
+
+WATCHLIST = [
+    "AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA", "AVGO", "BRK B", "JPM",
+    "LLY", "V", "UNH", "XOM", "MA", "JNJ", "PG", "HD", "COST", "MRK",
+    "ABBV", "CVX", "CRM", "BAC", "NFLX", "AMD", "KO", "PEP", "TMO", "WMT",
+    "ADBE", "LIN", "MCD", "CSCO", "ACN", "ORCL", "ABT", "DIS", "INTC", "QCOM",
+    "IBM", "TXN", "AMGN", "CAT", "GE", "NKE", "PFE", "UBER", "LMND", "PLTR",
+]
+
+
+def bench(client: IBKRReadOnlyClient, symbols: List[str], batch: int = IB_QUOTE_BATCH) -> Dict[str, float]:
+    """返回各方式的总耗时（秒）和拿到的行情数"""
+    client.contracts.clear()
+    t0 = time.perf_counter()
+    single = [client.get_quote(s) for s in symbols]
+    t_single = time.perf_counter() - t0
+
+    client.contracts.clear()
+    t0 = time.perf_counter()
+    batched = client.get_quotes(symbols, batch=batch)
+    t_batch = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    cached = client.get_quotes(symbols, batch=batch)
+    t_cached = time.perf_counter() - t0
+    return {
+        "single_seconds": t_single,
+        "single_ok": sum(q is not None for q in single),
+        "batch_seconds": t_batch,
+        "batch_ok": sum(q is not None for q in batched.values()),
+        "cached_seconds": t_cached,
+        "cached_ok": sum(q is not None for q in cached.values()),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="get_quote vs get_quotes 基准")
+    ap.add_argument("symbols", nargs="*", default=WATCHLIST)
+    ap.add_argument("--batch", type=int, default=IB_QUOTE_BATCH)
+    args = ap.parse_args()
+
+    client = IBKRReadOnlyClient(contracts=ContractCache(path=None))
+    if not client.connect():
+        return 1
+    try:
+        r = bench(client, args.symbols, args.batch)
+    finally:
+        client.disconnect()
+
+    n = len(args.symbols)
+    print(f"symbols={n} batch={args.batch}")
+    print(f"get_quote  x{n}: {r['single_seconds']:.2f}s  {r['single_seconds'] / n * 1000:.0f}ms/symbol  ok={r['single_ok']}")
+    print(f"get_quotes    : {r['batch_seconds']:.2f}s  {r['batch_seconds'] / n * 1000:.0f}ms/symbol  ok={r['batch_ok']}")
+    print(f"get_quotes (contract cache hit): {r['cached_seconds']:.2f}s  {r['cached_seconds'] / n * 1000:.0f}ms/symbol  ok={r['cached_ok']}")
+    if r["batch_seconds"]:
+        print(f"speedup: {r['single_seconds'] / r['batch_seconds']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+测试用的 ib_insync 替身：只提供 ibkr_readonly 用到的名字（`from ib_insync import *`），
+没有网络、没有事件循环。测试里先 `fake_ib_insync.install()` 再 import ibkr_readonly；
+装了真正的 ib_insync 时 install() 什么都不做。
+"""
+
+import math
+import sys
+import types
+from dataclasses import dataclass, field
+from typing import List
+
+__all__ = ["Contract", "Stock", "Ticker", "IB", "ScannerSubscription", "TagValue", "util"]
+
+
+@dataclass
+class Contract:
+    secType: str = ""
+    conId: int = 0
+    symbol: str = ""
+    exchange: str = ""
+    primaryExchange: str = ""
+    currency: str = ""
+    localSymbol: str = ""
+    tradingClass: str = ""
+
+    @classmethod
+    def create(cls, **kwargs) -> "Contract":
+        return cls(**kwargs)
+
+
+class Stock(Contract):
+    def __init__(self, symbol: str = "", exchange: str = "", currency: str = "", **kwargs):
+        super().__init__(secType="STK", symbol=symbol, exchange=exchange, currency=currency, **kwargs)
+
+
+@dataclass
+class Ticker:
+    contract: Contract = None
+    last: float = math.nan
+    close: float = math.nan
+    bid: float = math.nan
+    ask: float = math.nan
+    volume: float = math.nan
+
+
+@dataclass
+class ScannerSubscription:
+    instrument: str = ""
+    locationCode: str = ""
+    scanCode: str = ""
+    numberOfRows: int = -1
+
+
+@dataclass
+class TagValue:
+    tag: str = ""
+    value: str = ""
+
+
+class Event:
+    def __init__(self):
+        self.handlers: List = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def clear(self):
+        self.handlers.clear()
+
+    def emit(self, *args):
+        for handler in list(self.handlers):
+            handler(*args)
+
+
+@dataclass
+class IB:
+    disconnectedEvent: Event = field(default_factory=Event)
+    connected: bool = False
+
+    def isConnected(self) -> bool:
+        return self.connected
+
+    def disconnect(self):
+        self.connected = False
+        self.disconnectedEvent.emit()
+
+    def portfolio(self) -> list:
+        return []
+
+
+util = types.SimpleNamespace(patchAsyncio=lambda: None)
+
+
+def install():
+    """真正的 ib_insync 不可用时，把本模块注册成 ib_insync"""
+    try:
+        import ib_insync  # noqa: F401
+    except ImportError:
+        sys.modules["ib_insync"] = sys.modules[__name__]
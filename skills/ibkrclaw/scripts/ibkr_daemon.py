@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+IBKR 只读查询守护进程
+常驻一个 IB() 连接（只握手、只 reqMarketDataType 一次），通过 Unix socket
+给本机任意多个调用方（agent、cron、脚本）复用，避免每次查询都重新连接 IB Gateway。
+
+协议：每行一个 JSON（换行分隔），同一连接上可以并发发多个请求，按 id 对应返回：
+  → {"id": 1, "method": "get_quote", "params": {"symbol": "AAPL"}}
+  ← {"id": 1, "result": {...}}   或   {"id": 1, "error": "..."}
+只开放 METHODS 中的只读查询；没有任何下单相关方法。
+
+用法：
+  python ibkr_daemon.py serve                      # 前台运行（launchd / nohup 托管）
+  python ibkr_daemon.py call get_quote symbol=AAPL  # 单次调用，输出 JSON
+  python ibkr_daemon.py call get_quotes 'symbols=["AAPL","MSFT","NVDA"]'
+  python ibkr_daemon.py call get_quote symbol=700 exchange=SEHK currency=HKD
+  python ibkr_daemon.py status                     # 连接状态、clientId、合约缓存命中、请求统计
+
+Python 中使用：
+  async with AsyncDaemonClient() as c:
+      quotes = await asyncio.gather(*(c.call("get_quote", symbol=s) for s in ["AAPL", "MSFT"]))
+  DaemonClient().call("get_positions")             # 同步版本
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import os
+import socket
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from ibkr_readonly import STATE_DIR, IBKRReadOnlyClient
+
+SOCKET_PATH = os.getenv("IBKR_DAEMON_SOCKET", os.path.join(STATE_DIR, "ibkr.sock"))
+
+# 对外开放的只读方法：名字 -> IBKRReadOnlyClient 上的 <名字>_async 协程
+METHODS = (
+    "get_accounts",
+    "get_balance",
+    "get_positions",
+    "get_quote",
+    "get_quotes",
+    "get_fundamentals",
+    "get_historical_data",
+    "run_scanner",
+    "get_company_news",
+)
+
+# 断线期间的请求最多等多久重连
+RECONNECT_WAIT = float(os.getenv("IBKR_DAEMON_RECONNECT_WAIT", "30"))
+# 新识别的合约多久写一次 contracts.json（秒；没有新条目时不写）
+CONTRACT_SAVE_INTERVAL = float(os.getenv("IBKR_DAEMON_CONTRACT_SAVE_INTERVAL", "60"))
+
+
+def log(msg: str):
+    print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {msg}", flush=True)
+
+
+def to_json(value: Any) -> Any:
+    """dataclass / list / dict 转成可 JSON 序列化的结构"""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    if isinstance(value, dict):
+        return {k: to_json(v) for k, v in value.items()}
+    return value
+
+
+class IBKRDaemon:
+    """持有唯一的 IB() 连接，把 socket 上的请求分发给 IBKRReadOnlyClient 的 *_async 方法"""
+
+    def __init__(self, client: Optional[IBKRReadOnlyClient] = None, path: str = SOCKET_PATH):
+        self.client = client or IBKRReadOnlyClient()
+        self.path = path
+        self.connected: Optional[asyncio.Event] = None  # 在 serve() 的事件循环里创建
+        self.started = time.time()
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self._reconnecting = False
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # ---------- IB 连接 ----------
+
+    async def connect(self):
+        """连到成功为止（网关未启动 / 重启中时指数退避，最长 60 秒一次）"""
+        delay = 1.0
+        while not await self.client.connect_async():
+            log(f"⚠️ IB Gateway 未就绪，{delay:.0f}秒后重试")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60.0)
+        self.connected.set()
+        log(f"✅ 已连接 IB Gateway ({self.client.host}:{self.client.port}) clientId={self.client.client_id}")
+
+    def _on_disconnect(self):
+        self.connected.clear()
+        if not self._reconnecting:
+            asyncio.ensure_future(self._reconnect())
+
+    async def _save_contracts(self):
+        while True:
+            await asyncio.sleep(CONTRACT_SAVE_INTERVAL)
+            try:
+                self.client.contracts.save()
+            except OSError as e:
+                log(f"⚠️ 合约缓存写盘失败: {e}")
+
+    async def _reconnect(self):
+        self._reconnecting = True
+        try:
+            log("⚠️ IB Gateway 断线，重连中...")
+            await asyncio.sleep(5)
+            await self.connect()
+        finally:
+            self._reconnecting = False
+
+    # ---------- 请求分发 ----------
+
+    async def dispatch(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == "status":
+            return self.status()
+        if method not in METHODS:
+            raise ValueError(f"unknown method: {method}")
+        if not self.connected.is_set():
+            await asyncio.wait_for(self.connected.wait(), RECONNECT_WAIT)
+        t0 = time.perf_counter()
+        try:
+            return to_json(await getattr(self.client, f"{method}_async")(**params))
+        finally:
+            s = self.stats.setdefault(method, {"calls": 0, "seconds": 0.0})
+            s["calls"] += 1
+            s["seconds"] = round(s["seconds"] + time.perf_counter() - t0, 4)
+
+    def status(self) -> dict:
+        return {
+            "connected": self.client.is_connected(),
+            "host": self.client.host,
+            "port": self.client.port,
+            "client_id": self.client.client_id,
+            "contracts": self.client.contracts.stats(),
+            "uptime": round(time.time() - self.started),
+            "stats": self.stats,
+        }
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(req: dict):
+            resp: Dict[str, Any] = {"id": req.get("id")}
+            try:
+                resp["result"] = await self.dispatch(req.get("method", ""), req.get("params") or {})
+            except asyncio.TimeoutError:
+                resp["error"] = "IB Gateway not connected"
+            except Exception as e:
+                resp["error"] = f"{type(e).__name__}: {e}"
+            async with lock:
+                writer.write(json.dumps(resp, ensure_ascii=False, default=str).encode() + b"\n")
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    req = json.loads(line)
+                except ValueError:
+                    req = {"method": "", "params": {}}
+                task = asyncio.ensure_future(answer(req))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+    # ---------- 生命周期 ----------
+
+    async def _listen(self) -> asyncio.AbstractServer:
+        # socket 在 umask 077 下创建，一出现就只有本人可连（bind 之后再 chmod 会留出窗口，
+        # 期间其他本机用户可以连上来读余额和持仓）
+        old = os.umask(0o077)
+        try:
+            return await asyncio.start_unix_server(self._handle, path=self.path)
+        finally:
+            os.umask(old)
+
+    async def serve(self):
+        if _socket_alive(self.path):
+            raise SystemExit(f"daemon already running on {self.path}")
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        self.connected = asyncio.Event()
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # 上次异常退出留下的 socket 文件
+
+        # 用异步重连替换同步的重连 handler（同步 sleep 会卡住整个事件循环）
+        self.client.ib.disconnectedEvent.clear()
+        await self.connect()
+        self.client.ib.disconnectedEvent += self._on_disconnect
+
+        self._server = await self._listen()
+        log(f"🔌 listening on {self.path}")
+        saver = asyncio.ensure_future(self._save_contracts())
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            saver.cancel()
+            self.client.disconnect()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+
+def _socket_alive(path: str) -> bool:
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        s.close()
+
+
+class AsyncDaemonClient:
+    """守护进程的异步客户端：一个连接上可以并发多个 call()，按 id 配对结果"""
+
+    def __init__(self, path: str = SOCKET_PATH):
+        self.path = path
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._read_task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        # 行情/历史数据的单行 JSON 可能较大，放宽 readline 的默认 64KB 限制
+        self._reader, self._writer = await asyncio.open_unix_connection(self.path, limit=16 * 1024 * 1024)
+        self._read_task = asyncio.ensure_future(self._read_loop())
+
+    async def close(self):
+        if self._writer:
+            self._writer.close()
+        if self._read_task:
+            self._read_task.cancel()
+
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                resp = json.loads(line)
+                fut = self._pending.pop(resp.get("id"), None)
+                if fut and not fut.done():
+                    if "error" in resp:
+                        fut.set_exception(RuntimeError(resp["error"]))
+                    else:
+                        fut.set_result(resp.get("result"))
+        finally:
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(ConnectionError("ibkr daemon closed the connection"))
+            self._pending.clear()
+
+    async def call(self, method: str, **params) -> Any:
+        self._next_id += 1
+        rid = self._next_id
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[rid] = fut
+        self._writer.write(json.dumps({"id": rid, "method": method, "params": params}).encode() + b"\n")
+        await self._writer.drain()
+        return await fut
+
+
+class DaemonClient:
+    """守护进程的同步客户端（短生命周期脚本用），一次一个请求"""
+
+    def __init__(self, path: str = SOCKET_PATH, timeout: float = 120):
+        self.path = path
+        self.timeout = timeout
+
+    def call(self, method: str, **params) -> Any:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(self.timeout)
+            s.connect(self.path)
+            s.sendall(json.dumps({"id": 1, "method": method, "params": params}).encode() + b"\n")
+            with s.makefile("rb") as f:
+                resp = json.loads(f.readline() or b'{"error": "ibkr daemon closed the connection"}')
+        if "error" in resp:
+            raise RuntimeError(resp["error"])
+        return resp.get("result")
+
+
+def _parse_params(items) -> Dict[str, Any]:
+    params = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        if key in ("symbol", "exchange", "currency"):
+            params[key] = value  # 港股代码如 700 不能被当成数字
+            continue
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+        if key == "symbols" and isinstance(params[key], list):
+            params[key] = [str(s) for s in params[key]]  # symbols=[700,"AAPL"] 同理
+    return params
+
+
+def main():
+    ap = argparse.ArgumentParser(description="IBKR 只读查询守护进程")
+    ap.add_argument("--socket", default=SOCKET_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("serve", help="连接 IB Gateway 并监听 Unix socket")
+    sub.add_parser("status", help="查看守护进程状态")
+    c = sub.add_parser("call", help="调用一个只读方法，如: call get_quote symbol=AAPL")
+    c.add_argument("method", choices=METHODS)
+    c.add_argument("params", nargs="*", help="key=value（value 按 JSON 解析，失败则当字符串；symbol/exchange/currency 及 symbols 的元素总是字符串）")
+    args = ap.parse_args()
+
+    if args.cmd == "serve":
+        try:
+            asyncio.run(IBKRDaemon(path=args.socket).serve())
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    try:
+        if args.cmd == "status":
+            result = DaemonClient(args.socket).call("status")
+        else:
+            result = DaemonClient(args.socket).call(args.method, **_parse_params(args.params))
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"❌ 守护进程未运行（{args.socket}），先执行: python ibkr_daemon.py serve", file=sys.stderr)
+        return 1
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, ensure_ascii=False, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
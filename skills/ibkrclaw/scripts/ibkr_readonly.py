@@ -6,15 +6,24 @@ IBKR Read-Only Client - ib_insync 版本
 
 依赖：ib_insync (pip install ib_insync)
 连接：IB Gateway 端口 4001 (live) 或 4002 (paper)
+
+每个查询都有同名的 `*_async` 协程版本（基于 ib_insync 原生的 `*Async` 方法），
+同步方法只是在事件循环里跑一次对应的协程；常驻进程见 ibkr_daemon.py。
+clientId 从 IB_CLIENT_ID 起按文件锁租用，多个脚本/agent 同时连接不会冲突。
+合约识别结果（conId）缓存在内存 + ~/.cache/ibkrclaw/contracts.json，见 ContractCache。
 """
 
-import os
+import asyncio
+import fcntl
+import json
 import math
+import os
+import tempfile
 import time
 import xml.etree.ElementTree as ET
-from datetime import datetime
 from dataclasses import dataclass
-from typing import Optional, List, Dict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
 
 from ib_insync import *
 
@@ -22,6 +31,14 @@ from ib_insync import *
 IB_HOST = os.getenv("IB_HOST", "127.0.0.1")
 IB_PORT = int(os.getenv("IB_PORT", "4001"))
 IB_CLIENT_ID = int(os.getenv("IB_CLIENT_ID", "1"))
+# 可租用的 clientId 个数：IB_CLIENT_ID .. IB_CLIENT_ID + IB_CLIENT_ID_POOL - 1
+IB_CLIENT_ID_POOL = int(os.getenv("IB_CLIENT_ID_POOL", "16"))
+# get_quotes 每批 reqTickers 的合约数：快照请求占用行情线路（默认 100 条），
+# 发送速率由 ib_insync 自身限流（45 条/秒）
+IB_QUOTE_BATCH = int(os.getenv("IB_QUOTE_BATCH", "50"))
+STATE_DIR = os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "ibkrclaw")
+# 合约缓存有效期（天）：conId 几乎不变，过期后重新 qualify 一次
+IB_CONTRACT_TTL_DAYS = float(os.getenv("IB_CONTRACT_TTL_DAYS", "7"))
 
 
 @dataclass
@@ -63,6 +80,168 @@ class FundamentalData:
     avg_volume: str
 
 
+def _safe(val, default=0):
+    """处理 NaN 和 None"""
+    if val is None or (isinstance(val, float) and math.isnan(val)):
+        return default
+    return val
+
+
+def ticker_to_quote(symbol: str, contract: Contract, ticker: Ticker) -> Quote:
+    """行情快照 Ticker → Quote"""
+    last = _safe(ticker.last) or _safe(ticker.close)
+    close = _safe(ticker.close)
+    change = (last - close) if last and close else 0
+    change_pct = (change / close * 100) if close else 0
+    return Quote(
+        conid=contract.conId,
+        symbol=symbol,
+        last_price=last or 0,
+        bid=_safe(ticker.bid),
+        ask=_safe(ticker.ask),
+        volume=int(_safe(ticker.volume)),
+        change=round(change, 2),
+        change_pct=round(change_pct, 2)
+    )
+
+
+class ContractCache:
+    """
+    合约识别缓存：(secType, symbol, exchange, currency) → 已 qualify 的 Contract。
+    内存 dict + JSON 文件（原子替换）；超过 ttl 的条目算未命中，重新 qualify 后覆盖。
+    put() 只标记 dirty，写盘在 save()：每批 get_quotes 一次、disconnect 时、守护进程定时。
+    path=None 时只在内存里缓存。
+    """
+
+    FIELDS = ("secType", "conId", "symbol", "exchange", "primaryExchange", "currency", "localSymbol", "tradingClass")
+
+    def __init__(self, path: Optional[str] = os.path.join(STATE_DIR, "contracts.json"),
+                 ttl: float = IB_CONTRACT_TTL_DAYS * 86400):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, dict] = {}
+        self._dirty = False
+        self.load()
+
+    @staticmethod
+    def key(symbol: str, exchange: str = "SMART", currency: str = "USD", sec_type: str = "STK") -> str:
+        return f"{sec_type}:{symbol}@{exchange}:{currency}".upper()
+
+    def load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def save(self):
+        """有新条目时写盘：与磁盘上其他进程写入的条目合并，顺带丢掉过期条目"""
+        if not self.path or not self._dirty:
+            return
+        now = time.time()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        for k, v in self._entries.items():
+            if v.get("t", 0) >= entries.get(k, {}).get("t", 0):
+                entries[k] = v
+        entries = {k: v for k, v in entries.items() if now - v.get("t", 0) < self.ttl}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".contracts-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._entries = entries
+        self._dirty = False
+
+    def clear(self):
+        """清空内存中的条目和计数（不动磁盘文件）"""
+        self._entries = {}
+        self.hits = self.misses = 0
+
+    def get(self, symbol: str, exchange: str = "SMART", currency: str = "USD") -> Optional[Contract]:
+        entry = self._entries.get(self.key(symbol, exchange, currency))
+        if entry is None or time.time() - entry.get("t", 0) >= self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return Contract.create(**entry["contract"])
+
+    def put(self, contract: Contract, symbol: str, exchange: str = "SMART", currency: str = "USD"):
+        if not contract.conId:
+            return
+        fields = {f: getattr(contract, f) for f in self.FIELDS if getattr(contract, f, None)}
+        self._entries[self.key(symbol, exchange, currency, contract.secType or "STK")] = {"t": time.time(), "contract": fields}
+        self._dirty = True
+
+    def warm(self, contracts: Iterable[Contract]) -> int:
+        """用持仓里已识别的股票合约预热（SMART 和其主交易所两个 key），返回写入条数"""
+        n = 0
+        for c in contracts:
+            if c.secType != "STK" or not c.conId or not c.currency:
+                continue
+            smart = Contract.create(**{f: getattr(c, f) for f in self.FIELDS if getattr(c, f, None)})
+            smart.exchange = "SMART"
+            self.put(smart, c.symbol, "SMART", c.currency)
+            n += 1
+            venue = c.primaryExchange or (c.exchange if c.exchange != "SMART" else "")
+            if venue:
+                direct = Contract.create(**{f: getattr(c, f) for f in self.FIELDS if getattr(c, f, None)})
+                direct.exchange = venue
+                self.put(direct, c.symbol, venue, c.currency)
+                n += 1
+        return n
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class ClientIdLease:
+    """
+    本机范围内的 clientId 租约：每个 id 对应一个 flock 文件锁，进程退出锁自动释放。
+    同一台机器上的多个脚本 / agent / 守护进程各自拿到不同的 id，不会互相踢下线。
+    """
+
+    def __init__(self, base: int = IB_CLIENT_ID, size: int = IB_CLIENT_ID_POOL, lock_dir: str = STATE_DIR):
+        self.base = base
+        self.size = max(1, size)
+        self.lock_dir = lock_dir
+        self.client_id: Optional[int] = None
+        self._fd: Optional[int] = None
+
+    def acquire(self, skip: Optional[set] = None) -> int:
+        """租用第一个空闲的 id（跳过 skip 中的 id）；全部占用时抛 RuntimeError"""
+        self.release()
+        os.makedirs(self.lock_dir, exist_ok=True)
+        for cid in range(self.base, self.base + self.size):
+            if skip and cid in skip:
+                continue
+            fd = os.open(os.path.join(self.lock_dir, f"clientid-{cid}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                continue
+            self.client_id, self._fd = cid, fd
+            return cid
+        raise RuntimeError(f"clientId {self.base}..{self.base + self.size - 1} 全部被占用")
+
+    def release(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        self.client_id, self._fd = None, None
+
+
 class IBKRReadOnlyClient:
     """
     IBKR 只读客户端 - ib_insync 版
@@ -70,10 +249,17 @@ class IBKRReadOnlyClient:
     ⚠️ 安全说明：此类不包含任何下单、修改、取消订单的方法。
     """
 
-    def __init__(self, host: str = IB_HOST, port: int = IB_PORT, client_id: int = IB_CLIENT_ID):
+    def __init__(self, host: str = IB_HOST, port: int = IB_PORT, client_id: Optional[int] = None,
+                 contracts: Optional[ContractCache] = None):
+        """
+        client_id=None：从 IB_CLIENT_ID 起租用空闲 id；指定时固定使用该 id
+        contracts：合约缓存，默认 ~/.cache/ibkrclaw/contracts.json
+        """
         self.host = host
         self.port = port
         self.client_id = client_id
+        self.lease = ClientIdLease() if client_id is None else None
+        self.contracts = contracts if contracts is not None else ContractCache()
         self.ib = IB()
         self._setup_reconnect()
 
@@ -90,16 +276,43 @@ class IBKRReadOnlyClient:
 
         self.ib.disconnectedEvent += on_disconnect
 
+    def _run(self, coro):
+        """在 ib_insync 的事件循环里跑完一个协程（同步 API 用）"""
+        return self.ib.run(coro)
+
+    async def connect_async(self, timeout: float = 4) -> bool:
+        """
+        连接 IB Gateway。租用的 clientId 若被网关占着（上次连接没释放，表现为握手超时），
+        自动换下一个 id 再试。
+        """
+        tried: set = set()
+        for _ in range(3 if self.lease else 1):
+            if self.lease:
+                self.client_id = self.lease.acquire(skip=tried)
+                tried.add(self.client_id)
+            try:
+                await self.ib.connectAsync(self.host, self.port, clientId=self.client_id, timeout=timeout)
+                # 使用延迟行情（免费），避免 "not subscribed" 错误
+                self.ib.reqMarketDataType(3)
+                # 持仓合约已识别过，直接预热合约缓存
+                if self.contracts.warm(p.contract for p in self.ib.portfolio()):
+                    self.contracts.save()
+                return True
+            except asyncio.TimeoutError:
+                print(f"⚠️ clientId {self.client_id} 握手超时（可能被占用）")
+                if self.lease:
+                    self.lease.release()
+            except Exception as e:
+                print(f"❌ 连接失败: {e}")
+                if self.lease:
+                    self.lease.release()
+                return False
+        print("❌ 连接失败: clientId 均不可用")
+        return False
+
     def connect(self) -> bool:
         """连接 IB Gateway"""
-        try:
-            self.ib.connect(self.host, self.port, clientId=self.client_id)
-            # 使用延迟行情（免费），避免 "not subscribed" 错误
-            self.ib.reqMarketDataType(3)
-            return True
-        except Exception as e:
-            print(f"❌ 连接失败: {e}")
-            return False
+        return self._run(self.connect_async())
 
     def disconnect(self):
         """断开连接"""
@@ -107,6 +320,9 @@ class IBKRReadOnlyClient:
             # 移除重连 handler 避免断开后自动重连
             self.ib.disconnectedEvent.clear()
             self.ib.disconnect()
+        self.contracts.save()
+        if self.lease:
+            self.lease.release()
 
     def is_connected(self) -> bool:
         """检查连接状态"""
@@ -116,9 +332,15 @@ class IBKRReadOnlyClient:
         """获取账户列表"""
         return self.ib.managedAccounts()
 
+    async def get_accounts_async(self) -> List[str]:
+        return self.get_accounts()
+
     def get_balance(self) -> dict:
         """获取账户余额/总结"""
-        summary = self.ib.accountSummary()
+        return self._run(self.get_balance_async())
+
+    async def get_balance_async(self) -> dict:
+        summary = await self.ib.accountSummaryAsync()
         result = {}
         for item in summary:
             try:
@@ -152,57 +374,89 @@ class IBKRReadOnlyClient:
             ))
         return positions
 
-    def search_symbol(self, symbol: str) -> Optional[Contract]:
-        """搜索股票代码，返回 qualified Contract"""
-        contract = Stock(symbol, 'SMART', 'USD')
+    async def get_positions_async(self) -> List[Position]:
+        return self.get_positions()
+
+    def search_symbol(self, symbol: str, exchange: str = 'SMART', currency: str = 'USD') -> Optional[Contract]:
+        """
+        搜索股票代码，返回 qualified Contract（先查合约缓存）
+        非美股示例：search_symbol("700", "SEHK", "HKD")、search_symbol("SAP", "IBIS", "EUR")
+        """
+        return self._run(self.search_symbol_async(symbol, exchange, currency))
+
+    async def search_symbol_async(self, symbol: str, exchange: str = 'SMART', currency: str = 'USD') -> Optional[Contract]:
+        cached = self.contracts.get(symbol, exchange, currency)
+        if cached:
+            return cached
+        contract = Stock(symbol, exchange, currency)
         try:
-            qualified = self.ib.qualifyContracts(contract)
+            qualified = await self.ib.qualifyContractsAsync(contract)
             if qualified:
+                self.contracts.put(qualified[0], symbol, exchange, currency)  # 写盘留给 disconnect / 守护进程
                 return qualified[0]
         except Exception:
             pass
         return None
 
-    def get_quote(self, symbol: str) -> Optional[Quote]:
+    def get_quote(self, symbol: str, exchange: str = 'SMART', currency: str = 'USD') -> Optional[Quote]:
         """获取实时行情快照"""
-        contract = self.search_symbol(symbol)
+        return self._run(self.get_quote_async(symbol, exchange, currency))
+
+    async def get_quote_async(self, symbol: str, exchange: str = 'SMART', currency: str = 'USD') -> Optional[Quote]:
+        contract = await self.search_symbol_async(symbol, exchange, currency)
         if not contract:
             return None
 
-        def safe(val, default=0):
-            """处理 NaN 和 None"""
-            import math
-            if val is None or (isinstance(val, float) and math.isnan(val)):
-                return default
-            return val
-
         try:
-            [ticker] = self.ib.reqTickers(contract)
-            last = safe(ticker.last) or safe(ticker.close)
-            bid = safe(ticker.bid)
-            ask = safe(ticker.ask)
-            volume = safe(ticker.volume)
-            close = safe(ticker.close)
-            change = (last - close) if last and close else 0
-            change_pct = (change / close * 100) if close else 0
-
-            return Quote(
-                conid=contract.conId,
-                symbol=symbol,
-                last_price=last or 0,
-                bid=bid,
-                ask=ask,
-                volume=int(volume),
-                change=round(change, 2),
-                change_pct=round(change_pct, 2)
-            )
+            [ticker] = await self.ib.reqTickersAsync(contract)
+            return ticker_to_quote(symbol, contract, ticker)
         except Exception as e:
             print(f"❌ 获取行情失败: {e}")
             return None
 
-    def get_fundamentals(self, symbol: str) -> Optional[FundamentalData]:
+    def get_quotes(self, symbols: List[str], batch: int = IB_QUOTE_BATCH,
+                   exchange: str = 'SMART', currency: str = 'USD') -> Dict[str, Optional[Quote]]:
+        """
+        批量获取行情快照：缓存未命中的合约一次 qualifyContracts，reqTickers 每 batch 个一批。
+        返回 {symbol: Quote}，无法识别或取不到行情的 symbol 为 None。
+        """
+        return self._run(self.get_quotes_async(symbols, batch, exchange, currency))
+
+    async def get_quotes_async(self, symbols: List[str], batch: int = IB_QUOTE_BATCH,
+                               exchange: str = 'SMART', currency: str = 'USD') -> Dict[str, Optional[Quote]]:
+        symbols = list(dict.fromkeys(symbols))  # 去重，保持顺序
+        quotes: Dict[str, Optional[Quote]] = {s: None for s in symbols}
+        contracts = {s: self.contracts.get(s, exchange, currency) for s in symbols}
+        misses = {s: Stock(s, exchange, currency) for s, c in contracts.items() if c is None}
+        if misses:
+            try:
+                # qualifyContractsAsync 并发发出全部 reqContractDetails，只等一轮
+                await self.ib.qualifyContractsAsync(*misses.values())
+            except Exception as e:
+                print(f"❌ 合约识别失败: {e}")
+            for s, c in misses.items():
+                if c.conId:
+                    self.contracts.put(c, s, exchange, currency)
+                    contracts[s] = c
+            self.contracts.save()
+        qualified = [(s, c) for s, c in contracts.items() if c is not None and c.conId]
+        for i in range(0, len(qualified), max(1, batch)):
+            chunk = qualified[i:i + max(1, batch)]
+            try:
+                tickers = await self.ib.reqTickersAsync(*(c for _, c in chunk))
+            except Exception as e:
+                print(f"❌ 获取行情失败: {e}")
+                continue
+            for (symbol, contract), ticker in zip(chunk, tickers):
+                quotes[symbol] = ticker_to_quote(symbol, contract, ticker)
+        return quotes
+
+    def get_fundamentals(self, symbol: str, exchange: str = 'SMART', currency: str = 'USD') -> Optional[FundamentalData]:
         """获取个股基本面指标"""
-        contract = self.search_symbol(symbol)
+        return self._run(self.get_fundamentals_async(symbol, exchange, currency))
+
+    async def get_fundamentals_async(self, symbol: str, exchange: str = 'SMART', currency: str = 'USD') -> Optional[FundamentalData]:
+        contract = await self.search_symbol_async(symbol, exchange, currency)
         if not contract:
             return None
 
@@ -219,7 +473,7 @@ class IBKRReadOnlyClient:
 
         # 尝试获取 fundamental data XML
         try:
-            xml_data = self.ib.reqFundamentalData(contract, 'ReportSnapshot')
+            xml_data = await self.ib.reqFundamentalDataAsync(contract, 'ReportSnapshot')
             if xml_data:
                 root = ET.fromstring(xml_data)
                 # 解析公司信息
@@ -259,7 +513,7 @@ class IBKRReadOnlyClient:
 
         # 如果 fundamental data 不可用，用 ticker 数据补充
         try:
-            [ticker] = self.ib.reqTickers(contract)
+            [ticker] = await self.ib.reqTickersAsync(contract)
             if high_52w == "N/A" and hasattr(ticker, 'high') and ticker.high:
                 high_52w = str(ticker.high)
             if low_52w == "N/A" and hasattr(ticker, 'low') and ticker.low:
@@ -282,18 +536,23 @@ class IBKRReadOnlyClient:
             avg_volume=avg_volume
         )
 
-    def get_historical_data(self, symbol: str, duration: str = "3 M", bar_size: str = "1 day") -> List[dict]:
+    def get_historical_data(self, symbol: str, duration: str = "3 M", bar_size: str = "1 day",
+                            exchange: str = 'SMART', currency: str = 'USD') -> List[dict]:
         """
         获取历史 K 线数据
         duration: "1 D", "1 W", "1 M", "3 M", "6 M", "1 Y", "5 Y"
         bar_size: "1 min", "5 mins", "1 hour", "1 day", "1 week", "1 month"
         """
-        contract = self.search_symbol(symbol)
+        return self._run(self.get_historical_data_async(symbol, duration, bar_size, exchange, currency))
+
+    async def get_historical_data_async(self, symbol: str, duration: str = "3 M", bar_size: str = "1 day",
+                                        exchange: str = 'SMART', currency: str = 'USD') -> List[dict]:
+        contract = await self.search_symbol_async(symbol, exchange, currency)
         if not contract:
             return []
 
         try:
-            bars = self.ib.reqHistoricalData(
+            bars = await self.ib.reqHistoricalDataAsync(
                 contract,
                 endDateTime='',
                 durationStr=duration,
@@ -321,6 +580,9 @@ class IBKRReadOnlyClient:
         全市场智能扫描
         scan_type: TOP_PERC_GAIN, TOP_PERC_LOSE, MOST_ACTIVE, HIGH_VS_13W_HL
         """
+        return self._run(self.run_scanner_async(scan_type, size))
+
+    async def run_scanner_async(self, scan_type: str = "TOP_PERC_GAIN", size: int = 10) -> List[dict]:
         try:
             sub = ScannerSubscription(
                 instrument='STK',
@@ -332,7 +594,7 @@ class IBKRReadOnlyClient:
             tag_values = [
                 TagValue('marketCapAbove', '100000000')
             ]
-            results = self.ib.reqScannerData(sub, scannerSubscriptionFilterOptions=tag_values)
+            results = await self.ib.reqScannerDataAsync(sub, scannerSubscriptionFilterOptions=tag_values)
             return [
                 {
                     "rank": r.rank,
@@ -371,6 +633,10 @@ class IBKRReadOnlyClient:
             pass
         return []
 
+    async def get_company_news_async(self, symbol: str, limit: int = 5) -> List[dict]:
+        # requests 是阻塞的，放到线程里跑，不卡住事件循环
+        return await asyncio.to_thread(self.get_company_news, symbol, limit)
+
 
 def format_currency(value: float) -> str:
     if value >= 0:
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+ibkr_daemon 的离线测试：请求分发、断线等待、同一连接上的并发请求、客户端按 id 配对。
+不连 IB Gateway（假客户端），ib_insync 用 fake_ib_insync 代替。
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase, main, mock
+
+import fake_ib_insync
+
+fake_ib_insync.install()
+
+import ibkr_daemon  # noqa: E402
+from ibkr_daemon import AsyncDaemonClient, IBKRDaemon, _parse_params  # noqa: E402
+from ibkr_readonly import ContractCache  # noqa: E402
+
+
+class FakeClient:
+    """只实现守护进程用到的属性；get_quote_async 按 symbol 决定耗时"""
+
+    host, port, client_id = "127.0.0.1", 4001, 7
+
+    def __init__(self):
+        self.contracts = ContractCache(path=None)
+
+    def is_connected(self) -> bool:
+        return False
+
+    async def get_quote_async(self, symbol: str):
+        await asyncio.sleep({"SLOW": 0.2}.get(symbol, 0))
+        return {"symbol": symbol}
+
+
+class TestDaemon(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = f"{self.tmp}/ibkr.sock"
+        self.daemon = IBKRDaemon(FakeClient(), path=self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def run_async(self, coro):
+        async def wrapper():
+            self.daemon.connected = asyncio.Event()
+            return await coro()
+
+        return asyncio.run(wrapper())
+
+    def test_dispatch_rejects_unknown_and_serves_status_offline(self):
+        async def go():
+            with self.assertRaisesRegex(ValueError, "unknown method: place_order"):
+                await self.daemon.dispatch("place_order", {})
+            return await self.daemon.dispatch("status", {})
+
+        status = self.run_async(go)
+        self.assertEqual((status["connected"], status["client_id"]), (False, 7))
+        self.assertEqual(status["contracts"], {"entries": 0, "hits": 0, "misses": 0})
+
+    def test_waits_for_reconnect(self):
+        async def go():
+            late = asyncio.ensure_future(self.daemon.dispatch("get_quote", {"symbol": "AAPL"}))
+            await asyncio.sleep(0.01)
+            self.assertFalse(late.done())
+            self.daemon.connected.set()
+            result = await late
+            self.daemon.connected.clear()
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.daemon.dispatch("get_quote", {"symbol": "AAPL"})
+            return result
+
+        with mock.patch.object(ibkr_daemon, "RECONNECT_WAIT", 0.05):
+            self.assertEqual(self.run_async(go), {"symbol": "AAPL"})
+        self.assertEqual(self.daemon.stats["get_quote"]["calls"], 1)
+
+    def test_concurrent_requests_answered_out_of_order(self):
+        async def go():
+            self.daemon.connected.set()
+            server = await asyncio.start_unix_server(self.daemon._handle, path=self.path)
+            async with server:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+                for line in (
+                    {"id": 1, "method": "get_quote", "params": {"symbol": "SLOW"}},
+                    {"id": 2, "method": "get_quote", "params": {"symbol": "AAPL"}},
+                ):
+                    writer.write(json.dumps(line).encode() + b"\n")
+                writer.write(b"not json\n")
+                await writer.drain()
+                answers = [json.loads(await reader.readline()) for _ in range(3)]
+                writer.close()
+
+                async with AsyncDaemonClient(self.path) as c:
+                    quotes = await asyncio.gather(*(c.call("get_quote", symbol=s) for s in ("SLOW", "MSFT")))
+                    with self.assertRaisesRegex(RuntimeError, "IB Gateway not connected"):
+                        self.daemon.connected.clear()
+                        with mock.patch.object(ibkr_daemon, "RECONNECT_WAIT", 0.01):
+                            await c.call("get_quote", symbol="AAPL")
+                await asyncio.sleep(0.01)  # 让 _handle 读到 EOF 正常退出，再关 server
+            return answers, quotes
+
+        answers, quotes = self.run_async(go)
+        self.assertEqual(answers[-1], {"id": 1, "result": {"symbol": "SLOW"}})
+        by_id = {a["id"]: a for a in answers}
+        self.assertEqual(by_id[2], {"id": 2, "result": {"symbol": "AAPL"}})
+        self.assertEqual(by_id[None], {"id": None, "error": "ValueError: unknown method: "})
+        self.assertEqual(quotes, [{"symbol": "SLOW"}, {"symbol": "MSFT"}])
+
+    def test_socket_is_owner_only_from_creation(self):
+        async def go():
+            old = os.umask(0o022)
+            try:
+                server = await self.daemon._listen()
+            finally:
+                os.umask(old)
+            mode = os.stat(self.path).st_mode
+            server.close()
+            await server.wait_closed()
+            return mode
+
+        self.assertEqual(self.run_async(go) & 0o077, 0)
+
+    def test_client_fails_pending_calls_when_socket_closes(self):
+        async def hang_up(reader, writer):
+            await reader.readline()
+            writer.close()
+
+        async def go():
+            server = await asyncio.start_unix_server(hang_up, path=self.path)
+            async with server:
+                async with AsyncDaemonClient(self.path) as c:
+                    await c.call("get_positions")
+
+        with self.assertRaisesRegex(ConnectionError, "closed the connection"):
+            self.run_async(go)
+
+
+class TestParseParams(TestCase):
+    def test_symbols_stay_strings(self):
+        params = _parse_params(["symbol=700", "exchange=SEHK", 'symbols=[700, "AAPL"]', "batch=25", "bar_size=1 day"])
+        self.assertEqual(
+            params,
+            {"symbol": "700", "exchange": "SEHK", "symbols": ["700", "AAPL"], "batch": 25, "bar_size": "1 day"},
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+ibkr_readonly 的离线测试：合约缓存、批量行情、clientId 租约（ib_insync 用 fake_ib_insync 代替）。
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase, main, mock
+
+import fake_ib_insync
+
+fake_ib_insync.install()
+
+from ib_insync import Contract, Stock, Ticker  # noqa: E402
+from ibkr_readonly import ClientIdLease, ContractCache, IBKRReadOnlyClient  # noqa: E402
+
+
+class FakeIB:
+    """记录 qualifyContractsAsync / reqTickersAsync 调用的假 IB()"""
+
+    def __init__(self, known, failing=()):
+        self.known = known  # symbol -> conId
+        self.failing = set(failing)  # 这些 symbol 所在的 reqTickers 批次整批失败
+        self.qualify_calls = []
+        self.ticker_calls = []
+
+    async def qualifyContractsAsync(self, *contracts):
+        self.qualify_calls.append([c.symbol for c in contracts])
+        for c in contracts:
+            c.conId = self.known.get(c.symbol, 0)
+        return [c for c in contracts if c.conId]
+
+    def isConnected(self):
+        return False
+
+    async def reqTickersAsync(self, *contracts):
+        symbols = [c.symbol for c in contracts]
+        self.ticker_calls.append(symbols)
+        if self.failing & set(symbols):
+            raise RuntimeError("pacing violation")
+        return [Ticker(contract=c, last=100.0 + c.conId, close=100.0, volume=10) for c in contracts]
+
+
+class TestContractCache(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "contracts.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_key_format(self):
+        self.assertEqual(ContractCache.key("700", "sehk", "hkd"), "STK:700@SEHK:HKD")
+        self.assertEqual(ContractCache.key("brk b"), "STK:BRK B@SMART:USD")
+
+    def test_ttl_expiry(self):
+        cache = ContractCache(self.path, ttl=60)
+        cache.put(Stock("AAPL", "SMART", "USD", conId=265598), "AAPL")
+        self.assertEqual(cache.get("AAPL").conId, 265598)
+        with mock.patch("time.time", return_value=time.time() + 61):
+            self.assertIsNone(cache.get("AAPL"))
+        self.assertEqual(cache.stats(), {"entries": 1, "hits": 1, "misses": 1})
+        cache.put(Stock("NONE", "SMART", "USD"), "NONE")  # 未识别（conId=0）不缓存
+        self.assertIsNone(cache.get("NONE"))
+
+    def test_save_merges_with_other_processes(self):
+        a, b = ContractCache(self.path), ContractCache(self.path)
+        a.put(Stock("AAPL", "SMART", "USD", conId=1), "AAPL")
+        a.save()
+        b.put(Stock("MSFT", "SMART", "USD", conId=2), "MSFT")
+        b._entries[ContractCache.key("OLD")] = {"t": 0, "contract": {"conId": 3, "symbol": "OLD"}}
+        b._dirty = True
+        b.save()
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(sorted(json.load(f)), ["STK:AAPL@SMART:USD", "STK:MSFT@SMART:USD"])
+        fresh = ContractCache(self.path)
+        self.assertEqual((fresh.get("AAPL").conId, fresh.get("MSFT").conId), (1, 2))
+        self.assertEqual(os.listdir(self.tmp), ["contracts.json"])  # 没有残留临时文件
+
+    def test_warm_writes_smart_and_primary_exchange_keys(self):
+        cache = ContractCache(path=None)
+        held = [
+            Contract(secType="STK", conId=4815747, symbol="NVDA", exchange="NASDAQ", primaryExchange="NASDAQ", currency="USD"),
+            Contract(secType="OPT", conId=9, symbol="NVDA", exchange="SMART", currency="USD"),
+        ]
+        self.assertEqual(cache.warm(held), 2)
+        smart, direct = cache.get("NVDA"), cache.get("NVDA", "NASDAQ")
+        self.assertEqual((smart.exchange, smart.conId), ("SMART", 4815747))
+        self.assertEqual((direct.exchange, direct.primaryExchange), ("NASDAQ", "NASDAQ"))
+        self.assertEqual(held[0].exchange, "NASDAQ")  # 不改动持仓里的合约
+
+
+class TestGetQuotes(TestCase):
+    def setUp(self):
+        self.client = IBKRReadOnlyClient(client_id=1, contracts=ContractCache(path=None))
+        self.client.ib = FakeIB({"AAPL": 1, "MSFT": 2, "FAIL": 3, "NVDA": 4})
+
+    def test_one_qualify_pass_and_chunked_tickers(self):
+        symbols = ["AAPL", "NOPE", "MSFT", "FAIL", "NVDA", "AAPL"]
+        self.client.ib.failing = {"FAIL"}
+        quotes = asyncio.run(self.client.get_quotes_async(symbols, batch=2))
+        self.assertEqual(list(quotes), ["AAPL", "NOPE", "MSFT", "FAIL", "NVDA"])
+        self.assertEqual(self.client.ib.qualify_calls, [["AAPL", "NOPE", "MSFT", "FAIL", "NVDA"]])
+        self.assertEqual(self.client.ib.ticker_calls, [["AAPL", "MSFT"], ["FAIL", "NVDA"]])
+        self.assertEqual((quotes["AAPL"].last_price, quotes["AAPL"].change), (101.0, 1.0))
+        self.assertEqual(quotes["MSFT"].conid, 2)
+        self.assertEqual([quotes[s] for s in ("NOPE", "FAIL", "NVDA")], [None, None, None])
+
+    def test_cached_contracts_skip_qualify(self):
+        asyncio.run(self.client.get_quotes_async(["AAPL", "MSFT"]))
+        quotes = asyncio.run(self.client.get_quotes_async(["MSFT", "AAPL"], batch=50))
+        self.assertEqual(len(self.client.ib.qualify_calls), 1)
+        self.assertEqual(self.client.ib.ticker_calls[-1], ["MSFT", "AAPL"])
+        self.assertEqual(list(quotes), ["MSFT", "AAPL"])
+
+
+class TestSearchSymbol(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "contracts.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_misses_are_saved_on_disconnect_not_per_lookup(self):
+        client = IBKRReadOnlyClient(client_id=1, contracts=ContractCache(self.path))
+        client.ib = FakeIB({"AAPL": 1, "MSFT": 2})
+        for symbol in ("AAPL", "MSFT"):
+            self.assertIsNotNone(asyncio.run(client.search_symbol_async(symbol)))
+        self.assertFalse(os.path.exists(self.path))
+        client.disconnect()
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(sorted(json.load(f)), ["STK:AAPL@SMART:USD", "STK:MSFT@SMART:USD"])
+
+
+class TestClientIdLease(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_acquire_skip_and_release(self):
+        a, b, c = (ClientIdLease(base=10, size=2, lock_dir=self.tmp) for _ in range(3))
+        self.assertEqual(a.acquire(), 10)
+        self.assertEqual(b.acquire(), 11)
+        with self.assertRaises(RuntimeError):
+            c.acquire()
+        a.release()
+        self.assertIsNone(a.client_id)
+        with self.assertRaises(RuntimeError):
+            c.acquire(skip={10})
+        self.assertEqual(c.acquire(), 10)
+        b.release()
+        c.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the obsidian-huaigu vault scripts.
+
+Runs against a real vault (--vault) or a synthetic one generated into a temp dir
+(--synthetic N notes). `search` times end-to-end process invocations (what an
+agent pays per call); `recent` times the index refresh in-process; `walk`
+compares os.walk / Path.rglob with the shared VaultWalker (cold and cached). `docx`
+generates a large .docx (--docx-mb of document.xml) and compares the old
+whole-tree parse with the streaming converter (wall time and peak RSS).
+
+Usage:
+  python3 bench_vault.py search --synthetic 5000 --repeat 50
+  python3 bench_vault.py search --vault ~/obsidian/obsidian_huaigu --query MiniMax --query HSBC
+  python3 bench_vault.py recent --synthetic 20000
+  python3 bench_vault.py walk --synthetic 20000
+  python3 bench_vault.py docx --docx-mb 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FOLDERS = [
+    "00-Inbox",
+    "01-Projects/trading-2025",
+    "02-Areas",
+    "03-Resources/Clippings",
+    "03-Resources/Coding-References",
+    "03-Resources/trading-references",
+    "04-Atlas",
+    "05-Archive",
+]
+WORDS = "交易 策略 回测 python docker MiniMax HSBC agent 旅行 酒店 期权 仓位 linux note todo".split()
+
+
+def make_synthetic_vault(root: str, n: int, *, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    for i in range(n):
+        folder = os.path.join(root, FOLDERS[i % len(FOLDERS)], f"sub{i % 17}")
+        os.makedirs(folder, exist_ok=True)
+        body = "\n".join(" ".join(rnd.choices(WORDS, k=12)) for _ in range(40))
+        with open(os.path.join(folder, f"note-{i}.md"), "w", encoding="utf-8") as f:
+            f.write(f"# Note {i}\n\n{body}\n")
+    os.makedirs(os.path.join(root, ".obsidian"), exist_ok=True)
+    return root
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    s = sorted(samples)
+    k = min(len(s) - 1, max(0, int(round(pct / 100.0 * (len(s) - 1)))))
+    return s[k]
+
+
+def report(label: str, samples: list[float]) -> None:
+    ms = [x * 1000 for x in samples]
+    print(
+        f"{label:<28} n={len(ms):<5} p50={percentile(ms, 50):8.2f}ms "
+        f"p99={percentile(ms, 99):8.2f}ms mean={statistics.fmean(ms):8.2f}ms"
+    )
+
+
+def time_cmd(cmd: list[str], env: dict | None = None) -> float:
+    t0 = time.perf_counter()
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False, env=env)
+    return time.perf_counter() - t0
+
+
+def bench_search(args, vault: str) -> None:
+    script = os.path.join(SCRIPT_DIR, "vault_search.py")
+    queries = args.query or ["MiniMax", "HSBC", "期权", "docker", "todo"]
+    sock = os.path.join(tempfile.mkdtemp(prefix="vs-sock-"), "vault_search.sock")
+    base = [sys.executable, script, "--vault", vault, "--socket", sock, "--limit", str(args.limit)]
+
+    direct: list[float] = []
+    for _ in range(args.repeat):
+        for q in queries:
+            direct.append(time_cmd(base + [q, "--no-server"]))
+    report("direct (no server)", direct)
+
+    server = subprocess.Popen(
+        [sys.executable, script, "serve", "--vault", vault, "--socket", sock],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 120
+        while not os.path.exists(sock) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        served: list[float] = []
+        for _ in range(args.repeat):
+            for q in queries:
+                served.append(time_cmd(base + [q]))
+        report("via server", served)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def bench_recent(args, vault: str) -> None:
+    import vault_recent
+
+    index_path = os.path.join(tempfile.mkdtemp(prefix="vr-index-"), "recent.json")
+
+    def run_once(*, trust: bool = False) -> float:
+        t0 = time.perf_counter()
+        index = vault_recent.RecencyIndex(vault, index_path)
+        index.load()
+        index.refresh(trust_dir_mtime=trust)
+        index.save()
+        vault_recent.recent(index, 30)
+        return time.perf_counter() - t0
+
+    def baseline() -> float:
+        # What vault_recent.py did before the index: os.walk + os.stat + full sort.
+        t0 = time.perf_counter()
+        rows = []
+        for base, dirs, files in os.walk(vault):
+            dirs[:] = [d for d in dirs if d not in vault_recent.SKIP_DIRS]
+            for f in files:
+                if f.lower().endswith(".md"):
+                    p = os.path.join(base, f)
+                    rows.append((os.stat(p).st_mtime, p))
+        rows.sort(reverse=True)
+        return time.perf_counter() - t0
+
+    report("os.walk + stat + sort", [baseline() for _ in range(args.repeat)])
+    cold = []
+    for _ in range(args.repeat):
+        if os.path.exists(index_path):
+            os.unlink(index_path)
+        cold.append(run_once())
+    report("index cold", cold)
+    report("index warm", [run_once() for _ in range(args.repeat)])
+    report("index warm, trust dir mtime", [run_once(trust=True) for _ in range(args.repeat)])
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+# Each variant runs in a fresh interpreter so ru_maxrss is its own peak.
+DOCX_RUNNERS = {
+    # What convert_docx_to_md.py did before: whole document.xml in memory + findall.
+    "ET.fromstring (old)": """
+import xml.etree.ElementTree as ET, zipfile
+NS = {"w": W_NS}
+root = ET.fromstring(zipfile.ZipFile(PATH).read("word/document.xml"))
+for p in root.findall(".//w:p", NS):
+    "".join(t.text or "" for t in p.findall(".//w:t", NS))
+""",
+    "iterparse (streaming)": """
+import os, zipfile
+from convert_docx_to_md import iter_blocks, read_numbering, read_styles, write_markdown
+with zipfile.ZipFile(PATH) as z, z.open("word/document.xml") as f:
+    write_markdown(iter_blocks(f, read_styles(z), read_numbering(z)), open(os.devnull, "w"))
+""",
+}
+
+
+def make_large_docx(path: str, mb: int, *, seed: int = 0) -> int:
+    rnd = random.Random(seed)
+    written = 0
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z, z.open("word/document.xml", "w") as f:
+        f.write(f'<w:document xmlns:w="{W_NS}"><w:body>'.encode())
+        i = 0
+        while written < mb * 1024 * 1024:
+            if i % 50 == 0:
+                chunk = f'<w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr><w:r><w:t>Section {i}</w:t></w:r></w:p>'
+            elif i % 50 == 25:
+                rows = "".join(
+                    "<w:tr>" + "".join(f"<w:tc><w:p><w:r><w:t>{w}</w:t></w:r></w:p></w:tc>" for w in rnd.choices(WORDS, k=4)) + "</w:tr>"
+                    for _ in range(8)
+                )
+                chunk = f"<w:tbl>{rows}</w:tbl>"
+            else:
+                text = " ".join(rnd.choices(WORDS, k=30))
+                chunk = f"<w:p><w:r><w:rPr><w:b/></w:rPr><w:t>{text}</w:t></w:r></w:p>"
+            data = chunk.encode("utf-8")
+            f.write(data)
+            written += len(data)
+            i += 1
+        f.write(b"<w:sectPr/></w:body></w:document>")
+    return written
+
+
+def bench_docx(args) -> None:
+    path = args.docx or os.path.join(tempfile.mkdtemp(prefix="docx-bench-"), "big.docx")
+    if not args.docx:
+        size = make_large_docx(path, args.docx_mb)
+        print(f"[bench] synthetic docx: {path} ({size / 1e6:.0f} MB document.xml, {os.path.getsize(path) / 1e6:.0f} MB zipped)")
+    for label, body in DOCX_RUNNERS.items():
+        code = (
+            f"import sys, resource; sys.path.insert(0, {SCRIPT_DIR!r}); PATH = {path!r}; W_NS = {W_NS!r}\n"
+            + body
+            + "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+        )
+        t0 = time.perf_counter()
+        res = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True, check=True)
+        elapsed = time.perf_counter() - t0
+        print(f"{label:<28} wall={elapsed:8.2f}s peak_rss={int(res.stdout.split()[-1]) / 1024:8.1f}MB")
+
+
+def bench_walk(args, vault: str) -> None:
+    import fnmatch
+    from pathlib import Path
+
+    import vault_walk
+
+    cache_path = os.path.join(tempfile.mkdtemp(prefix="vw-cache-"), "walk.json")
+
+    def os_walk() -> float:
+        # vault_search.iter_md_files before the shared walker.
+        t0 = time.perf_counter()
+        n = 0
+        for base, dirs, files in os.walk(vault):
+            dirs[:] = [d for d in dirs if d not in vault_walk.SKIP_DIRS]
+            n += sum(1 for f in files if fnmatch.fnmatch(f, "*.md"))
+        return time.perf_counter() - t0
+
+    def rglob() -> float:
+        # analyze_vault.py before the shared walker.
+        t0 = time.perf_counter()
+        root = Path(vault)
+        [p for p in root.rglob("*.md") if not any(part.startswith(".") for part in p.relative_to(root).parts)]
+        return time.perf_counter() - t0
+
+    def timed(fn) -> float:
+        t0 = time.perf_counter()
+        fn()
+        return time.perf_counter() - t0
+
+    def walker(*, cached: bool, trust: bool = False) -> float:
+        t0 = time.perf_counter()
+        w = vault_walk.VaultWalker(vault, cache_path if cached else None, pattern="*.md")
+        w.load()
+        w.refresh(trust_dir_mtime=trust)
+        w.save()
+        sum(1 for _ in w.iter_entries())
+        return time.perf_counter() - t0
+
+    report("os.walk + fnmatch", [os_walk() for _ in range(args.repeat)])
+    report("Path.rglob + skip hidden", [rglob() for _ in range(args.repeat)])
+    report("iter_files (no stat)", [timed(lambda: sum(1 for _ in vault_walk.iter_files(vault, "*.md"))) for _ in range(args.repeat)])
+    report("VaultWalker uncached", [walker(cached=False) for _ in range(args.repeat)])
+    walker(cached=True)
+    report("VaultWalker cached", [walker(cached=True) for _ in range(args.repeat)])
+    report("VaultWalker cached, trust", [walker(cached=True, trust=True) for _ in range(args.repeat)])
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("bench", choices=["search", "recent", "walk", "docx"])
+    ap.add_argument("--vault", default=None, help="benchmark a real vault")
+    ap.add_argument("--synthetic", type=int, default=2000, help="notes in the generated vault")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--query", action="append", default=None)
+    ap.add_argument("--limit", type=int, default=50)
+    ap.add_argument("--docx", default=None, help="docx bench: use this file instead of a generated one")
+    ap.add_argument("--docx-mb", type=int, default=200, help="docx bench: size of the generated document.xml")
+    args = ap.parse_args()
+
+    if args.bench == "docx":
+        bench_docx(args)
+        return 0
+
+    if args.vault:
+        vault = os.path.abspath(os.path.expanduser(args.vault))
+    else:
+        vault = make_synthetic_vault(tempfile.mkdtemp(prefix="vault-bench-"), args.synthetic)
+        print(f"[bench] synthetic vault: {vault} ({args.synthetic} notes)")
+
+    if args.bench == "search":
+        bench_search(args, vault)
+    elif args.bench == "recent":
+        bench_recent(args, vault)
+    elif args.bench == "walk":
+        bench_walk(args, vault)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Content-addressed cache for document -> Markdown conversions.
+
+Shared by convert_pdf_to_md.py and convert_docx_to_md.py so re-importing the
+same statement or report is a file copy instead of a reconversion.
+
+- Key: sha256 of the input bytes + converter name/version + output-affecting
+  options. Renaming or moving a file still hits; editing it (or bumping the
+  converter version) misses.
+- Input digests are memoised by (path, size, mtime, inode) in `digests/`, so a
+  hit does not even re-read a large input.
+- Size-bounded LRU over both `entries/` and `digests/`: hits bump the file's
+  mtime; after each store the oldest files are evicted until the cache is under
+  `max_bytes`.
+- Concurrency: entries are written to a temp file and `os.replace`d into place,
+  so readers never see partial output; eviction runs under a non-blocking
+  `flock` (a busy lock just skips that round).
+
+Location: ~/.cache/obsidian-huaigu/conversions (or $XDG_CACHE_HOME), or --cache-dir.
+
+Usage (inspect/clear):
+  python3 conversion_cache.py [--cache-dir DIR] [--clear]
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from vault_recent import expand
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+_CHUNK = 1024 * 1024
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or "~/.cache"
+    return expand(os.path.join(base, "obsidian-huaigu", "conversions"))
+
+
+def _atomic_write(path: str, data: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class Tee:
+    """Minimal write-only stream that fans out to several streams."""
+
+    def __init__(self, *streams):
+        self.streams = streams
+
+    def write(self, s: str) -> int:
+        for stream in self.streams:
+            stream.write(s)
+        return len(s)
+
+
+class PendingEntry:
+    """An entry being written; `commit()` publishes it, `abort()` discards it."""
+
+    def __init__(self, cache: "ConversionCache", key: str):
+        self.cache = cache
+        self.path = cache._entry_path(key)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, self.tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".tmp-")
+        self.file = os.fdopen(fd, "w", encoding="utf-8")
+
+    def commit(self) -> None:
+        self.file.close()
+        os.replace(self.tmp, self.path)
+        self.cache.evict()
+
+    def abort(self) -> None:
+        self.file.close()
+        try:
+            os.unlink(self.tmp)
+        except OSError:
+            pass
+
+
+class ConversionCache:
+    def __init__(self, cache_dir: str | None = None, *, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.dir = expand(cache_dir) if cache_dir else default_cache_dir()
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(self.dir, "entries"), exist_ok=True)
+        os.makedirs(os.path.join(self.dir, "digests"), exist_ok=True)
+
+    # -- keys -----------------------------------------------------------------
+
+    def content_hash(self, path: str) -> str:
+        st = os.stat(path)
+        ident = f"{st.st_size}:{st.st_mtime_ns}:{st.st_ino}"
+        memo = os.path.join(
+            self.dir, "digests", hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+        )
+        try:
+            with open(memo, "r", encoding="utf-8") as f:
+                seen, digest = f.read().split()
+            if seen == ident:
+                try:
+                    os.utime(memo)
+                except OSError:
+                    pass
+                return digest
+        except (OSError, ValueError):
+            pass
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(_CHUNK)
+                if not chunk:
+                    break
+                h.update(chunk)
+        digest = h.hexdigest()
+        try:
+            _atomic_write(memo, f"{ident} {digest}\n")
+        except OSError:
+            pass
+        return digest
+
+    def key(self, path: str, converter: str, version: str, options: dict | None = None) -> str:
+        spec = json.dumps(
+            {"converter": converter, "version": version, "options": options or {}},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(f"{self.content_hash(path)}\0{spec}".encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.dir, "entries", key[:2], f"{key}.md")
+
+    # -- read/write -----------------------------------------------------------
+
+    def copy_to(self, key: str, stream) -> bool:
+        """Write the cached output for `key` to `stream`; False on a miss."""
+        path = self._entry_path(key)
+        try:
+            f = open(path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return False
+        with f:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            shutil.copyfileobj(f, stream)
+        return True
+
+    def get(self, key: str) -> str | None:
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _atomic_write(path, text)
+        self.evict()
+
+    def begin(self, key: str) -> PendingEntry:
+        """Start a streamed store (for converters that write output incrementally)."""
+        return PendingEntry(self, key)
+
+    # -- maintenance ----------------------------------------------------------
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        """`(mtime, size, path)` for every entry, oldest first."""
+        out = []
+        root = os.path.join(self.dir, "entries")
+        for shard in os.scandir(root):
+            if shard.is_dir():
+                out.extend(_scan(shard.path))
+        out.sort()
+        return out
+
+    def digests(self) -> list[tuple[float, int, str]]:
+        """`(mtime, size, path)` for every memoised input digest, oldest first."""
+        return sorted(_scan(os.path.join(self.dir, "digests")))
+
+    def files(self) -> list[tuple[float, int, str]]:
+        """Entries and digests together, oldest first: what `max_bytes` bounds."""
+        return sorted(self.entries() + self.digests())
+
+    def evict(self) -> int:
+        """Drop least recently used entries until under `max_bytes`; returns how many."""
+        lock_path = os.path.join(self.dir, ".lock")
+        with open(lock_path, "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return 0  # someone else is evicting
+            files = self.files()
+            total = sum(size for _, size, _ in files)
+            removed = 0
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            return removed
+
+    def clear(self) -> None:
+        for _, _, path in self.files():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def _scan(directory: str) -> list[tuple[float, int, str]]:
+    out = []
+    try:
+        it = os.scandir(directory)
+    except OSError:
+        return out
+    with it:
+        for e in it:
+            if e.name.startswith("."):
+                continue
+            try:
+                st = e.stat()
+            except OSError:
+                continue
+            out.append((st.st_mtime, st.st_size, e.path))
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cache-dir", default=None, help="default: ~/.cache/obsidian-huaigu/conversions")
+    ap.add_argument("--clear", action="store_true", help="remove all cached conversions")
+    args = ap.parse_args()
+
+    cache = ConversionCache(args.cache_dir)
+    if args.clear:
+        cache.clear()
+    entries = cache.entries()
+    total = sum(size for _, size, _ in cache.files())
+    print(f"dir={cache.dir} entries={len(entries)} bytes={total} max_bytes={cache.max_bytes}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,65 +2,252 @@
 """Convert a .docx file to a simple Markdown document.
 
 This is a dependency-free fallback converter:
-- Extracts text from word/document.xml
-- Preserves paragraph breaks
+- Streams word/document.xml with `ET.iterparse`, clearing each top-level block
+  once written, so memory stays flat however large the document is
+- Paragraph styles ("Title", "heading 1".."heading 6", outline levels) -> headings
+- Numbered/bulleted paragraphs (w:numPr) -> Markdown lists, nested by level
+- Tables (w:tbl) -> Markdown tables (merged cells keep their column)
 
 Usage:
   python3 convert_docx_to_md.py input.docx > out.md
 
 Notes:
-- Formatting (bold, tables, images) is not preserved.
+- Inline formatting (bold, links) and images are not preserved.
 - Good enough for knowledge-base ingestion when pandoc isn't available.
+- Output is cached by content hash (see conversion_cache.py); `--no-cache`
+  disables it, `--cache-dir` relocates it.
 """
 
 from __future__ import annotations
 
 import argparse
-import io
+import re
 import sys
 import zipfile
 import xml.etree.ElementTree as ET
+from typing import Iterator
 
+from conversion_cache import ConversionCache, Tee
+
+# Bump when the output for the same input/options changes (invalidates the cache).
+CONVERTER_VERSION = "2"
 
 NS = {
     "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
 }
+W = "{%s}" % NS["w"]
+
+_HEADING_NAME = re.compile(r"^(?:heading|标题)\s*([1-9])$", re.I)
+_HEADING_ID = re.compile(r"^heading([1-9])$", re.I)
+
 
+def _val(elem: ET.Element | None, default: str | None = None) -> str | None:
+    if elem is None:
+        return default
+    return elem.get(W + "val", default)
 
-def iter_paragraph_text(xml_bytes: bytes) -> list[str]:
-    root = ET.fromstring(xml_bytes)
-    paras: list[str] = []
-    for p in root.findall(".//w:p", NS):
-        texts = [t.text or "" for t in p.findall(".//w:t", NS)]
-        s = "".join(texts).strip()
-        if s:
-            paras.append(s)
-    return paras
+
+def read_styles(z: zipfile.ZipFile) -> dict[str, int]:
+    """Map paragraph styleId -> heading level (styles.xml is small; parse it whole)."""
+    try:
+        root = ET.fromstring(z.read("word/styles.xml"))
+    except (KeyError, ET.ParseError):
+        return {}
+    levels: dict[str, int] = {}
+    for style in root.iterfind("w:style", NS):
+        sid = style.get(W + "styleId") or ""
+        name = (_val(style.find("w:name", NS)) or "").strip()
+        outline = _val(style.find("w:pPr/w:outlineLvl", NS))
+        m = _HEADING_NAME.match(name) or _HEADING_ID.match(sid)
+        if name.lower() == "title":
+            levels[sid] = 1
+        elif m:
+            levels[sid] = int(m.group(1))
+        elif outline is not None and outline.isdigit() and int(outline) < 6:
+            levels[sid] = int(outline) + 1
+    return levels
+
+
+def read_numbering(z: zipfile.ZipFile) -> dict[tuple[str, int], bool]:
+    """Map (numId, ilvl) -> True if that list level is ordered (not a bullet)."""
+    try:
+        root = ET.fromstring(z.read("word/numbering.xml"))
+    except (KeyError, ET.ParseError):
+        return {}
+    abstract: dict[str, dict[int, bool]] = {}
+    for an in root.iterfind("w:abstractNum", NS):
+        lvls = {}
+        for lvl in an.iterfind("w:lvl", NS):
+            fmt = _val(lvl.find("w:numFmt", NS), "decimal")
+            lvls[int(lvl.get(W + "ilvl", "0"))] = fmt not in ("bullet", "none")
+        abstract[an.get(W + "abstractNumId") or ""] = lvls
+    ordered: dict[tuple[str, int], bool] = {}
+    for num in root.iterfind("w:num", NS):
+        for ilvl, is_ordered in abstract.get(_val(num.find("w:abstractNumId", NS)) or "", {}).items():
+            ordered[(num.get(W + "numId") or "", ilvl)] = is_ordered
+    return ordered
+
+
+def paragraph_text(p: ET.Element) -> str:
+    parts: list[str] = []
+    for el in p.iter():
+        tag = el.tag
+        if tag == W + "t":
+            parts.append(el.text or "")
+        elif tag in (W + "tab", W + "br", W + "cr"):
+            parts.append(" ")
+        elif tag == W + "noBreakHyphen":
+            parts.append("-")
+    return " ".join("".join(parts).split())
+
+
+def _md_cell(text: str) -> str:
+    return text.replace("|", "\\|")
+
+
+def table_markdown(tbl: ET.Element) -> list[str]:
+    rows: list[list[str]] = []
+    for tr in tbl.iterfind("w:tr", NS):
+        cells: list[str] = []
+        for tc in tr.iterfind("w:tc", NS):
+            text = "<br>".join(filter(None, (paragraph_text(p) for p in tc.iter(W + "p"))))
+            cells.append(_md_cell(text))
+            # Horizontally merged cells span several grid columns; keep later cells aligned.
+            span = _val(tc.find("w:tcPr/w:gridSpan", NS), "1")
+            cells.extend([""] * (int(span) - 1 if span and span.isdigit() else 0))
+        rows.append(cells)
+    rows = [r for r in rows if any(r)]
+    if not rows:
+        return []
+    width = max(len(r) for r in rows)
+    rows = [r + [""] * (width - len(r)) for r in rows]
+    lines = ["| " + " | ".join(rows[0]) + " |", "|" + "---|" * width]
+    lines.extend("| " + " | ".join(r) + " |" for r in rows[1:])
+    return lines
+
+
+def paragraph_block(p: ET.Element, styles: dict[str, int], numbering: dict) -> tuple[str, str] | None:
+    """`(kind, markdown)` for one paragraph; kind is "heading", "list" or "text"."""
+    text = paragraph_text(p)
+    if not text:
+        return None
+    ppr = p.find("w:pPr", NS)
+    if ppr is not None:
+        level = styles.get(_val(ppr.find("w:pStyle", NS)) or "")
+        outline = _val(ppr.find("w:outlineLvl", NS))
+        if level is None and outline is not None and outline.isdigit() and int(outline) < 6:
+            level = int(outline) + 1
+        if level:
+            return "heading", "#" * min(level, 6) + " " + text
+        num_id = _val(ppr.find("w:numPr/w:numId", NS))
+        if num_id and num_id != "0":
+            ilvl = int(_val(ppr.find("w:numPr/w:ilvl", NS), "0") or 0)
+            marker = "1." if numbering.get((num_id, ilvl), False) else "-"
+            return "list", "  " * ilvl + f"{marker} {text}"
+    return "text", text
+
+
+def iter_blocks(xml_stream, styles: dict[str, int], numbering: dict) -> Iterator[tuple[str, str]]:
+    """Yield `(kind, markdown)` blocks from a document.xml stream, in document order.
+
+    Only the current top-level block (paragraph or table) is held in memory: each
+    one is dropped from <w:body> as soon as it has been converted.
+    """
+    depth = 0
+    body: ET.Element | None = None
+    for event, elem in ET.iterparse(xml_stream, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 2 and elem.tag == W + "body":
+                body = elem
+            continue
+        depth -= 1
+        if depth != 2 or body is None:
+            continue
+        # elem is a direct child of <w:body>.
+        if elem.tag == W + "p":
+            block = paragraph_block(elem, styles, numbering)
+            if block:
+                yield block
+        elif elem.tag == W + "tbl":
+            lines = table_markdown(elem)
+            if lines:
+                yield "table", "\n".join(lines)
+        elif elem.tag == W + "sdt":
+            # Content controls (e.g. a generated TOC) wrap ordinary paragraphs/tables.
+            for child in elem.iterfind("w:sdtContent/*", NS):
+                if child.tag == W + "p":
+                    block = paragraph_block(child, styles, numbering)
+                    if block:
+                        yield block
+                elif child.tag == W + "tbl":
+                    lines = table_markdown(child)
+                    if lines:
+                        yield "table", "\n".join(lines)
+        body.remove(elem)
+
+
+def write_markdown(blocks, out, *, title: str | None = None) -> None:
+    prev = None
+    if title:
+        out.write(f"# {title}\n")
+        prev = "heading"
+    for kind, md in blocks:
+        if prev is not None:
+            # Consecutive list items stay one list; everything else is its own block.
+            out.write("\n" if kind == "list" and prev == "list" else "\n\n")
+        out.write(md)
+        prev = kind
+    if prev is not None:
+        out.write("\n")
+
+
+def convert(docx_path: str, stream, *, title: str | None = None, cache: ConversionCache | None = None) -> None:
+    """Write the Markdown for `docx_path` to `stream`, serving/filling `cache` if given."""
+    key = None
+    if cache is not None:
+        key = cache.key(docx_path, "docx", CONVERTER_VERSION, {"title": title})
+        if cache.copy_to(key, stream):
+            return
+
+    pending = None
+    try:
+        with zipfile.ZipFile(docx_path, "r") as z:
+            styles = read_styles(z)
+            numbering = read_numbering(z)
+            with z.open("word/document.xml") as xml_stream:
+                pending = cache.begin(key) if cache is not None else None
+                out = Tee(stream, pending.file) if pending else stream
+                write_markdown(iter_blocks(xml_stream, styles, numbering), out, title=title)
+    except BaseException:
+        if pending:
+            pending.abort()
+        raise
+
+    if pending:
+        pending.commit()
 
 
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("docx_path")
     ap.add_argument("--title", default=None)
+    ap.add_argument("--cache-dir", default=None, help="conversion cache (default: ~/.cache/obsidian-huaigu/conversions)")
+    ap.add_argument("--no-cache", action="store_true", help="always reconvert; do not read or write the cache")
     args = ap.parse_args()
 
+    cache = None
+    if not args.no_cache:
+        try:
+            cache = ConversionCache(args.cache_dir)
+        except OSError as e:
+            print(f"WARN: conversion cache unavailable: {e}", file=sys.stderr)
+
     try:
-        with zipfile.ZipFile(args.docx_path, "r") as z:
-            xml_bytes = z.read("word/document.xml")
+        convert(args.docx_path, sys.stdout, title=args.title, cache=cache)
     except Exception as e:
         print(f"ERROR: failed to read docx: {e}", file=sys.stderr)
         return 1
-
-    paras = iter_paragraph_text(xml_bytes)
-    out = io.StringIO()
-    if args.title:
-        out.write(f"# {args.title}\n\n")
-
-    for p in paras:
-        out.write(p)
-        out.write("\n\n")
-
-    sys.stdout.write(out.getvalue().rstrip() + "\n")
     return 0
 
 
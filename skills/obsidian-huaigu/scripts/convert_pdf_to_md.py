@@ -3,52 +3,372 @@
 
 Usage:
   python3 convert_pdf_to_md.py input.pdf > out.md
+  python3 convert_pdf_to_md.py statement.pdf --jobs 8 --page-markers > out.md
+  python3 convert_pdf_to_md.py input.pdf --raw > out.txt
 
 Notes:
-- Relies on `pdftotext` being available.
-- Produces plain text wrapped as Markdown paragraphs.
+- Relies on `pdftotext` being available (`pdfinfo`, from the same poppler package,
+  is used to count pages; without it the whole file goes through one pdftotext).
+- Large PDFs are split into page ranges converted by parallel `pdftotext -f/-l`
+  processes; pages are streamed to stdout in order, with only a few ranges in
+  memory at a time.
+- Structure recovery (default): column-aligned blocks become Markdown tables,
+  bullets/numbering become lists, section-like lines become headings, and bare
+  page numbers are dropped. `--raw` keeps the plain `-layout` text instead.
+- Output is cached by content hash (see conversion_cache.py); a re-import of the
+  same file is a copy. `--no-cache` disables it, `--cache-dir` relocates it.
 """
 
 from __future__ import annotations
 
 import argparse
+import os
+import re
 import shutil
 import subprocess
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from conversion_cache import ConversionCache, Tee
+
+# Bump when the output for the same input/options changes (invalidates the cache).
+CONVERTER_VERSION = "2"
+
+# -- pdftotext plumbing ---------------------------------------------------------
+
+
+class PdfToTextError(RuntimeError):
+    def __init__(self, returncode: int, message: str):
+        super().__init__(message)
+        self.returncode = returncode
+
+
+def page_count(pdf_path: str) -> int | None:
+    pdfinfo = shutil.which("pdfinfo")
+    if not pdfinfo:
+        return None
+    try:
+        res = subprocess.run([pdfinfo, pdf_path], check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError:
+        return None
+    m = re.search(r"^Pages:\s+(\d+)", res.stdout.decode("utf-8", errors="ignore"), re.M)
+    return int(m.group(1)) if m else None
+
+
+def page_ranges(n_pages: int, chunk: int) -> list[tuple[int, int]]:
+    return [(a, min(a + chunk - 1, n_pages)) for a in range(1, n_pages + 1, chunk)]
+
+
+def run_pdftotext(pdftotext: str, pdf_path: str, first: int, last: int) -> str:
+    # -layout keeps rough layout; '-' outputs to stdout
+    cmd = [pdftotext, "-layout", "-f", str(first), "-l", str(last), pdf_path, "-"]
+    res = subprocess.run(cmd, check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if res.returncode != 0:
+        err = res.stderr.decode("utf-8", errors="ignore").strip()
+        raise PdfToTextError(res.returncode, f"pdftotext failed ({res.returncode}): {err}")
+    return res.stdout.decode("utf-8", errors="ignore")
+
+
+def _split_pages(text: str) -> list[str]:
+    # pdftotext terminates every page with a form feed.
+    pages = text.split("\f")
+    if pages and pages[-1].strip() == "":
+        pages.pop()
+    return pages
+
+
+def iter_pages(pdftotext: str, pdf_path: str, n_pages: int, *, jobs: int, chunk: int):
+    """Yield page texts in order, converting up to `jobs` page ranges concurrently.
+
+    At most `2 * jobs` ranges are in flight/buffered, which bounds memory for huge files.
+    """
+    ranges = page_ranges(n_pages, chunk)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        pending: deque = deque()
+        for first, last in ranges:
+            pending.append(pool.submit(run_pdftotext, pdftotext, pdf_path, first, last))
+            if len(pending) >= 2 * jobs:
+                yield from _split_pages(pending.popleft().result())
+        while pending:
+            yield from _split_pages(pending.popleft().result())
+
+
+def iter_pages_single(pdftotext: str, pdf_path: str):
+    """One pdftotext over the whole file, still streamed page by page."""
+    proc = subprocess.Popen([pdftotext, "-layout", pdf_path, "-"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert proc.stdout is not None and proc.stderr is not None
+    buf: list[str] = []
+    for raw in proc.stdout:
+        line = raw.decode("utf-8", errors="ignore")
+        while "\f" in line:
+            head, line = line.split("\f", 1)
+            buf.append(head)
+            yield "".join(buf)
+            buf = []
+        buf.append(line)
+    if "".join(buf).strip():
+        yield "".join(buf)
+    err = proc.stderr.read().decode("utf-8", errors="ignore").strip()
+    rc = proc.wait()
+    if rc != 0:
+        raise PdfToTextError(rc, f"pdftotext failed ({rc}): {err}")
+
+
+# -- structure recovery ---------------------------------------------------------
+
+_CELL = re.compile(r"\S+(?: \S+)*")
+_PAGE_NO = re.compile(r"^(?:-\s*)?\d{1,4}(?:\s*-)?$|^(?:page\s*)?\d{1,4}\s*(?:/|of)\s*\d{1,4}$|^第\s*\d{1,4}\s*页", re.I)
+_BULLET = re.compile(r"^(?:[•●▪◦·■□➢►]\s*|[-*–]\s+)(.+)")
+_NUMBERED = re.compile(r"^(?:(\d{1,3})[.)、]|\((\d{1,3})\)|（(\d{1,3})）)\s*(.+)")
+_CN_CHAPTER = re.compile(r"^第[一二三四五六七八九十百\d]+([章篇部节])\s*\S*")
+_CN_SECTION = re.compile(r"^[一二三四五六七八九十]+、\s*\S")
+_NUM_SECTION = re.compile(r"^(\d{1,2}(?:\.\d{1,2})*)\s+\S")
+_END_PUNCT = tuple(".。,，;；:：!?！？")
+
+
+def _cells(line: str) -> list[tuple[int, str]]:
+    """Cells separated by 2+ spaces, with their start columns."""
+    return [(m.start(), m.group(0)) for m in _CELL.finditer(line)]
+
+
+def _aligned(a: list[int], b: list[int], tol: int = 3) -> bool:
+    return len(a) == len(b) and all(abs(x - y) <= tol for x, y in zip(a, b))
+
+
+def table_rows(block: list[str]) -> list[list[str]] | None:
+    """Rows of a Markdown table if `block` looks like column-aligned text, else None.
+
+    Justified prose also contains runs of spaces, so rows must share column
+    start positions (not just a cell count) to count as a table.
+    """
+    if len(block) < 2:
+        return None
+    rows = [_cells(ln) for ln in block]
+    if any(len(r) < 2 for r in rows):
+        return None
+    width = max(len(r) for r in rows)
+    full = [r for r in rows if len(r) == width]
+    if len(full) < max(2, (3 * len(rows) + 3) // 4):
+        return None
+    starts = [c for c, _ in full[0]]
+    if not all(_aligned(starts, [c for c, _ in r]) for r in full):
+        return None
+
+    out: list[list[str]] = []
+    for r in rows:
+        cells = [""] * width
+        for col, text in r:
+            # Short rows: put each cell under the nearest column start.
+            idx = min(range(width), key=lambda i: abs(starts[i] - col))
+            cells[idx] = (cells[idx] + " " + text).strip()
+        out.append(cells)
+    return out
+
+
+def _md_cell(text: str) -> str:
+    return text.replace("|", "\\|")
+
+
+def heading_level(line: str) -> int | None:
+    s = line.strip()
+    if not s or len(s) > 80 or s.endswith(_END_PUNCT):
+        return None
+    m = _CN_CHAPTER.match(s)
+    if m:
+        return 3 if m.group(1) == "节" else 2
+    if _CN_SECTION.match(s):
+        return 2
+    m = _NUM_SECTION.match(s)
+    if m:
+        return min(2 + m.group(1).count("."), 4)
+    letters = [ch for ch in s if ch.isalpha()]
+    if len(s) <= 60 and len(letters) >= 3 and all(ch.isascii() and ch.isupper() for ch in letters):
+        return 2
+    return None
+
+
+def page_to_markdown(page: str) -> list[str]:
+    """Markdown lines for one page of `pdftotext -layout` output."""
+    lines = page.splitlines()
+    # Page numbers are only recognised as the first or last non-blank line: a bare
+    # number elsewhere is body text (a quantity or table cell on its own line).
+    filled = [i for i, ln in enumerate(lines) if ln.strip()]
+    edges = {filled[0], filled[-1]} if filled else set()
+    blocks: list[list[str]] = []
+    cur: list[str] = []
+    for i, raw in enumerate(lines):
+        line = raw.rstrip()
+        if not line.strip() or (i in edges and _PAGE_NO.match(line.strip())):
+            if cur:
+                blocks.append(cur)
+                cur = []
+            continue
+        cur.append(line)
+    if cur:
+        blocks.append(cur)
+
+    out: list[str] = []
+    for block in blocks:
+        first = block[0].strip()
+        rows = None if _BULLET.match(first) or _NUMBERED.match(first) else table_rows(block)
+        if rows:
+            out.append("| " + " | ".join(_md_cell(c) for c in rows[0]) + " |")
+            out.append("|" + "---|" * len(rows[0]))
+            out.extend("| " + " | ".join(_md_cell(c) for c in r) + " |" for r in rows[1:])
+            out.append("")
+            continue
+
+        item_indent: int | None = None
+        for i, line in enumerate(block):
+            s = line.strip()
+            indent = len(line) - len(line.lstrip())
+            level = heading_level(s) if (i == 0 or len(block) == 1) else None
+            if level and (len(block) == 1 or _CN_CHAPTER.match(s) or _NUM_SECTION.match(s)):
+                out.append("#" * level + " " + s)
+                out.append("")
+                item_indent = None
+                continue
+            m = _BULLET.match(s)
+            if m:
+                out.append("- " + m.group(1).strip())
+                item_indent = indent
+                continue
+            m = _NUMBERED.match(s)
+            if m:
+                num = m.group(1) or m.group(2) or m.group(3)
+                out.append(f"{num}. {m.group(4).strip()}")
+                item_indent = indent
+                continue
+            if item_indent is not None and indent > item_indent:
+                # Wrapped continuation of the previous list item.
+                out[-1] += " " + s
+                continue
+            if item_indent is not None:
+                out.append("")
+                item_indent = None
+            out.append(s)
+        out.append("")
+    return out
+
+
+# -- output ---------------------------------------------------------------------
+
+
+class LineWriter:
+    """Stream lines, dropping leading/trailing blank lines (optionally squeezing blank runs)."""
+
+    def __init__(self, stream, *, squeeze: bool = True):
+        self.stream = stream
+        self.squeeze = squeeze
+        self.started = False
+        self.blanks = 0
+
+    def write(self, line: str) -> None:
+        if not line.strip():
+            if self.started:
+                self.blanks = 1 if self.squeeze else self.blanks + 1
+            return
+        self.stream.write("\n" * self.blanks + line + "\n")
+        self.started = True
+        self.blanks = 0
+
+
+def convert(
+    pdf_path: str,
+    stream,
+    *,
+    title: str | None = None,
+    raw: bool = False,
+    page_markers: bool = False,
+    jobs: int = 1,
+    chunk_pages: int = 16,
+    cache: ConversionCache | None = None,
+) -> None:
+    """Write the Markdown for `pdf_path` to `stream`, serving/filling `cache` if given.
+
+    Raises PdfToTextError (also when pdftotext is missing, returncode 2) or OSError.
+    """
+    key = None
+    if cache is not None:
+        key = cache.key(pdf_path, "pdf", CONVERTER_VERSION, {"title": title, "raw": raw, "page_markers": page_markers})
+        if cache.copy_to(key, stream):
+            return
+
+    pdftotext = shutil.which("pdftotext")
+    if not pdftotext:
+        raise PdfToTextError(2, "pdftotext not found in PATH")
+
+    n_pages = page_count(pdf_path)
+    if n_pages and n_pages > chunk_pages and jobs > 1:
+        pages = iter_pages(pdftotext, pdf_path, n_pages, jobs=jobs, chunk=chunk_pages)
+    else:
+        pages = iter_pages_single(pdftotext, pdf_path)
+
+    pending = cache.begin(key) if cache is not None else None
+    out = LineWriter(Tee(stream, pending.file) if pending else stream, squeeze=not raw)
+    if title:
+        out.write(f"# {title}")
+        out.write("")
+
+    try:
+        for no, page in enumerate(pages, 1):
+            if page_markers:
+                out.write("")
+                out.write(f"<!-- page {no} -->")
+                out.write("")
+            if raw:
+                # Keep blank lines; markdown can handle it.
+                for ln in page.splitlines():
+                    out.write(ln.rstrip())
+            else:
+                for ln in page_to_markdown(page):
+                    out.write(ln)
+    except BaseException:
+        if pending:
+            pending.abort()
+        raise
+
+    if pending:
+        pending.commit()
 
 
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("pdf_path")
     ap.add_argument("--title", default=None)
+    ap.add_argument("--raw", action="store_true", help="plain -layout text, no structure recovery")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 2, help="parallel pdftotext processes")
+    ap.add_argument("--chunk-pages", type=int, default=16, help="pages per pdftotext process")
+    ap.add_argument("--page-markers", action="store_true", help="emit <!-- page N --> before each page")
+    ap.add_argument("--cache-dir", default=None, help="conversion cache (default: ~/.cache/obsidian-huaigu/conversions)")
+    ap.add_argument("--no-cache", action="store_true", help="always reconvert; do not read or write the cache")
     args = ap.parse_args()
 
-    pdftotext = shutil.which("pdftotext")
-    if not pdftotext:
-        print("ERROR: pdftotext not found in PATH", file=sys.stderr)
-        return 2
+    cache = None
+    if not args.no_cache:
+        try:
+            cache = ConversionCache(args.cache_dir)
+        except OSError as e:
+            print(f"WARN: conversion cache unavailable: {e}", file=sys.stderr)
 
-    # -layout keeps rough layout; '-' outputs to stdout
-    cmd = [pdftotext, "-layout", args.pdf_path, "-"]
     try:
-        res = subprocess.run(cmd, check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    except Exception as e:
+        convert(
+            args.pdf_path,
+            sys.stdout,
+            title=args.title,
+            raw=args.raw,
+            page_markers=args.page_markers,
+            jobs=args.jobs,
+            chunk_pages=args.chunk_pages,
+            cache=cache,
+        )
+    except PdfToTextError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return e.returncode
+    except OSError as e:
         print(f"ERROR: failed to run pdftotext: {e}", file=sys.stderr)
         return 1
-
-    if res.returncode != 0:
-        err = res.stderr.decode("utf-8", errors="ignore").strip()
-        print(f"ERROR: pdftotext failed ({res.returncode}): {err}", file=sys.stderr)
-        return res.returncode
-
-    text = res.stdout.decode("utf-8", errors="ignore")
-    text = "\n".join([ln.rstrip() for ln in text.splitlines()])
-
-    if args.title:
-        sys.stdout.write(f"# {args.title}\n\n")
-
-    # Keep blank lines; markdown can handle it.
-    sys.stdout.write(text.strip() + "\n")
     return 0
 
 
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Multinomial naive Bayes destination model trained from the vault's own layout.
+
+Each note's folder (truncated to `depth` levels, e.g. `03-Resources/Coding-References`)
+is its label; tokens are lowercased latin words plus CJK character bigrams.
+
+The model lives in a small SQLite file so that:
+- prediction only reads the rows for the query's tokens (a few ms, whatever the vault size);
+- retraining is incremental: per-note token counts are kept, so a changed or deleted
+  note is subtracted and re-added instead of rebuilding everything.
+
+Used by `suggest_destination.py --classifier nb`; can also be trained directly:
+  python3 destination_model.py --vault ~/obsidian/obsidian_huaigu [--rebuild]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import math
+import os
+import re
+import sqlite3
+from collections import Counter
+
+from vault_recent import RecencyIndex, default_index_path, expand
+
+MODEL_VERSION = "1"
+MAX_CHARS = 20000
+# The inbox is "not filed yet", not a destination worth learning.
+EXCLUDED_LABEL_PREFIXES = ("00-Inbox", "90-Templates", "99-System")
+
+_LATIN = re.compile(r"[a-z][a-z0-9_+#]{1,30}")
+_CJK = re.compile(r"[\u4e00-\u9fff]+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS docs (path TEXT PRIMARY KEY, mtime REAL, label TEXT, n_tokens INTEGER);
+CREATE TABLE IF NOT EXISTS doc_tokens (path TEXT, token TEXT, count INTEGER);
+CREATE INDEX IF NOT EXISTS doc_tokens_path ON doc_tokens (path);
+CREATE TABLE IF NOT EXISTS counts (label TEXT, token TEXT, count INTEGER, PRIMARY KEY (label, token));
+CREATE INDEX IF NOT EXISTS counts_token ON counts (token);
+CREATE TABLE IF NOT EXISTS labels (label TEXT PRIMARY KEY, docs INTEGER, tokens INTEGER);
+"""
+
+
+def tokenize(text: str) -> Counter:
+    text = text[:MAX_CHARS].lower()
+    toks: Counter = Counter(_LATIN.findall(text))
+    for run in _CJK.findall(text):
+        if len(run) == 1:
+            toks[run] += 1
+        for i in range(len(run) - 1):
+            toks[run[i : i + 2]] += 1
+    return toks
+
+
+def label_for(rel_path: str, depth: int) -> str | None:
+    parts = rel_path.split(os.sep)[:-1][:depth]
+    if not parts:
+        return None
+    label = "/".join(parts)
+    if label.startswith(EXCLUDED_LABEL_PREFIXES):
+        return None
+    return label
+
+
+def default_model_path(vault: str) -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or "~/.cache"
+    key = hashlib.sha1(vault.encode("utf-8")).hexdigest()[:12]
+    return expand(os.path.join(base, "obsidian-huaigu", f"destination-{key}.sqlite"))
+
+
+class DestinationModel:
+    def __init__(self, vault: str, path: str | None = None, *, depth: int = 2, alpha: float = 0.1):
+        self.vault = expand(vault)
+        self.path = path or default_model_path(self.vault)
+        self.depth = depth
+        self.alpha = alpha
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.executescript(SCHEMA)
+        stamp = f"{MODEL_VERSION}:{self.vault}:{depth}"
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'stamp'").fetchone()
+        if row is None or row[0] != stamp:
+            self._clear()
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('stamp', ?)", (stamp,))
+            self.db.commit()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def _clear(self) -> None:
+        for table in ("docs", "doc_tokens", "counts", "labels"):
+            self.db.execute(f"DELETE FROM {table}")
+
+    # -- training -----------------------------------------------------------
+
+    def _remove(self, path: str) -> None:
+        row = self.db.execute("SELECT label, n_tokens FROM docs WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return
+        label, n_tokens = row
+        if label is not None:
+            rows = self.db.execute("SELECT token, count FROM doc_tokens WHERE path = ?", (path,)).fetchall()
+            self.db.executemany(
+                "UPDATE counts SET count = count - ? WHERE label = ? AND token = ?",
+                [(c, label, t) for t, c in rows],
+            )
+            self.db.execute(
+                "UPDATE labels SET docs = docs - 1, tokens = tokens - ? WHERE label = ?",
+                (n_tokens, label),
+            )
+        self.db.execute("DELETE FROM doc_tokens WHERE path = ?", (path,))
+        self.db.execute("DELETE FROM docs WHERE path = ?", (path,))
+
+    def _add(self, path: str, mtime: float) -> None:
+        label = label_for(path, self.depth)
+        toks: Counter = Counter()
+        if label is not None:
+            try:
+                with open(os.path.join(self.vault, path), "r", encoding="utf-8", errors="ignore") as f:
+                    toks = tokenize(f.read(MAX_CHARS))
+            except OSError:
+                return
+        n_tokens = sum(toks.values())
+        self.db.execute("INSERT INTO docs VALUES (?, ?, ?, ?)", (path, mtime, label, n_tokens))
+        if label is None:
+            return
+        self.db.executemany("INSERT INTO doc_tokens VALUES (?, ?, ?)", [(path, t, c) for t, c in toks.items()])
+        self.db.executemany(
+            "INSERT INTO counts VALUES (?, ?, ?) "
+            "ON CONFLICT (label, token) DO UPDATE SET count = count + excluded.count",
+            [(label, t, c) for t, c in toks.items()],
+        )
+        self.db.execute(
+            "INSERT INTO labels VALUES (?, 1, ?) "
+            "ON CONFLICT (label) DO UPDATE SET docs = docs + 1, tokens = tokens + excluded.tokens",
+            (label, n_tokens),
+        )
+
+    def update(self, *, rebuild: bool = False, index: RecencyIndex | None = None) -> dict:
+        """Incrementally (re)train from the vault; returns `{"added", "removed", "docs"}`."""
+        if index is None:
+            index = RecencyIndex(self.vault, default_index_path(self.vault))
+            index.load()
+            index.refresh()
+            try:
+                index.save()
+            except OSError:
+                pass
+        with self.db:
+            if rebuild:
+                self._clear()
+            known = dict(self.db.execute("SELECT path, mtime FROM docs"))
+            current = {rel: mtime for mtime, rel in index.iter_entries()}
+            stale = [p for p in known if p not in current or current[p] != known[p]]
+            fresh = [p for p, m in current.items() if known.get(p) != m]
+            for p in stale:
+                self._remove(p)
+            for p in fresh:
+                self._add(p, current[p])
+            if stale:
+                self.db.execute("DELETE FROM counts WHERE count <= 0")
+                self.db.execute("DELETE FROM labels WHERE docs <= 0")
+            if stale or fresh:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('vocab', (SELECT COUNT(DISTINCT token) FROM counts))"
+                )
+        return {"added": len(fresh), "removed": len(stale), "docs": len(current)}
+
+    # -- prediction ---------------------------------------------------------
+
+    def labels(self) -> dict[str, tuple[int, int]]:
+        return {label: (docs, tokens) for label, docs, tokens in self.db.execute("SELECT * FROM labels")}
+
+    def predict(self, text: str, *, top: int = 3, priors: dict[str, float] | None = None) -> list[tuple[str, float]]:
+        """Return up to `top` `(label, confidence)` pairs, best first.
+
+        `priors` maps a label (or a folder prefix of labels) to a multiplicative
+        weight, e.g. the regex rule's bucket -> 3.0.
+        """
+        labels = self.labels()
+        toks = tokenize(text)
+        if not labels or not toks:
+            return []
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'vocab'").fetchone()
+        vocab = int(row[0]) if row else 1
+        n_docs = sum(d for d, _ in labels.values())
+
+        q = ",".join("?" * len(toks))
+        rows = self.db.execute(f"SELECT label, token, count FROM counts WHERE token IN ({q})", list(toks)).fetchall()
+        # Tokens the model has never seen carry no information, so only known ones count.
+        known = {t for _, t, _ in rows}
+        n = sum(c for t, c in toks.items() if t in known)
+        if n == 0:
+            return []
+
+        # log P(c) + sum_t tf_t * log((count(c,t) + alpha) / (tokens_c + alpha * V)),
+        # starting from "every token unseen in c" and correcting for the seen pairs.
+        base = math.log(self.alpha)
+        scores = {
+            label: math.log(docs / n_docs) + n * (base - math.log(tokens + self.alpha * vocab))
+            for label, (docs, tokens) in labels.items()
+        }
+        for label, token, count in rows:
+            scores[label] += toks[token] * (math.log(count + self.alpha) - base)
+
+        for prefix, weight in (priors or {}).items():
+            for label in scores:
+                if label == prefix or label.startswith(prefix + "/"):
+                    scores[label] += math.log(weight)
+
+        m = max(scores.values())
+        z = sum(math.exp(s - m) for s in scores.values())
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        return [(label, math.exp(s - m) / z) for label, s in ranked]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vault", default="~/obsidian/obsidian_huaigu")
+    ap.add_argument("--model", default=None, help="model path (default: ~/.cache/obsidian-huaigu/)")
+    ap.add_argument("--depth", type=int, default=2, help="folder depth used as the label")
+    ap.add_argument("--rebuild", action="store_true", help="retrain from scratch")
+    args = ap.parse_args()
+
+    model = DestinationModel(args.vault, args.model, depth=args.depth)
+    stats = model.update(rebuild=args.rebuild)
+    print(f"docs={stats['docs']} added={stats['added']} removed={stats['removed']} labels={len(model.labels())}")
+    model.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""Bulk-import a folder of PDF / DOCX / Markdown files into the vault.
+
+One pipeline instead of convert -> suggest_destination -> move, file by file:
+
+1. scan      *.pdf, *.docx and *.md under the source directory (recursive)
+2. convert   the existing converters, in a process pool; the conversion cache is
+             shared with convert_*_to_md.py, so re-imports are cheap
+3. dedup     drop documents whose content is already in the vault (or earlier in
+             the batch), by hash of the whitespace-normalised Markdown body
+4. classify  suggest_destination.build_plan (rules or --classifier nb), including
+             filename collision handling
+5. write     each note atomically (temp file + link), never overwriting
+6. commit    one git commit containing exactly the written notes (--push optional)
+
+Prints a JSON report (imported / duplicates / errors, plus seconds, items/s and
+MB/s per stage); `--report FILE` also saves it. Use `--dry-run` to get the plan
+without writing anything and show it to the user first.
+
+Usage:
+  python3 import_docs.py ~/Downloads/statements --dry-run
+  python3 import_docs.py ~/Downloads/statements --classifier nb --push
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from conversion_cache import ConversionCache
+from suggest_destination import build_plan, extract_title, slugify, unique_name
+from vault_recent import RecencyIndex, default_index_path, expand
+
+KINDS = {".pdf": "pdf", ".docx": "docx", ".md": "md"}
+DIGEST_VERSION = 1
+
+
+# -- helpers --------------------------------------------------------------------
+
+
+def note_digest(text: str) -> str:
+    """Hash of a note's body: a leading `# Title` line and whitespace differences are ignored."""
+    body = text.lstrip()
+    if body.startswith("# "):
+        body = body.split("\n", 1)[1] if "\n" in body else ""
+    return hashlib.sha256(" ".join(body.split()).encode("utf-8")).hexdigest()
+
+
+def scan(src_dir: str) -> list[tuple[str, str]]:
+    """`(path, kind)` for importable files under `src_dir`, sorted; dot-dirs are skipped."""
+    found = []
+    for base, dirs, files in os.walk(src_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in files:
+            kind = KINDS.get(os.path.splitext(name)[1].lower())
+            if kind and not name.startswith((".", "~$")):
+                found.append((os.path.join(base, name), kind))
+    found.sort()
+    return found
+
+
+def default_digest_path(vault: str) -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or "~/.cache"
+    key = hashlib.sha1(vault.encode("utf-8")).hexdigest()[:12]
+    return expand(os.path.join(base, "obsidian-huaigu", f"digests-{key}.json"))
+
+
+def vault_digests(vault: str, index: RecencyIndex, path: str | None = None) -> dict[str, str]:
+    """`{digest: rel}` for every note in the vault; per-note digests are cached by mtime."""
+    path = path or default_digest_path(vault)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        cached = data["files"] if data.get("version") == DIGEST_VERSION else {}
+    except (OSError, ValueError, KeyError):
+        cached = {}
+
+    files: dict[str, list] = {}
+    for mtime, rel in index.iter_entries():
+        hit = cached.get(rel)
+        if hit and hit[0] == mtime:
+            files[rel] = hit
+            continue
+        try:
+            with open(os.path.join(vault, rel), "r", encoding="utf-8", errors="ignore") as f:
+                files[rel] = [mtime, note_digest(f.read())]
+        except OSError:
+            continue
+
+    if files != cached:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp.{os.getpid()}"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": DIGEST_VERSION, "files": files}, f)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+    return {digest: rel for rel, (_, digest) in sorted(files.items())}
+
+
+class Stages:
+    """Wall time and throughput per pipeline stage."""
+
+    def __init__(self):
+        self.stats: dict[str, dict] = {}
+
+    def record(self, name: str, t0: float, items: int, nbytes: int | None = None) -> None:
+        secs = time.perf_counter() - t0
+        row = {"seconds": round(secs, 4), "items": items, "items_per_s": round(items / secs, 2) if secs else None}
+        if nbytes is not None:
+            row["bytes"] = nbytes
+            row["mb_per_s"] = round(nbytes / 1e6 / secs, 2) if secs else None
+        self.stats[name] = row
+
+
+# -- conversion (runs in worker processes) --------------------------------------
+
+
+def _convert(job: tuple) -> dict:
+    src, kind, staged, cache_dir, use_cache = job
+    res = {"src": src, "kind": kind, "bytes": 0}
+    try:
+        res["bytes"] = os.path.getsize(src)
+        if kind == "md":
+            with open(src, "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+        else:
+            cache = ConversionCache(cache_dir) if use_cache else None
+            buf = io.StringIO()
+            if kind == "pdf":
+                import convert_pdf_to_md
+
+                # One pdftotext per worker: the pool already keeps every CPU busy.
+                convert_pdf_to_md.convert(src, buf, jobs=1, cache=cache)
+            else:
+                import convert_docx_to_md
+
+                convert_docx_to_md.convert(src, buf, cache=cache)
+            text = buf.getvalue()
+    except Exception as e:
+        res["error"] = f"{type(e).__name__}: {e}"
+        return res
+
+    if not text.strip():
+        res["error"] = "empty conversion"
+        return res
+    title = extract_title(text) or os.path.splitext(os.path.basename(src))[0]
+    if not text.lstrip().startswith("# "):
+        text = f"# {title}\n\n{text}"
+    with open(staged, "w", encoding="utf-8") as f:
+        f.write(text)
+    res.update(staged=staged, title=title, digest=note_digest(text), chars=len(text))
+    return res
+
+
+# -- write / commit -------------------------------------------------------------
+
+
+def write_note(vault: str, rel: str, staged: str) -> str:
+    """Place `staged` at vault/`rel` atomically without clobbering; returns the final rel."""
+    taken: set[str] = set()
+    while True:
+        dest = os.path.join(vault, rel)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = os.path.join(os.path.dirname(dest), f".import-{os.getpid()}-{os.path.basename(dest)}")
+        try:
+            with open(tmp, "wb") as out, open(staged, "rb") as f:
+                shutil.copyfileobj(f, out)
+            # link() fails if dest appeared meanwhile, unlike rename(), so nothing is overwritten.
+            os.link(tmp, dest)
+            return rel
+        except FileExistsError:
+            taken.add(rel.lower())
+            rel = unique_name(rel, taken)
+        finally:
+            os.unlink(tmp)
+
+
+def git_commit(vault: str, rels: list[str], message: str, *, push: bool = False) -> dict:
+    def git(*args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(["git", *args], cwd=vault, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    if git("rev-parse", "--is-inside-work-tree").returncode != 0:
+        return {"committed": False, "reason": "not a git repository"}
+    p = git("add", "--", *rels)
+    if p.returncode != 0:
+        return {"committed": False, "reason": p.stderr.strip()}
+    # Pathspec commit (`--only`): unrelated staged changes stay out of the import commit.
+    p = git("commit", "-m", message, "--", *rels)
+    if p.returncode != 0:
+        return {"committed": False, "reason": (p.stderr or p.stdout).strip()}
+    info = {"committed": True, "sha": git("rev-parse", "HEAD").stdout.strip()}
+    if push:
+        p = git("push")
+        info["pushed"] = p.returncode == 0
+        if p.returncode != 0:
+            info["push_error"] = p.stderr.strip()
+    return info
+
+
+# -- pipeline -------------------------------------------------------------------
+
+
+def run_import(
+    src_dir: str,
+    vault: str,
+    *,
+    classifier: str = "rules",
+    jobs: int | None = None,
+    dry_run: bool = False,
+    commit: bool = True,
+    push: bool = False,
+    message: str | None = None,
+    cache_dir: str | None = None,
+    use_cache: bool = True,
+) -> dict:
+    src_dir, vault = expand(src_dir), expand(vault)
+    stages = Stages()
+    report: dict = {"source": src_dir, "vault": vault, "dry_run": dry_run}
+    staging = tempfile.mkdtemp(prefix="import-docs-")
+    try:
+        t0 = time.perf_counter()
+        sources = scan(src_dir)
+        stages.record("scan", t0, len(sources))
+
+        t0 = time.perf_counter()
+        jobs_list, names = [], set()
+        for src, kind in sources:
+            name = slugify(os.path.splitext(os.path.basename(src))[0]) + ".md"
+            if name.lower() in names:
+                name = unique_name(name, names)
+            names.add(name.lower())
+            jobs_list.append((src, kind, os.path.join(staging, name), cache_dir, use_cache))
+        if jobs == 1 or len(jobs_list) < 2:
+            converted = [_convert(j) for j in jobs_list]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                converted = list(pool.map(_convert, jobs_list))
+        errors = [{"src": r["src"], "stage": "convert", "error": r["error"]} for r in converted if "error" in r]
+        ok = [r for r in converted if "error" not in r]
+        stages.record("convert", t0, len(jobs_list), sum(r["bytes"] for r in converted))
+
+        t0 = time.perf_counter()
+        index = RecencyIndex(vault, default_index_path(vault))
+        index.load()
+        index.refresh()
+        try:
+            index.save()
+        except OSError:
+            pass
+        known = vault_digests(vault, index)
+        duplicates, fresh, batch = [], [], {}
+        for r in ok:
+            if r["digest"] in known:
+                duplicates.append({"src": r["src"], "duplicate_of": known[r["digest"]]})
+            elif r["digest"] in batch:
+                duplicates.append({"src": r["src"], "duplicate_of": batch[r["digest"]]})
+            else:
+                batch[r["digest"]] = r["src"]
+                fresh.append(r)
+        stages.record("dedup", t0, len(ok), sum(r["chars"] for r in ok))
+
+        t0 = time.perf_counter()
+        by_staged = {r["staged"]: r for r in fresh}
+        plan = build_plan(sorted(by_staged), vault, classifier=classifier, jobs=jobs)
+        errors.extend({"src": by_staged[e["src"]]["src"], "stage": "classify", "error": e["error"]} for e in plan["errors"])
+        stages.record("classify", t0, len(fresh))
+
+        t0 = time.perf_counter()
+        imported, written, nbytes = [], [], 0
+        for move in plan["moves"]:
+            r = by_staged[move["src"]]
+            entry = {
+                "src": r["src"],
+                "dest": move["dest"],
+                "title": r["title"],
+                "confidence": move["confidence"],
+                "collision": move["collision"],
+            }
+            if not dry_run:
+                try:
+                    entry["dest"] = write_note(vault, move["dest"], move["src"])
+                except OSError as e:
+                    errors.append({"src": r["src"], "stage": "write", "error": str(e)})
+                    continue
+                written.append(entry["dest"])
+                nbytes += os.path.getsize(move["src"])
+            imported.append(entry)
+        if not dry_run:
+            stages.record("write", t0, len(written), nbytes)
+
+        if written and commit:
+            t0 = time.perf_counter()
+            msg = message or f"kb: import {len(written)} document(s) from {os.path.basename(src_dir.rstrip(os.sep))}"
+            report["git"] = git_commit(vault, written, msg, push=push)
+            stages.record("commit", t0, len(written))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    report.update(
+        files=len(sources),
+        imported=imported,
+        duplicates=duplicates,
+        errors=errors,
+        stages=stages.stats,
+    )
+    return report
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("source", help="directory with the PDF/DOCX/MD files to import")
+    ap.add_argument("--vault", default="~/obsidian/obsidian_huaigu")
+    ap.add_argument("--classifier", choices=["rules", "nb"], default="rules", help="see suggest_destination.py")
+    ap.add_argument("--jobs", type=int, default=None, help="conversion/classification processes (default: CPU count)")
+    ap.add_argument("--dry-run", action="store_true", help="plan only: convert, dedup and classify, write nothing")
+    ap.add_argument("--no-commit", action="store_true", help="write the notes but do not git commit")
+    ap.add_argument("--push", action="store_true", help="git push after the import commit")
+    ap.add_argument("--message", default=None, help="commit message (default: kb: import N document(s) from <dir>)")
+    ap.add_argument("--cache-dir", default=None, help="conversion cache (default: ~/.cache/obsidian-huaigu/conversions)")
+    ap.add_argument("--no-cache", action="store_true", help="always reconvert")
+    ap.add_argument("--report", default=None, help="also write the JSON report to this file")
+    args = ap.parse_args()
+
+    if not os.path.isdir(expand(args.source)):
+        print(f"ERROR: source directory not found: {args.source}", file=sys.stderr)
+        return 1
+    if not os.path.isdir(expand(args.vault)):
+        print(f"ERROR: vault not found: {args.vault}", file=sys.stderr)
+        return 1
+
+    report = run_import(
+        args.source,
+        args.vault,
+        classifier=args.classifier,
+        jobs=args.jobs,
+        dry_run=args.dry_run,
+        commit=not args.no_commit,
+        push=args.push,
+        message=args.message,
+        cache_dir=args.cache_dir,
+        use_cache=not args.no_cache,
+    )
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.report:
+        with open(expand(args.report), "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return 1 if report["errors"] and not report["imported"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
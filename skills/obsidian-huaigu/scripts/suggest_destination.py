@@ -9,14 +9,25 @@ Output: a suggested relative path under the vault.
 Usage:
   python3 suggest_destination.py --md /path/to/doc.md
   cat doc.md | python3 suggest_destination.py --title "Some Title"
+
+  # Learned classifier (naive Bayes over the vault's own folder -> content layout);
+  # prints the top-3 destinations with confidence, regex rules act as priors.
+  python3 suggest_destination.py --md /path/to/doc.md --classifier nb
+
+  # Batch triage: classify a whole folder/glob in parallel and print a JSON move plan
+  python3 suggest_destination.py --batch ~/obsidian/obsidian_huaigu/00-Inbox
+  python3 suggest_destination.py --batch "/tmp/import/**/*.md" --classifier nb
 """
 
 from __future__ import annotations
 
 import argparse
+import glob
+import json
 import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 
 def slugify(name: str) -> str:
@@ -76,6 +87,190 @@ def _dir_exists(vault_root: str, rel_dir: str) -> bool:
     return os.path.isdir(os.path.join(vault_root, rel_dir))
 
 
+def extract_title(text: str) -> str | None:
+    m = re.search(r"^#\s+(.+)$", text, re.M)
+    return m.group(1).strip() if m else None
+
+
+def classify(
+    text: str,
+    *,
+    dir_exists,
+    model=None,
+    top: int = 3,
+    prior_weight: float = 3.0,
+) -> list[tuple[str, float | None]]:
+    """Ranked `(relative folder, confidence)` candidates; confidence is None for the rules.
+
+    `dir_exists(rel_dir)` decides whether a rule bucket is usable (else Inbox).
+    """
+    bucket = guess_bucket(text)
+    if model is not None:
+        preds = model.predict(text, top=top, priors={bucket: prior_weight})
+        if preds:
+            return preds
+        # Empty vault / nothing recognisable: fall through to the rules.
+
+    # If the bucket doesn't exist in the actual vault, fall back to Inbox.
+    # (We don't create folders here; this script only suggests a destination.)
+    if not dir_exists(bucket):
+        bucket = "00-Inbox"
+    return [(bucket, None)]
+
+
+# ---------------------------------------------------------------------------
+# Batch mode
+# ---------------------------------------------------------------------------
+
+_WORKER: dict = {}
+
+
+def _init_worker(vault_root: str, dirs: frozenset, classifier: str, model_path: str | None, top: int, prior_weight: float):
+    model = None
+    if classifier == "nb":
+        from destination_model import DestinationModel
+
+        model = DestinationModel(vault_root, model_path)
+    _WORKER.update(dirs=dirs, model=model, top=top, prior_weight=prior_weight)
+
+
+def _classify_file(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            text = f.read()
+    except OSError as e:
+        return {"src": path, "error": str(e)}
+    cands = classify(
+        text,
+        dir_exists=_WORKER["dirs"].__contains__,
+        model=_WORKER["model"],
+        top=_WORKER["top"],
+        prior_weight=_WORKER["prior_weight"],
+    )
+    return {"src": path, "title": extract_title(text), "candidates": cands}
+
+
+def expand_batch(spec: str) -> list[str]:
+    """A directory means its top-level *.md files; anything else is a glob (** allowed)."""
+    spec = os.path.expanduser(spec)
+    if os.path.isdir(spec):
+        paths = [e.path for e in os.scandir(spec) if e.is_file() and e.name.lower().endswith(".md")]
+    else:
+        paths = [p for p in glob.glob(spec, recursive=True) if os.path.isfile(p)]
+    return sorted(_expand(p) for p in paths)
+
+
+def _round(conf: float | None) -> float | None:
+    return None if conf is None else round(conf, 4)
+
+
+def unique_name(rel: str, taken: set[str]) -> str:
+    stem, ext = os.path.splitext(rel)
+    n = 2
+    while f"{stem}-{n}{ext}".lower() in taken:
+        n += 1
+    return f"{stem}-{n}{ext}"
+
+
+def build_plan(
+    paths: list[str],
+    vault_root: str,
+    *,
+    classifier: str = "rules",
+    model_path: str | None = None,
+    top: int = 3,
+    prior_weight: float = 3.0,
+    jobs: int | None = None,
+    update_model: bool = True,
+) -> dict:
+    """Classify `paths` in parallel and return a JSON-able move plan for the vault."""
+    from vault_recent import RecencyIndex, default_index_path
+
+    # One listing of the vault serves both the folder-existence checks and the name index.
+    index = RecencyIndex(vault_root, default_index_path(vault_root))
+    index.load()
+    index.refresh()
+    try:
+        index.save()
+    except OSError:
+        pass
+    dirs = frozenset(index.dirs)
+    rels = sorted(rel for _, rel in index.iter_entries())
+    existing = {rel.lower() for rel in rels}
+    by_name: dict[str, list[str]] = {}
+    for rel in rels:
+        by_name.setdefault(os.path.basename(rel).lower(), []).append(rel)
+
+    if classifier == "nb" and update_model:
+        from destination_model import DestinationModel
+
+        model = DestinationModel(vault_root, model_path)
+        try:
+            model.update(index=index)
+        finally:
+            model.close()
+
+    init = (vault_root, dirs, classifier, model_path, top, prior_weight)
+    if jobs == 1 or len(paths) < 2:
+        _init_worker(*init)
+        results = [_classify_file(p) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=init) as pool:
+            results = list(pool.map(_classify_file, paths, chunksize=16))
+
+    moves: list[dict] = []
+    keep: list[str] = []
+    errors: list[dict] = []
+    planned: set[str] = set()
+    for res in results:
+        if "error" in res:
+            errors.append(res)
+            continue
+        src = res["src"]
+        name = os.path.basename(src)
+        folder, conf = res["candidates"][0]
+        src_rel = os.path.relpath(src, vault_root)
+        inside = not src_rel.startswith(os.pardir + os.sep)
+        if inside and os.path.dirname(src_rel) == folder:
+            keep.append(src_rel)
+            continue
+
+        dest = os.path.join(folder, name)
+        same_name = [r for r in by_name.get(name.lower(), []) if r.lower() != src_rel.lower()]
+        collision = None
+        if dest.lower() in existing:
+            collision = "exists"
+        elif dest.lower() in planned:
+            collision = "batch_duplicate"
+        elif same_name:
+            # Same note name elsewhere in the vault makes [[wikilinks]] ambiguous.
+            collision = "name_exists"
+        if collision in ("exists", "batch_duplicate"):
+            dest = unique_name(dest, existing | planned)
+        planned.add(dest.lower())
+
+        moves.append(
+            {
+                "src": src,
+                "dest": dest,
+                "title": res["title"],
+                "confidence": _round(conf),
+                "candidates": [{"folder": f, "confidence": _round(c)} for f, c in res["candidates"]],
+                "collision": collision,
+                "conflicts_with": same_name if collision == "name_exists" else [],
+            }
+        )
+
+    return {
+        "vault": vault_root,
+        "classifier": classifier,
+        "files": len(paths),
+        "moves": moves,
+        "keep": keep,
+        "errors": errors,
+    }
+
+
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--md", help="path to markdown; if omitted, read stdin")
@@ -86,8 +281,46 @@ def main() -> int:
         default=_vault_root_default(),
         help="vault root path (default: ~/obsidian/obsidian_huaigu)",
     )
+    ap.add_argument(
+        "--classifier",
+        choices=["rules", "nb"],
+        default="rules",
+        help="rules: regex cascade (default); nb: naive Bayes trained on the vault layout",
+    )
+    ap.add_argument("--top", type=int, default=3, help="nb: number of destinations to print")
+    ap.add_argument(
+        "--prior-weight",
+        type=float,
+        default=3.0,
+        help="nb: weight multiplying the regex rule's bucket (1 = ignore rules)",
+    )
+    ap.add_argument("--model", default=None, help="nb: model path (default: ~/.cache/obsidian-huaigu/)")
+    ap.add_argument("--no-update", action="store_true", help="nb: do not retrain on vault changes first")
+    ap.add_argument(
+        "--batch",
+        default=None,
+        help="directory (its *.md files) or glob; prints a JSON move plan instead of one path",
+    )
+    ap.add_argument("--jobs", type=int, default=None, help="batch: worker processes (default: CPU count)")
     args = ap.parse_args()
 
+    vault_root = _expand(args.vault_root)
+
+    if args.batch:
+        paths = expand_batch(args.batch)
+        plan = build_plan(
+            paths,
+            vault_root,
+            classifier=args.classifier,
+            model_path=args.model,
+            top=args.top,
+            prior_weight=args.prior_weight,
+            jobs=args.jobs,
+            update_model=not args.no_update,
+        )
+        print(json.dumps(plan, ensure_ascii=False, indent=2))
+        return 0
+
     if args.md:
         try:
             with open(args.md, "r", encoding="utf-8", errors="ignore") as f:
@@ -98,25 +331,33 @@ def main() -> int:
     else:
         text = sys.stdin.read()
 
-    title = args.title
-    if not title:
-        m = re.search(r"^#\s+(.+)$", text, re.M)
-        if m:
-            title = m.group(1).strip()
-
-    vault_root = _expand(args.vault_root)
-
-    bucket = guess_bucket(text)
-
-    # If the bucket doesn't exist in the actual vault, fall back to Inbox.
-    # (We don't create folders here; this script only suggests a destination.)
-    if not _dir_exists(vault_root, bucket):
-        bucket = "00-Inbox"
-
+    title = args.title or extract_title(text)
     filename = slugify(title or "note") + args.ext
 
-    rel = os.path.join(bucket, filename)
-    print(rel)
+    model = None
+    if args.classifier == "nb":
+        from destination_model import DestinationModel
+
+        model = DestinationModel(vault_root, args.model)
+        if not args.no_update:
+            model.update()
+    try:
+        cands = classify(
+            text,
+            dir_exists=lambda rel: _dir_exists(vault_root, rel),
+            model=model,
+            top=args.top,
+            prior_weight=args.prior_weight,
+        )
+    finally:
+        if model is not None:
+            model.close()
+
+    if cands[0][1] is None:
+        print(os.path.join(cands[0][0], filename))
+        return 0
+    for folder, conf in cands:
+        print(f"{os.path.join(folder, filename)}\t{conf:.2f}")
     return 0
 
 
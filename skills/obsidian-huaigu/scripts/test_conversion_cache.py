@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared conversion cache.
+"""
+
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import TestCase, main
+
+from conversion_cache import ConversionCache
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+
+class TestConversionCache(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="convcache_"))
+        self.cache = ConversionCache(str(self.tmp / "cache"), max_bytes=250)
+        self.src = self.tmp / "a.pdf"
+        self.src.write_bytes(b"%PDF statement one")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_key_tracks_content_version_and_options_not_path(self):
+        k = self.cache.key(str(self.src), "pdf", "1", {"raw": False})
+        moved = self.tmp / "renamed.pdf"
+        shutil.copy(self.src, moved)
+        self.assertEqual(self.cache.key(str(moved), "pdf", "1", {"raw": False}), k)
+        self.assertNotEqual(self.cache.key(str(self.src), "pdf", "2", {"raw": False}), k)
+        self.assertNotEqual(self.cache.key(str(self.src), "pdf", "1", {"raw": True}), k)
+        self.src.write_bytes(b"%PDF statement two!")
+        self.assertNotEqual(self.cache.key(str(self.src), "pdf", "1", {"raw": False}), k)
+
+    def test_hit_miss_and_lru_eviction(self):
+        self.assertIsNone(self.cache.get("a" * 64))
+        for i, key in enumerate(["a" * 64, "b" * 64, "c" * 64]):
+            self.cache.put(key, "x" * 100)
+            os.utime(self.cache._entry_path(key), (1000 + i, 1000 + i))
+        # The third put evicted the oldest entry; a hit on "b" makes "c" the LRU.
+        self.assertIsNone(self.cache.get("a" * 64))
+        self.assertEqual(self.cache.get("b" * 64), "x" * 100)
+        self.cache.put("d" * 64, "y" * 100)
+        self.assertIsNone(self.cache.get("c" * 64))
+        buf = io.StringIO()
+        self.assertTrue(self.cache.copy_to("b" * 64, buf))
+        self.assertEqual(buf.getvalue(), "x" * 100)
+
+    def test_digests_count_towards_the_limit_and_are_cleared(self):
+        sources = []
+        for i in range(8):
+            src = self.tmp / f"s{i}.pdf"
+            src.write_bytes(b"%PDF " + bytes([i]))
+            sources.append(src)
+            self.cache.key(str(src), "pdf", "1")
+        self.assertEqual(len(self.cache.digests()), 8)
+        self.cache.put("f" * 64, "z" * 100)
+        self.assertLessEqual(sum(size for _, size, _ in self.cache.files()), 250)
+        self.assertLess(len(self.cache.digests()), 8)
+
+        self.cache.key(str(sources[0]), "pdf", "1")
+        self.cache.clear()
+        self.assertEqual(self.cache.files(), [])
+
+    def test_aborted_stream_leaves_no_entry(self):
+        pending = self.cache.begin("e" * 64)
+        pending.file.write("partial")
+        pending.abort()
+        self.assertIsNone(self.cache.get("e" * 64))
+        self.assertEqual(os.listdir(os.path.dirname(pending.path)), [])
+
+    def test_docx_converter_uses_cache(self):
+        docx = self.tmp / "r.docx"
+        xml = (
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            "<w:body><w:p><w:r><w:t>hello</w:t></w:r></w:p></w:body></w:document>"
+        )
+        with zipfile.ZipFile(docx, "w") as z:
+            z.writestr("word/document.xml", xml)
+        cmd = [sys.executable, str(SCRIPT_DIR / "convert_docx_to_md.py"), str(docx), "--cache-dir", str(self.tmp / "c2")]
+        first = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(first, "hello\n")
+        self.assertEqual(len(ConversionCache(str(self.tmp / "c2")).entries()), 1)
+        # The second run is served from the cache (rewrite the entry to prove it).
+        entry = ConversionCache(str(self.tmp / "c2")).entries()[0][2]
+        Path(entry).write_text("from cache\n", encoding="utf-8")
+        self.assertEqual(subprocess.run(cmd, capture_output=True, text=True, check=True).stdout, "from cache\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming DOCX converter.
+"""
+
+import io
+import shutil
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import TestCase, main
+
+from convert_docx_to_md import iter_blocks, read_numbering, read_styles, write_markdown
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+STYLES = f"""<w:styles xmlns:w="{W_NS}">
+  <w:style w:type="paragraph" w:styleId="Title"><w:name w:val="Title"/></w:style>
+  <w:style w:type="paragraph" w:styleId="1"><w:name w:val="heading 1"/></w:style>
+  <w:style w:type="paragraph" w:styleId="2"><w:name w:val="heading 2"/></w:style>
+</w:styles>"""
+
+NUMBERING = f"""<w:numbering xmlns:w="{W_NS}">
+  <w:abstractNum w:abstractNumId="0"><w:lvl w:ilvl="0"><w:numFmt w:val="bullet"/></w:lvl>
+    <w:lvl w:ilvl="1"><w:numFmt w:val="decimal"/></w:lvl></w:abstractNum>
+  <w:num w:numId="5"><w:abstractNumId w:val="0"/></w:num>
+</w:numbering>"""
+
+
+def para(text, style=None, num=None):
+    ppr = ""
+    if style:
+        ppr = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>'
+    elif num:
+        ppr = f'<w:pPr><w:numPr><w:ilvl w:val="{num[1]}"/><w:numId w:val="{num[0]}"/></w:numPr></w:pPr>'
+    return f"<w:p>{ppr}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def cell(text, span=1):
+    tcpr = f'<w:tcPr><w:gridSpan w:val="{span}"/></w:tcPr>' if span > 1 else ""
+    return f"<w:tc>{tcpr}{para(text) if text else '<w:p/>'}</w:tc>"
+
+
+BODY = "".join(
+    [
+        para("Quarterly Report", style="Title"),
+        para("Holdings", style="1"),
+        para("Intro text."),
+        para("first", num=("5", 0)),
+        para("sub step", num=("5", 1)),
+        para("second", num=("5", 0)),
+        "<w:tbl>"
+        f"<w:tr>{cell('Symbol')}{cell('Qty')}{cell('Note')}</w:tr>"
+        f"<w:tr>{cell('AAPL')}{cell('')}{cell('a|b')}</w:tr>"
+        f"<w:tr>{cell('Total', span=2)}{cell('x')}</w:tr>"
+        "</w:tbl>",
+        para("Risks", style="2"),
+    ]
+)
+
+
+class TestDocxConverter(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="docx_"))
+        self.docx = self.tmp / "r.docx"
+        with zipfile.ZipFile(self.docx, "w") as z:
+            z.writestr("word/document.xml", f'<w:document xmlns:w="{W_NS}"><w:body>{BODY}<w:sectPr/></w:body></w:document>')
+            z.writestr("word/styles.xml", STYLES)
+            z.writestr("word/numbering.xml", NUMBERING)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def convert(self):
+        with zipfile.ZipFile(self.docx) as z:
+            styles, numbering = read_styles(z), read_numbering(z)
+            with z.open("word/document.xml") as f:
+                out = io.StringIO()
+                write_markdown(iter_blocks(f, styles, numbering), out)
+        return out.getvalue()
+
+    def test_headings_lists_and_tables(self):
+        self.assertEqual(
+            self.convert(),
+            "# Quarterly Report\n\n"
+            "# Holdings\n\n"
+            "Intro text.\n\n"
+            "- first\n"
+            "  1. sub step\n"
+            "- second\n\n"
+            "| Symbol | Qty | Note |\n"
+            "|---|---|---|\n"
+            "| AAPL |  | a\\|b |\n"
+            "| Total |  | x |\n\n"
+            "## Risks\n",
+        )
+
+    def test_missing_styles_and_numbering_degrade_to_plain_text(self):
+        with zipfile.ZipFile(self.docx) as z:
+            xml = z.read("word/document.xml")
+        with zipfile.ZipFile(self.docx, "w") as z:
+            z.writestr("word/document.xml", xml)
+        out = self.convert()
+        self.assertIn("\nHoldings\n", out)
+        self.assertIn("- sub step", out)
+
+
+if __name__ == "__main__":
+    main()
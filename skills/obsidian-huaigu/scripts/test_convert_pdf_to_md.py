@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the page-parallel PDF converter and its structure recovery.
+"""
+
+import io
+from unittest import TestCase, main
+from unittest.mock import patch
+
+import convert_pdf_to_md
+from convert_pdf_to_md import LineWriter, iter_pages, page_ranges, page_to_markdown
+
+
+class TestPageParallel(TestCase):
+    def test_page_ranges_cover_all_pages(self):
+        self.assertEqual(page_ranges(35, 16), [(1, 16), (17, 32), (33, 35)])
+
+    def test_iter_pages_streams_in_order(self):
+        def fake(_pdftotext, _path, first, last):
+            return "".join(f"page {n}\n\f" for n in range(first, last + 1))
+
+        with patch.object(convert_pdf_to_md, "run_pdftotext", side_effect=fake):
+            pages = list(iter_pages("pdftotext", "x.pdf", 10, jobs=3, chunk=3))
+        self.assertEqual(pages, [f"page {n}\n" for n in range(1, 11)])
+
+
+class TestStructureRecovery(TestCase):
+    def test_aligned_columns_become_table(self):
+        page = (
+            "   Date          Symbol      Qty\n"
+            "   2026-01-02    AAPL        100\n"
+            "   2026-01-05    MSFT         50\n"
+        )
+        self.assertEqual(
+            page_to_markdown(page)[:4],
+            ["| Date | Symbol | Qty |", "|---|---|---|", "| 2026-01-02 | AAPL | 100 |", "| 2026-01-05 | MSFT | 50 |"],
+        )
+
+    def test_justified_prose_is_not_a_table(self):
+        page = "  The account  was opened in 2020\n  and holds several   positions across\n"
+        self.assertEqual(page_to_markdown(page)[:2], ["The account  was opened in 2020", "and holds several   positions across"])
+
+    def test_headings_lists_and_page_numbers(self):
+        page = (
+            "2.1 Risk Factors\n\n"
+            "  •  first bullet that wraps\n"
+            "     onto a second line\n"
+            "  2) numbered\n\n"
+            "第二章 风险提示\n\n"
+            "                 - 3 -\n"
+        )
+        lines = [ln for ln in page_to_markdown(page) if ln]
+        self.assertEqual(
+            lines,
+            ["### 2.1 Risk Factors", "- first bullet that wraps onto a second line", "2. numbered", "## 第二章 风险提示"],
+        )
+
+    def test_bare_numbers_in_the_body_are_kept(self):
+        page = "12\nFilled quantity\n\n500\n\nSettlement amount\n  1200\nPage 3 of 9\n"
+        self.assertEqual(
+            [ln for ln in page_to_markdown(page) if ln],
+            ["Filled quantity", "500", "Settlement amount", "1200"],
+        )
+
+    def test_line_writer_trims_and_squeezes(self):
+        buf = io.StringIO()
+        w = LineWriter(buf)
+        for ln in ["", "a", "", "", "b", ""]:
+            w.write(ln)
+        self.assertEqual(buf.getvalue(), "a\n\nb\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the naive Bayes destination model.
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main
+
+from destination_model import DestinationModel, label_for, tokenize
+from vault_recent import RecencyIndex
+
+NOTES = {
+    "03-Resources/Coding-References": "python docker linux 部署 代码 函数",
+    "03-Resources/trading-references": "交易 策略 回测 仓位 期权 止损",
+}
+
+
+class TestDestinationModel(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="vault_"))
+        self.vault = self.tmp / "vault"
+        for folder, words in NOTES.items():
+            d = self.vault / folder / "sub"
+            d.mkdir(parents=True)
+            for i in range(3):
+                (d / f"n{i}.md").write_text(words, encoding="utf-8")
+        (self.vault / "00-Inbox").mkdir()
+        (self.vault / "00-Inbox" / "x.md").write_text("python " * 50, encoding="utf-8")
+        self.model = DestinationModel(str(self.vault), str(self.tmp / "model.sqlite"))
+
+    def tearDown(self):
+        self.model.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def update(self):
+        index = RecencyIndex(str(self.vault))
+        index.refresh()
+        return self.model.update(index=index)
+
+    def test_tokenize_mixes_latin_words_and_cjk_bigrams(self):
+        self.assertEqual(tokenize("Python 回测策略"), {"python": 1, "回测": 1, "测策": 1, "策略": 1})
+
+    def test_label_for_truncates_depth_and_skips_inbox(self):
+        self.assertEqual(label_for(os.path.join("03-Resources", "A", "B", "n.md"), 2), "03-Resources/A")
+        self.assertIsNone(label_for(os.path.join("00-Inbox", "n.md"), 2))
+        self.assertIsNone(label_for("root.md", 2))
+
+    def test_trading_note_mentioning_python_routes_to_trading(self):
+        self.update()
+        preds = self.model.predict("用 python 做交易策略回测，控制仓位和止损", top=3)
+        self.assertEqual(preds[0][0], "03-Resources/trading-references")
+        self.assertAlmostEqual(sum(c for _, c in preds), 1.0)
+
+    def test_priors_shift_the_ranking(self):
+        self.update()
+        text = "python 交易"
+        plain = dict(self.model.predict(text))
+        boosted = dict(self.model.predict(text, priors={"03-Resources/Coding-References": 50.0}))
+        self.assertGreater(boosted["03-Resources/Coding-References"], plain["03-Resources/Coding-References"])
+
+    def test_incremental_update_handles_changes_and_deletes(self):
+        self.assertEqual(self.update()["added"], 7)
+        self.assertEqual(self.update(), {"added": 0, "removed": 0, "docs": 7})
+
+        shutil.rmtree(self.vault / "03-Resources" / "trading-references")
+        note = self.vault / "03-Resources" / "Coding-References" / "sub" / "n0.md"
+        note.write_text("kubernetes", encoding="utf-8")
+        os.utime(note, (1, 1))
+        stats = self.update()
+        self.assertEqual((stats["added"], stats["removed"]), (1, 4))
+        self.assertEqual(list(self.model.labels()), ["03-Resources/Coding-References"])
+        self.assertEqual(self.model.predict("交易 策略"), [])
+
+
+if __name__ == "__main__":
+    main()
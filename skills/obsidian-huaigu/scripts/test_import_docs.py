@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk import pipeline.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import TestCase, main
+
+from import_docs import note_digest, run_import, scan
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+class TestImportPipeline(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="import_"))
+        os.environ["XDG_CACHE_HOME"] = str(self.tmp / "cache")
+        self.vault = self.tmp / "vault"
+        (self.vault / "00-Inbox").mkdir(parents=True)
+        (self.vault / "03-Resources" / "Coding-References").mkdir(parents=True)
+        (self.vault / "00-Inbox" / "old.md").write_text("# Old\n\nalready   imported body\n", encoding="utf-8")
+        git(self.vault, "init", "-q")
+        git(self.vault, "config", "user.name", "t")
+        git(self.vault, "config", "user.email", "t@t")
+        git(self.vault, "add", "-A")
+        git(self.vault, "commit", "-qm", "init")
+
+        self.src = self.tmp / "src"
+        (self.src / "nested").mkdir(parents=True)
+        (self.src / "docker.md").write_text("# Docker notes\n\ndocker compose tips\n", encoding="utf-8")
+        (self.src / "nested" / "copy.md").write_text("# Copy\nalready imported body\n", encoding="utf-8")
+        (self.src / "ignored.txt").write_text("x", encoding="utf-8")
+        with zipfile.ZipFile(self.src / "Report.docx", "w") as z:
+            z.writestr(
+                "word/document.xml",
+                f'<w:document xmlns:w="{W_NS}"><w:body><w:p><w:r><w:t>quarterly numbers</w:t></w:r></w:p></w:body></w:document>',
+            )
+        (self.src / "broken.docx").write_bytes(b"not a zip")
+
+    def tearDown(self):
+        os.environ.pop("XDG_CACHE_HOME", None)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_scan_and_digest(self):
+        kinds = [(os.path.relpath(p, self.src), k) for p, k in scan(str(self.src))]
+        self.assertEqual(
+            kinds,
+            [("Report.docx", "docx"), ("broken.docx", "docx"), ("docker.md", "md"), (os.path.join("nested", "copy.md"), "md")],
+        )
+        self.assertEqual(note_digest("# A\n\nx  y\n"), note_digest("# B\nx y"))
+
+    def test_dry_run_writes_nothing(self):
+        report = run_import(str(self.src), str(self.vault), jobs=1, dry_run=True)
+        self.assertEqual(len(report["imported"]), 2)
+        self.assertNotIn("write", report["stages"])
+        self.assertEqual(git(self.vault, "status", "--porcelain"), "")
+
+    def test_import_dedups_writes_and_commits_once(self):
+        (self.vault / "unrelated.md").write_text("draft", encoding="utf-8")
+        git(self.vault, "add", "unrelated.md")
+
+        report = run_import(str(self.src), str(self.vault), jobs=2, message="kb: import test")
+
+        dests = sorted(e["dest"] for e in report["imported"])
+        self.assertEqual(
+            dests,
+            [os.path.join("00-Inbox", "Report.md"), os.path.join("03-Resources", "Coding-References", "docker.md")],
+        )
+        self.assertEqual(report["duplicates"], [{"src": str(self.src / "nested" / "copy.md"), "duplicate_of": "00-Inbox/old.md"}])
+        self.assertEqual([e["src"] for e in report["errors"]], [str(self.src / "broken.docx")])
+        self.assertTrue(report["git"]["committed"])
+        self.assertEqual(set(report["stages"]), {"scan", "convert", "dedup", "classify", "write", "commit"})
+        self.assertEqual(
+            (self.vault / "00-Inbox" / "Report.md").read_text(encoding="utf-8"), "# Report\n\nquarterly numbers\n"
+        )
+        committed = git(self.vault, "show", "--name-only", "--format=%s", "HEAD").split()
+        self.assertEqual(committed[:3], ["kb:", "import", "test"])
+        self.assertEqual(sorted(committed[3:]), sorted(dests))
+        # The unrelated staged file was not swept into the import commit.
+        self.assertEqual(git(self.vault, "status", "--porcelain").strip(), "A  unrelated.md")
+
+        # Re-running finds everything already imported.
+        again = run_import(str(self.src), str(self.vault), jobs=1)
+        self.assertEqual(again["imported"], [])
+        self.assertEqual(len(again["duplicates"]), 3)
+
+
+if __name__ == "__main__":
+    main()
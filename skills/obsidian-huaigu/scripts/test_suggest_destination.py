@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for suggest_destination batch planning.
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main
+
+from suggest_destination import build_plan, expand_batch, guess_bucket
+
+
+class TestBatchPlan(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="vault_"))
+        self.vault = self.tmp / "vault"
+        (self.vault / "00-Inbox").mkdir(parents=True)
+        (self.vault / "03-Resources" / "Coding-References").mkdir(parents=True)
+        (self.vault / "03-Resources" / "Life-Guides").mkdir(parents=True)
+        (self.vault / "03-Resources" / "Coding-References" / "docker.md").write_text("x", encoding="utf-8")
+        (self.vault / "02-Areas").mkdir()
+        (self.vault / "02-Areas" / "trip.md").write_text("x", encoding="utf-8")
+        inbox = self.vault / "00-Inbox"
+        (inbox / "docker.md").write_text("docker compose notes", encoding="utf-8")
+        (inbox / "trip.md").write_text("旅行 酒店", encoding="utf-8")
+        (inbox / "misc.md").write_text("nothing special", encoding="utf-8")
+        (inbox / "skip.txt").write_text("docker", encoding="utf-8")
+        os.environ["XDG_CACHE_HOME"] = str(self.tmp / "cache")
+
+    def tearDown(self):
+        os.environ.pop("XDG_CACHE_HOME", None)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_expand_batch_directory_only_takes_markdown(self):
+        names = [os.path.basename(p) for p in expand_batch(str(self.vault / "00-Inbox"))]
+        self.assertEqual(names, ["docker.md", "misc.md", "trip.md"])
+
+    def test_plan_detects_collisions_and_keeps_unmoved_notes(self):
+        paths = expand_batch(str(self.vault / "00-Inbox"))
+        plan = build_plan(paths, str(self.vault), jobs=1)
+
+        moves = {os.path.basename(m["src"]): m for m in plan["moves"]}
+        self.assertEqual(plan["keep"], [os.path.join("00-Inbox", "misc.md")])
+        self.assertEqual(moves["docker.md"]["collision"], "exists")
+        self.assertEqual(moves["docker.md"]["dest"], os.path.join("03-Resources", "Coding-References", "docker-2.md"))
+        self.assertEqual(moves["trip.md"]["collision"], "name_exists")
+        self.assertEqual(moves["trip.md"]["conflicts_with"], [os.path.join("02-Areas", "trip.md")])
+        self.assertEqual(moves["trip.md"]["dest"], os.path.join("03-Resources", "Life-Guides", "trip.md"))
+
+    def test_guess_bucket_rules_unchanged(self):
+        self.assertEqual(guess_bucket("docker"), os.path.join("03-Resources", "Coding-References"))
+
+
+if __name__ == "__main__":
+    main()
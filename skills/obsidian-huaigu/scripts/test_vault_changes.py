@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the vault_changes change feed.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase, main, skipUnless
+
+from vault_changes import _parse_name_status, changed_since
+from vault_recent import RecencyIndex
+
+
+def git(cwd, *args):
+    subprocess.run(["git", *args], cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class TestVaultChanges(TestCase):
+    def setUp(self):
+        self.vault = Path(tempfile.mkdtemp(prefix="vault_"))
+        self.index_path = str(self.vault.parent / f"{self.vault.name}.index.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.vault, ignore_errors=True)
+        if os.path.exists(self.index_path):
+            os.unlink(self.index_path)
+
+    def test_parse_name_status_handles_renames(self):
+        out = "M\0a.md\0R100\0old.md\0new.md\0D\0gone.md\0"
+        self.assertEqual(
+            _parse_name_status(out),
+            [
+                {"status": "M", "path": "a.md"},
+                {"status": "R", "path": "new.md", "old_path": "old.md"},
+                {"status": "D", "path": "gone.md"},
+            ],
+        )
+
+    @skipUnless(shutil.which("git"), "git not installed")
+    def test_git_feed_since_commit_includes_worktree_and_untracked(self):
+        git(self.vault, "init", "-q")
+        git(self.vault, "config", "user.email", "t@example.com")
+        git(self.vault, "config", "user.name", "t")
+        (self.vault / "a.md").write_text("a\n", encoding="utf-8")
+        (self.vault / "b.md").write_text("b\n", encoding="utf-8")
+        git(self.vault, "add", ".")
+        git(self.vault, "commit", "-qm", "one")
+        (self.vault / "a.md").write_text("a2\n", encoding="utf-8")
+        (self.vault / "new.md").write_text("n\n", encoding="utf-8")
+        (self.vault / "img.png").write_bytes(b"x")
+
+        feed = changed_since(str(self.vault), "HEAD", glob="*.md")
+        self.assertEqual(feed["source"], "git")
+        self.assertEqual(
+            [(c["status"], c["path"]) for c in feed["changes"]],
+            [("M", "a.md"), ("?", "new.md")],
+        )
+
+    def test_snapshot_feed_reports_modified_added_and_deleted(self):
+        for name, mtime in [("old.md", 1000), ("gone.md", 1000), ("new.md", 2000)]:
+            p = self.vault / name
+            p.write_text("x", encoding="utf-8")
+            os.utime(p, (mtime, mtime))
+        feed = changed_since(str(self.vault), "1500", use_git=False, snapshot_path=self.index_path)
+        self.assertEqual([(c["status"], c["path"]) for c in feed["changes"]], [("?", "new.md")])  # no snapshot yet
+
+        (self.vault / "gone.md").unlink()
+        (self.vault / "fresh.md").write_text("y", encoding="utf-8")
+        os.utime(self.vault / "old.md", (2000, 2000))
+        # Another script refreshing the shared recency index does not eat the feed's deletions.
+        shared = RecencyIndex(str(self.vault), self.index_path + ".recent")
+        shared.refresh()
+        shared.save()
+        self.addCleanup(os.unlink, self.index_path + ".recent")
+        feed = changed_since(str(self.vault), "1500", use_git=False, snapshot_path=self.index_path)
+        self.assertEqual(
+            [(c["status"], c["path"]) for c in feed["changes"]],
+            [("A", "fresh.md"), ("D", "gone.md"), ("M", "new.md"), ("M", "old.md")],
+        )
+
+    def test_snapshot_deletions_respect_since(self):
+        (self.vault / "gone.md").write_text("x", encoding="utf-8")
+        changed_since(str(self.vault), "0", use_git=False, snapshot_path=self.index_path)
+        (self.vault / "gone.md").unlink()
+        changed_since(str(self.vault), "0", use_git=False, snapshot_path=self.index_path)
+
+        later = str(time.time() + 60)
+        self.assertEqual(changed_since(str(self.vault), later, use_git=False, snapshot_path=self.index_path)["changes"], [])
+        feed = changed_since(str(self.vault), "0", use_git=False, snapshot_path=self.index_path)
+        self.assertEqual(feed["changes"], [{"status": "D", "path": "gone.md"}])  # logged, still reported
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the vault_recent recency index.
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main
+
+from vault_recent import RecencyIndex, parse_since, recent
+
+
+class TestRecencyIndex(TestCase):
+    def setUp(self):
+        self.vault = Path(tempfile.mkdtemp(prefix="vault_"))
+        self.index_path = str(self.vault.parent / f"{self.vault.name}.index.json")
+        for rel, mtime in [("a/old.md", 1000), ("a/new.md", 3000), ("b/mid.md", 2000), (".git/x.md", 9000)]:
+            p = self.vault / rel
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_text("x", encoding="utf-8")
+            os.utime(p, (mtime, mtime))
+
+    def tearDown(self):
+        shutil.rmtree(self.vault, ignore_errors=True)
+        if os.path.exists(self.index_path):
+            os.unlink(self.index_path)
+
+    def build(self):
+        index = RecencyIndex(str(self.vault), self.index_path)
+        index.load()
+        index.refresh()
+        index.save()
+        return index
+
+    def test_top_n_folder_and_since_filters(self):
+        index = self.build()
+        self.assertEqual([p for _, p in recent(index, 2)], ["a/new.md", "b/mid.md"])
+        self.assertEqual([p for _, p in recent(index, 10, folder="a")], ["a/new.md", "a/old.md"])
+        self.assertEqual([p for _, p in recent(index, 10, since=1500)], ["a/new.md", "b/mid.md"])
+
+    def test_warm_refresh_reuses_listings_and_sees_in_place_edits(self):
+        self.build()
+        p = self.vault / "a" / "old.md"
+        dir_mtime = os.stat(p.parent).st_mtime_ns
+        p.write_text("edited", encoding="utf-8")
+        os.utime(p, (5000, 5000))
+        os.utime(p.parent, ns=(dir_mtime, dir_mtime))
+
+        index = self.build()
+        self.assertEqual(index.listed, 0)
+        self.assertEqual(recent(index, 1), [(5000, "a/old.md")])
+
+    def test_new_and_deleted_files_relist_directory(self):
+        self.build()
+        (self.vault / "b" / "mid.md").unlink()
+        (self.vault / "b" / "fresh.md").write_text("y", encoding="utf-8")
+        index = self.build()
+        self.assertEqual(index.listed, 1)
+        self.assertEqual(sorted(p for _, p in index.iter_entries("b")), ["b/fresh.md"])
+
+    def test_parse_since_relative_and_absolute(self):
+        self.assertEqual(parse_since("2d", now=200000.0), 200000.0 - 2 * 86400)
+        self.assertLess(parse_since("2026-01-01"), parse_since("2026-01-01 10:00"))
+
+
+if __name__ == "__main__":
+    main()
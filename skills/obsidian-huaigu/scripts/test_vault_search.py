@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests for vault_search query server and literal matcher.
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase, main, mock, skipUnless
+
+import vault_search
+from vault_search import (
+    VaultIndex,
+    VaultSearchServer,
+    iter_hits,
+    iter_output,
+    iter_rg_json,
+    rg_text_line,
+    server_request,
+)
+
+
+class TestVaultSearchServer(TestCase):
+    def setUp(self):
+        self.vault = Path(tempfile.mkdtemp(prefix="vault_"))
+        (self.vault / "notes").mkdir()
+        (self.vault / ".obsidian").mkdir()
+        (self.vault / "notes" / "a.md").write_text("alpha\nMiniMax token\nomega\n", encoding="utf-8")
+        (self.vault / ".obsidian" / "hidden.md").write_text("MiniMax\n", encoding="utf-8")
+        self.sock_dir = tempfile.mkdtemp(prefix="vs_sock_")
+        self.sock = os.path.join(self.sock_dir, "s.sock")
+
+    def tearDown(self):
+        shutil.rmtree(self.vault, ignore_errors=True)
+        shutil.rmtree(self.sock_dir, ignore_errors=True)
+
+    def start_server(self, index):
+        server = VaultSearchServer(self.sock, index)
+        t = threading.Thread(target=server.serve_forever, daemon=True)
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_index_search_skips_hidden_dirs_and_caches(self):
+        index = VaultIndex(str(self.vault))
+        index.refresh(force=True)
+        req = {"query": "minimax", "ignore_case": True}
+        self.assertEqual(index.search(req), ["notes/a.md:2:MiniMax token"])
+        index.search(req)
+        self.assertEqual(index.stats()["hits"], 1)
+
+    def test_index_picks_up_changed_files_after_rescan(self):
+        index = VaultIndex(str(self.vault), rescan=0)
+        index.refresh(force=True)
+        self.assertEqual(index.search({"query": "beta"}), [])
+        time.sleep(0.01)
+        (self.vault / "notes" / "b.md").write_text("beta\n", encoding="utf-8")
+        self.assertEqual(index.search({"query": "beta"}), ["notes/b.md:1:beta"])
+
+    def test_server_round_trip_and_vault_mismatch(self):
+        index = VaultIndex(str(self.vault))
+        index.refresh(force=True)
+        self.start_server(index)
+
+        resp = server_request(self.sock, {"vault": str(self.vault), "query": "alpha", "context": 1})
+        self.assertEqual(resp, {"ok": True, "lines": ["notes/a.md:1:alpha", "notes/a.md-2-MiniMax token"]})
+
+        resp = server_request(self.sock, {"vault": "/elsewhere", "query": "alpha"})
+        self.assertFalse(resp["ok"])
+
+    def test_socket_is_private_from_creation(self):
+        old = os.umask(0o022)
+        try:
+            self.start_server(VaultIndex(str(self.vault)))
+        finally:
+            os.umask(old)
+        self.assertEqual(os.stat(self.sock).st_mode & 0o077, 0)  # owner only
+
+    def test_server_request_without_server_returns_none(self):
+        self.assertIsNone(server_request(self.sock, {"query": "x"}))
+
+    def run_cli(self, *argv):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            vault_search.main([*argv, "--vault", str(self.vault), "--socket", self.sock])
+        return out.getvalue().splitlines()
+
+    def test_server_and_fallback_print_the_same_lines(self):
+        (self.vault / "notes" / "b.md").write_text("x\nMiniMax one\ny\nMiniMax two\nz\n\nend\n", encoding="utf-8")
+        cases = [("MiniMax",), ("MiniMax", "--context", "1"), ("minimax", "--ignore-case", "--context", "2"), ("MiniMax", "-c")]
+        fallback = {case: self.run_cli(*case) for case in cases}
+
+        index = VaultIndex(str(self.vault))
+        index.refresh(force=True)
+        self.start_server(index)
+        for case in cases:
+            served = self.run_cli(*case)
+            self.assertEqual(served, fallback[case], case)
+        self.assertEqual(index.stats()["misses"], len(cases))  # really answered by the server
+        self.assertEqual(
+            fallback[("MiniMax", "--context", "1")],
+            [
+                "notes/a.md-1-alpha",
+                "notes/a.md:2:MiniMax token",
+                "notes/a.md-3-omega",
+                "notes/b.md-1-x",
+                "notes/b.md:2:MiniMax one",
+                "notes/b.md-3-y",
+                "notes/b.md:4:MiniMax two",
+                "notes/b.md-5-z",
+            ],
+        )
+
+    @skipUnless(shutil.which("rg"), "ripgrep not installed")
+    def test_rg_text_lines_match_python_scan(self):
+        (self.vault / "notes" / "b.md").write_text("x\nMiniMax one\ny\nMiniMax two\nz\n", encoding="utf-8")
+        with_rg = self.run_cli("MiniMax", "--context", "1", "--no-server")
+        with mock.patch("shutil.which", return_value=None):
+            python = self.run_cli("MiniMax", "--context", "1", "--no-server")
+        self.assertEqual(sorted(with_rg), sorted(python))
+
+    def test_rg_text_line_is_vault_relative(self):
+        vault = str(self.vault)
+        self.assertEqual(rg_text_line(f"{vault}/notes/a.md:2:MiniMax token\n", vault), "notes/a.md:2:MiniMax token")
+        self.assertEqual(rg_text_line(f"{vault}/notes/a.md-3-omega\n", vault + "/"), "notes/a.md-3-omega")
+
+
+def rg_event(kind, **data):
+    return json.dumps({"type": kind, "data": data}) + "\n"
+
+
+class TestStructuredOutput(TestCase):
+    def test_python_json_records_have_byte_offsets_and_context(self):
+        docs = [("/v/n.md", ["héllo\n", "a MiniMax b\n", "tail\n"])]
+        out = list(iter_output(iter_hits(docs, "MiniMax", False), "/v", "text", True, 1, 10))
+        rec = json.loads(out[0])
+        self.assertEqual(rec["path"], "n.md")
+        self.assertEqual((rec["line"], rec["column"], rec["offset"]), (2, 3, len("héllo\n".encode()) + 2))
+        self.assertEqual((rec["before"], rec["after"]), (["héllo"], ["tail"]))
+
+    def test_files_and_counts_modes(self):
+        docs = [("/v/a.md", ["x\n", "x\n"]), ("/v/b.md", ["y\n"]), ("/v/c.md", ["x\n"])]
+        self.assertEqual(list(iter_output(iter_hits(docs, "x", False), "/v", "files", False, 0, 10)), ["a.md", "c.md"])
+        self.assertEqual(list(iter_output(iter_hits(docs, "x", False), "/v", "count", False, 0, 1)), ["a.md:2"])
+
+    def test_rg_json_decoder_assembles_context(self):
+        lines = lambda t: {"text": t}  # noqa: E731
+        stream = [
+            rg_event("begin", path={"text": "/v/n.md"}),
+            rg_event("context", path={"text": "/v/n.md"}, lines=lines("one\n"), line_number=1, absolute_offset=0),
+            rg_event(
+                "match",
+                path={"text": "/v/n.md"},
+                lines=lines("two hit\n"),
+                line_number=2,
+                absolute_offset=4,
+                submatches=[{"match": {"text": "hit"}, "start": 4, "end": 7}],
+            ),
+            rg_event(
+                "match",
+                path={"text": "/v/n.md"},
+                lines=lines("hit three\n"),
+                line_number=3,
+                absolute_offset=12,
+                submatches=[{"match": {"text": "hit"}, "start": 0, "end": 3}],
+            ),
+            rg_event("context", path={"text": "/v/n.md"}, lines=lines("four\n"), line_number=4, absolute_offset=22),
+            rg_event("end", path={"text": "/v/n.md"}),
+            rg_event("summary"),
+        ]
+        recs = list(iter_rg_json(stream, "/v", 1))
+        self.assertEqual([(r["line"], r["column"], r["offset"]) for r in recs], [(2, 5, 8), (3, 1, 12)])
+        self.assertEqual((recs[0]["before"], recs[0]["after"]), (["one"], ["hit three"]))
+        self.assertEqual((recs[1]["before"], recs[1]["after"]), (["two hit"], ["four"]))
+
+
+if __name__ == "__main__":
+    main()
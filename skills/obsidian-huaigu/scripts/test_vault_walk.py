@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared vault walker and its ignore rules.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main
+
+from vault_walk import IgnoreRules, VaultWalker, iter_files
+
+
+class TestIgnoreRules(TestCase):
+    def test_gitignore_semantics(self):
+        rules = IgnoreRules()
+        rules.add_gitignore("", "# comment\n*.log\nbuild/\n/top.md\ndocs/**/draft-*.md\n!keep.log\n")
+        rules.add_gitignore("sub", "local.md\n")
+        check = lambda rel, is_dir=False: rules.ignored(rel.replace("/", os.sep), is_dir)  # noqa: E731
+        self.assertTrue(check("a/b/x.log"))
+        self.assertFalse(check("a/keep.log"))
+        self.assertTrue(check("a/build", True))
+        self.assertFalse(check("a/build"))  # dir-only rule, plain file
+        self.assertTrue(check("top.md"))
+        self.assertFalse(check("a/top.md"))  # anchored
+        self.assertTrue(check("docs/x/y/draft-1.md"))
+        self.assertTrue(check("docs/draft-2.md"))
+        self.assertTrue(check("sub/deeper/local.md"))
+        self.assertFalse(check("other/local.md"))  # scoped to sub/
+
+    def test_obsidian_filters(self):
+        rules = IgnoreRules()
+        rules.add_obsidian_filters(["05-Archive/", "/\\.excalidraw\\.md$/"])
+        self.assertTrue(rules.ignored(os.path.join("05-Archive", "x.md"), False))
+        self.assertTrue(rules.ignored("pic.excalidraw.md", False))
+        self.assertFalse(rules.ignored(os.path.join("02-Areas", "x.md"), False))
+
+
+class TestVaultWalker(TestCase):
+    def setUp(self):
+        self.vault = Path(tempfile.mkdtemp(prefix="walk_"))
+        for rel in [
+            "a/note.md",
+            "a/NOTE2.MD",
+            "a/img.png",
+            "a/deep/x.md",
+            "gen/out.md",
+            "05-Archive/old.md",
+            ".trash/gone.md",
+            ".obsidian/app.json",
+            "node_modules/pkg/readme.md",
+        ]:
+            p = self.vault / rel
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_text("x", encoding="utf-8")
+        (self.vault / ".gitignore").write_text("gen/\n", encoding="utf-8")
+        (self.vault / ".obsidian" / "app.json").write_text(json.dumps({"userIgnoreFilters": ["05-Archive/"]}))
+        self.cache = str(self.vault.parent / f"{self.vault.name}.walk.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.vault, ignore_errors=True)
+        if os.path.exists(self.cache):
+            os.unlink(self.cache)
+
+    def rels(self, walker):
+        return sorted(rel.replace(os.sep, "/") for _, rel in walker.iter_entries())
+
+    def test_skips_hidden_ignored_and_non_matching(self):
+        walker = VaultWalker(str(self.vault), pattern="*.md")
+        walker.refresh()
+        self.assertEqual(self.rels(walker), ["a/NOTE2.MD", "a/deep/x.md", "a/note.md"])
+        self.assertNotIn("gen", walker.dirs)  # ignored dirs are not walked at all
+
+        walker = VaultWalker(str(self.vault), pattern="*.md", ignore=False)
+        walker.refresh()
+        self.assertIn("gen/out.md", self.rels(walker))
+        self.assertNotIn(".trash/gone.md", self.rels(walker))
+
+    def test_non_recursive(self):
+        found = sorted(os.path.basename(p) for p in iter_files(str(self.vault / "a"), "*.md", recursive=False))
+        self.assertEqual(found, ["NOTE2.MD", "note.md"])
+
+    def test_subtree_keeps_rules_from_above(self):
+        (self.vault / ".gitignore").write_text("NOTE2.MD\n", encoding="utf-8")
+        walker = VaultWalker(str(self.vault), pattern="*.md", recursive=False)
+        walker.refresh("a")
+        self.assertEqual(sorted(rel.replace(os.sep, "/") for _, rel in walker.iter_entries("a")), ["a/note.md"])
+
+    def test_cached_listings_are_reused_and_gitignore_changes_apply(self):
+        walker = VaultWalker(str(self.vault), self.cache, pattern="*.md")
+        walker.refresh()
+        walker.save()
+
+        walker = VaultWalker(str(self.vault), self.cache, pattern="*.md")
+        walker.load()
+        walker.refresh()
+        self.assertEqual(walker.listed, 0)
+
+        # Editing .gitignore does not touch any directory mtime, but takes effect.
+        (self.vault / ".gitignore").write_text("deep/\n", encoding="utf-8")
+        walker.refresh()
+        self.assertEqual(self.rels(walker), ["a/NOTE2.MD", "a/note.md", "gen/out.md"])
+
+
+if __name__ == "__main__":
+    main()
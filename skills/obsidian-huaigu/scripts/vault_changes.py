@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""What changed in the vault since a commit or a point in time.
+
+Shared change feed for the vault scripts and sync jobs, so they stop stat-walking
+the whole tree to answer "what changed since X".
+
+Sources:
+- git (preferred): `git diff --name-status` from the base commit to the working
+  tree (so staged and unstaged edits count), plus untracked files (status `?`).
+  A timestamp is mapped to the last commit before it.
+- snapshot (fallback, no git): the feed's own *.md listing under
+  ~/.cache/obsidian-huaigu/changes-<vault key>-<feed>.json (not the index that
+  vault_recent/import_docs refresh). Notes modified at/after the timestamp are
+  reported: "A" if the previous snapshot did not have them, "M" if it did, "?"
+  on the first run (no snapshot to compare with). Notes gone since the previous
+  snapshot are logged with the time the deletion was seen and reported as "D"
+  while that time is at/after the timestamp.
+
+Examples:
+  python3 vault_changes.py --since HEAD~3
+  python3 vault_changes.py --since 2d --json
+  python3 vault_changes.py --since "2026-02-01 09:00" --glob "*.md" --json
+  python3 vault_changes.py --since 1d --no-git --feed destination-model
+
+JSON output:
+  {"source": "git", "base": "<sha>", "head": "<sha>", "since": "...",
+   "changes": [{"status": "M", "path": "01-Projects/x.md"},
+               {"status": "R", "path": "new.md", "old_path": "old.md"}, ...]}
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from vault_recent import RecencyIndex, expand, parse_since
+
+EMPTY_TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+# How long a seen deletion stays in the snapshot's log.
+DELETED_KEEP = 90 * 86400
+
+
+def default_snapshot_path(vault: str, feed: str = "default") -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or "~/.cache"
+    key = hashlib.sha1(vault.encode("utf-8")).hexdigest()[:12]
+    return expand(os.path.join(base, "obsidian-huaigu", f"changes-{key}-{feed}.json"))
+
+
+class ChangeSnapshot(RecencyIndex):
+    """The change feed's own note listing, plus when it was taken and a log of
+    deleted notes (vault-relative path -> time the deletion was seen)."""
+
+    def __init__(self, vault: str, path: str | None = None):
+        super().__init__(vault, path)
+        self.taken_at: float | None = None
+        self.deleted: dict[str, float] = {}
+
+    def _extra(self) -> dict:
+        return {"taken_at": self.taken_at, "deleted": self.deleted}
+
+    def _load_extra(self, data: dict) -> None:
+        self.taken_at = data.get("taken_at")
+        self.deleted = data.get("deleted") or {}
+
+
+def _git(vault: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["git", *args],
+        cwd=vault,
+        text=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+
+def git_available(vault: str) -> bool:
+    if not shutil.which("git"):
+        return False
+    p = _git(vault, "rev-parse", "--is-inside-work-tree")
+    return p.returncode == 0 and p.stdout.strip() == "true"
+
+
+def parse_timestamp(since: str, *, now: float | None = None) -> float | None:
+    """Epoch for anything `vault_recent.parse_since` understands or a bare epoch; else None."""
+    try:
+        return float(since)
+    except ValueError:
+        pass
+    try:
+        return parse_since(since, now=now)
+    except argparse.ArgumentTypeError:
+        return None
+
+
+def resolve_commit(vault: str, commit: str) -> str | None:
+    p = _git(vault, "rev-parse", "--verify", "--quiet", f"{commit}^{{commit}}")
+    return p.stdout.strip() if p.returncode == 0 else None
+
+
+def _parse_name_status(out: str) -> list[dict]:
+    """Parse `git diff --name-status -z` output."""
+    parts = out.split("\0")
+    changes: list[dict] = []
+    i = 0
+    while i < len(parts) and parts[i]:
+        status = parts[i]
+        if status[0] in "RC":
+            changes.append({"status": status[0], "path": parts[i + 2], "old_path": parts[i + 1]})
+            i += 3
+        else:
+            changes.append({"status": status[0], "path": parts[i + 1]})
+            i += 2
+    return changes
+
+
+def git_changes(vault: str, base: str | None, ts: float | None) -> dict:
+    """Changes from commit `base` (or, if None, the last commit before `ts`) to the working tree."""
+    if base is None:
+        p = _git(vault, "rev-list", "-1", f"--before={int(ts or 0)}", "HEAD")
+        base = p.stdout.strip() or EMPTY_TREE
+
+    head = _git(vault, "rev-parse", "--verify", "--quiet", "HEAD").stdout.strip() or None
+
+    p = _git(vault, "diff", "--name-status", "-z", "-M", "--relative", base, "--")
+    if p.returncode != 0:
+        raise RuntimeError(f"git diff failed: {p.stderr.strip()}")
+    changes = _parse_name_status(p.stdout)
+
+    p = _git(vault, "ls-files", "--others", "--exclude-standard", "-z")
+    for rel in filter(None, p.stdout.split("\0")):
+        if ts is not None:
+            try:
+                if os.stat(os.path.join(vault, rel)).st_mtime < ts:
+                    continue
+            except OSError:
+                continue
+        changes.append({"status": "?", "path": rel})
+
+    return {"source": "git", "base": base, "head": head, "changes": changes}
+
+
+def snapshot_changes(vault: str, ts: float, *, snapshot_path: str | None = None) -> dict:
+    snap = ChangeSnapshot(vault, snapshot_path or default_snapshot_path(vault))
+    snap.load()
+    first = snap.taken_at is None
+    before = {rel for _, rel in snap.iter_entries()}
+    snap.refresh()
+    now = time.time()
+
+    changes: list[dict] = []
+    current: set[str] = set()
+    for mtime, rel in snap.iter_entries():
+        current.add(rel)
+        snap.deleted.pop(rel, None)  # re-created
+        if mtime >= ts:
+            changes.append({"status": "?" if first else "M" if rel in before else "A", "path": rel})
+    for rel in before - current:
+        snap.deleted[rel] = now
+    snap.deleted = {rel: t for rel, t in snap.deleted.items() if now - t < DELETED_KEEP}
+    changes.extend({"status": "D", "path": rel} for rel, t in sorted(snap.deleted.items()) if t >= ts)
+
+    snap.taken_at = now
+    snap.dirty = True
+    try:
+        snap.save()
+    except OSError:
+        pass
+    return {"source": "snapshot", "base": None, "head": None, "changes": changes}
+
+
+def changed_since(
+    vault: str,
+    since: str,
+    *,
+    glob: str | None = None,
+    use_git: bool = True,
+    snapshot_path: str | None = None,
+) -> dict:
+    """Return the change feed for `vault` since a commit-ish or timestamp (see module doc)."""
+    vault = expand(vault)
+    if use_git and git_available(vault):
+        # A commit-ish wins over a timestamp reading (e.g. an all-digit short sha).
+        base = resolve_commit(vault, since)
+        ts = None if base else parse_timestamp(since)
+        if base is None and ts is None:
+            raise ValueError(f"neither a commit nor a time: {since!r}")
+        feed = git_changes(vault, base, ts)
+    else:
+        ts = parse_timestamp(since)
+        if ts is None:
+            raise ValueError(f"git is not available; cannot resolve commit {since!r}")
+        feed = snapshot_changes(vault, ts, snapshot_path=snapshot_path)
+
+    if glob:
+        feed["changes"] = [
+            c
+            for c in feed["changes"]
+            if fnmatch.fnmatch(os.path.basename(c["path"]), glob)
+            or fnmatch.fnmatch(os.path.basename(c.get("old_path", "")), glob)
+        ]
+    feed["changes"].sort(key=lambda c: c["path"])
+    feed["since"] = since
+    feed["generated_at"] = time.time()
+    return feed
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vault", default="~/obsidian/obsidian_huaigu")
+    ap.add_argument(
+        "--since",
+        required=True,
+        help="commit-ish (HEAD~5, <sha>) or time (7d, 12h, 2026-02-01, epoch seconds)",
+    )
+    ap.add_argument("--glob", default=None, help="only paths whose filename matches (e.g. *.md)")
+    ap.add_argument("--no-git", action="store_true", help="force the mtime snapshot fallback")
+    ap.add_argument("--feed", default="default", help="snapshot name; one per consumer that runs on its own schedule")
+    ap.add_argument("--snapshot", default=None, help="snapshot path (default: ~/.cache/obsidian-huaigu/changes-*.json)")
+    ap.add_argument("--json", action="store_true", help="print the feed as JSON")
+    args = ap.parse_args()
+
+    vault = expand(args.vault)
+    if not os.path.isdir(vault):
+        print(f"ERROR: vault not found: {vault}", file=sys.stderr)
+        return 1
+
+    try:
+        feed = changed_since(
+            vault,
+            args.since,
+            glob=args.glob,
+            use_git=not args.no_git,
+            snapshot_path=args.snapshot or default_snapshot_path(vault, args.feed),
+        )
+    except (ValueError, RuntimeError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(feed, ensure_ascii=False, indent=2))
+        return 0
+
+    for c in feed["changes"]:
+        if "old_path" in c:
+            print(f"{c['status']}\t{c['old_path']} -> {c['path']}")
+        else:
+            print(f"{c['status']}\t{c['path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
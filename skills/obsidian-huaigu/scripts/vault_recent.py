@@ -1,30 +1,91 @@
 #!/usr/bin/env python3
-"""List recently modified markdown notes in the vault."""
+"""List recently modified markdown notes in the vault.
+
+A small recency index (per-directory mtime + note mtimes, see vault_walk.py) is
+cached under ~/.cache/obsidian-huaigu/ so repeated calls only re-list directories
+whose mtime changed. Files in unchanged directories are still re-stat'ed (in-place
+edits do not touch the directory mtime) unless --trust-dir-mtime is given.
+.gitignore'd and Obsidian-excluded notes are left out.
+
+Examples:
+  python3 vault_recent.py --n 30
+  python3 vault_recent.py --since 7d --folder 01-Projects
+  python3 vault_recent.py --since "2026-02-01 09:00"
+"""
 
 from __future__ import annotations
 
 import argparse
+import hashlib
+import heapq
 import os
+import re
 import time
+from datetime import datetime
+
+from vault_walk import SKIP_DIRS, WALK_VERSION, VaultWalker, expand  # noqa: F401  (re-exported)
+
+INDEX_VERSION = WALK_VERSION
+
+
+def default_index_path(vault: str) -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or "~/.cache"
+    key = hashlib.sha1(vault.encode("utf-8")).hexdigest()[:12]
+    return expand(os.path.join(base, "obsidian-huaigu", f"recent-{key}.json"))
+
+
+class RecencyIndex(VaultWalker):
+    """The shared vault walker's listing cache, restricted to *.md notes.
 
+    `dirs` maps a vault-relative directory to
+    `{"mtime": <dir st_mtime_ns>, "dirs": [subdir names], "files": {name: mtime}, ...}`.
+    """
 
-def expand(path: str) -> str:
-    return os.path.abspath(os.path.expanduser(path))
+    def __init__(self, vault: str, path: str | None = None):
+        super().__init__(vault, path, pattern="*.md")
+        self.vault = vault
 
 
-def iter_files(root: str):
-    for base, dirs, files in os.walk(root):
-        # skip heavy/irrelevant dirs
-        dirs[:] = [d for d in dirs if d not in {".git", ".obsidian", ".claude", "node_modules"}]
-        for f in files:
-            if f.lower().endswith(".md"):
-                yield os.path.join(base, f)
+def parse_since(value: str, *, now: float | None = None) -> float:
+    """Parse `7d` / `12h` / `30m` or `YYYY-MM-DD[ HH:MM[:SS]]` (local time) into an epoch."""
+    now = time.time() if now is None else now
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([dhm])\s*", value)
+    if m:
+        mult = {"d": 86400, "h": 3600, "m": 60}[m.group(2)]
+        return now - float(m.group(1)) * mult
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value.strip(), fmt).timestamp()
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"bad --since value: {value!r}")
+
+
+def recent(index: RecencyIndex, n: int, *, folder: str = "", since: float | None = None):
+    entries = index.iter_entries(folder)
+    if since is not None:
+        entries = (e for e in entries if e[0] >= since)
+    return heapq.nlargest(n, entries)
 
 
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--vault", default="~/obsidian/obsidian_huaigu")
     ap.add_argument("--n", type=int, default=30)
+    ap.add_argument(
+        "--since",
+        type=parse_since,
+        default=None,
+        help="only notes modified since: 7d / 12h / 30m or 'YYYY-MM-DD[ HH:MM]'",
+    )
+    ap.add_argument("--folder", default="", help="only notes under this vault sub-folder")
+    ap.add_argument("--index", default=None, help="index path (default: ~/.cache/obsidian-huaigu/)")
+    ap.add_argument("--no-index", action="store_true", help="full scan; do not read or write the index")
+    ap.add_argument(
+        "--trust-dir-mtime",
+        action="store_true",
+        help="skip re-stat of notes in unchanged directories (faster; misses in-place edits)",
+    )
     args = ap.parse_args()
 
     vault = expand(args.vault)
@@ -32,18 +93,21 @@ def main() -> int:
         print(f"ERROR: vault not found: {vault}")
         return 1
 
-    rows = []
-    for p in iter_files(vault):
-        try:
-            st = os.stat(p)
-        except FileNotFoundError:
-            continue
-        rows.append((st.st_mtime, p))
+    folder = os.path.normpath(args.folder.strip("/")) if args.folder.strip("/") else ""
+    if folder and not os.path.isdir(os.path.join(vault, folder)):
+        print(f"ERROR: folder not found: {folder}")
+        return 1
+
+    index = RecencyIndex(vault, None if args.no_index else (args.index or default_index_path(vault)))
+    index.load()
+    index.refresh(folder, trust_dir_mtime=args.trust_dir_mtime)
+    try:
+        index.save()
+    except OSError:
+        pass
 
-    rows.sort(reverse=True)
-    for mtime, p in rows[: args.n]:
+    for mtime, rel in recent(index, args.n, folder=folder, since=args.since):
         ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(mtime))
-        rel = os.path.relpath(p, vault)
         print(f"{ts}\t{rel}")
 
     return 0
@@ -2,6 +2,7 @@
 """Search the obsidian_huaigu vault.
 
 Strategy:
+- If a warm query server (`vault_search.py serve`) is running, ask it (no rg spawn, no walk).
 - Prefer ripgrep (rg) if available (fast).
 - Fallback to a pure-Python scan if rg is not installed (slower but works everywhere).
 
@@ -9,6 +10,17 @@ Examples:
   python3 vault_search.py "MiniMax" --limit 20
   python3 vault_search.py "HSBC" --glob "*.md" --context 2
   python3 vault_search.py "#todo" --fixed-strings
+  python3 vault_search.py "HSBC" --json --context 1     # one match object per line
+  python3 vault_search.py "HSBC" --files-with-matches   # or --count for per-file counts
+
+Query server (keeps file list, note contents and recent results warm):
+  python3 vault_search.py serve --vault ~/obsidian/obsidian_huaigu &
+  python3 vault_search.py "MiniMax"          # transparently uses the server
+  python3 vault_search.py "MiniMax" --no-server
+
+Text output is the same whichever backend answers (server, rg, Python scan):
+vault-relative paths, `rel:N:text` for matching lines and `rel-N-text` for
+context lines; overlapping context windows are merged.
 
 Exit codes:
   0 on success (even if no matches)
@@ -17,60 +29,255 @@ Exit codes:
 from __future__ import annotations
 
 import argparse
-import fnmatch
+import base64
+import itertools
+import json
 import os
+import re
 import shutil
+import socket
+import socketserver
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+
+from vault_walk import VaultWalker, iter_files
+
+REGEX_META = re.compile(r"[.^$*+?{}\[\]\\|()]")
 
 
 def expand(path: str) -> str:
     return os.path.abspath(os.path.expanduser(path))
 
 
+def default_socket_path() -> str:
+    env = os.environ.get("VAULT_SEARCH_SOCKET")
+    if env:
+        return expand(env)
+    # Per-user 0700 directory (created by `serve`), so the socket is never reachable by others.
+    return os.path.join(tempfile.gettempdir(), f"vault_search-{os.getuid()}", "vault_search.sock")
+
+
 def iter_md_files(vault: str, pattern: str):
-    for base, dirs, files in os.walk(vault):
-        # skip heavy/irrelevant dirs
-        dirs[:] = [d for d in dirs if d not in {".git", ".obsidian", ".claude", "node_modules"}]
-        for f in files:
-            if fnmatch.fnmatch(f, pattern):
-                yield os.path.join(base, f)
+    # Same skip/ignore rules as rg: hidden dirs and .gitignore'd files are left out.
+    return iter_files(vault, pattern)
 
 
-def python_search(query: str, vault: str, glob: str, context: int, limit: int, ignore_case: bool):
+def iter_hits(docs, query: str, ignore_case: bool):
+    """Yield `(path, lines, idx, col)` for every line containing the literal query.
+
+    `col` is the character index of the first occurrence within the line.
+    """
     q = query if not ignore_case else query.lower()
-    printed = 0
-    for path in iter_md_files(vault, glob):
-        try:
-            with open(path, "r", encoding="utf-8", errors="ignore") as fp:
-                lines = fp.readlines()
-        except Exception:
-            continue
+    for path, lines in docs:
         for i, line in enumerate(lines):
             hay = line if not ignore_case else line.lower()
-            if q in hay:
-                start = max(0, i - context)
-                end = min(len(lines), i + context + 1)
-                rel = os.path.relpath(path, vault)
-                for j in range(start, end):
-                    prefix = f"{rel}:{j+1}:"
-                    print(prefix + lines[j].rstrip("\n"))
+            col = hay.find(q)
+            if col >= 0:
+                yield path, lines, i, col
+
+
+def line_offsets(lines: list[str]) -> list[int]:
+    """Byte offset of the start of each line (utf-8)."""
+    offsets = [0]
+    for ln in lines[:-1]:
+        offsets.append(offsets[-1] + len(ln.encode("utf-8")))
+    return offsets
+
+
+def match_record(rel: str, line_no: int, column: int, offset: int, text: str, before, after) -> dict:
+    """One `--json` match object. `line`/`column` are 1-based; `column`/`offset` count bytes."""
+    return {
+        "path": rel,
+        "line": line_no,
+        "column": column,
+        "offset": offset,
+        "text": text,
+        "before": list(before),
+        "after": list(after),
+    }
+
+
+def iter_output(hits, vault: str, mode: str, as_json: bool, context: int, limit: int):
+    """Format `iter_hits` output for a mode: text | json | files | count.
+
+    For `text`, `limit` caps printed lines (context included); otherwise it caps
+    emitted match objects / files. Text lines follow rg: `rel:N:text` for matches,
+    `rel-N-text` for context, overlapping windows printed once.
+    """
+    if mode in ("files", "count"):
+        # Hits arrive grouped by file, so each file can be emitted as soon as it is done.
+        for n_files, (path, group) in enumerate(itertools.groupby(hits, key=lambda h: h[0]), 1):
+            rel = os.path.relpath(path, vault)
+            if mode == "files":
+                yield json.dumps({"path": rel}, ensure_ascii=False) if as_json else rel
+            else:
+                n = sum(1 for _ in group)
+                yield json.dumps({"path": rel, "count": n}, ensure_ascii=False) if as_json else f"{rel}:{n}"
+            if n_files >= limit:
+                return
+        return
+
+    if not as_json:
+        printed = 0
+        for path, group in itertools.groupby(hits, key=lambda h: h[0]):
+            rel = os.path.relpath(path, vault)
+            group = list(group)
+            lines = group[0][1]
+            matched = {h[2] for h in group}
+            shown = -1  # last line index printed for this file
+            for _, _, i, _ in group:
+                for j in range(max(i - context, shown + 1), min(len(lines), i + context + 1)):
+                    sep = ":" if j in matched else "-"
+                    yield f"{rel}{sep}{j + 1}{sep}" + lines[j].rstrip("\n")
+                    shown = j
                     printed += 1
                     if printed >= limit:
                         return
+        return
 
+    printed = 0
+    offsets_for: tuple[str, list[int]] | None = None
+    for path, lines, i, col in hits:
+        if offsets_for is None or offsets_for[0] != path:
+            offsets_for = (path, line_offsets(lines))
+        line = lines[i]
+        col_bytes = len(line[:col].encode("utf-8"))
+        strip = [ln.rstrip("\n") for ln in lines[max(0, i - context) : i + context + 1]]
+        n_before = i - max(0, i - context)
+        yield json.dumps(
+            match_record(
+                os.path.relpath(path, vault),
+                i + 1,
+                col_bytes + 1,
+                offsets_for[1][i] + col_bytes,
+                line.rstrip("\n"),
+                strip[:n_before],
+                strip[n_before + 1 :],
+            ),
+            ensure_ascii=False,
+        )
+        printed += 1
+        if printed >= limit:
+            return
+
+
+def iter_matches(docs, vault: str, query: str, context: int, limit: int, ignore_case: bool):
+    """Yield `rel:N:text` / `rel-N-text` output lines for a literal query over `(path, lines)` pairs."""
+    hits = iter_hits(docs, query, ignore_case)
+    return iter_output(hits, vault, "text", False, context, limit)
 
-def rg_search(rg: str, args):
+
+def read_lines(path: str) -> list[str] | None:
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as fp:
+            return fp.readlines()
+    except Exception:
+        return None
+
+
+def emit(line: str, *, flush: bool = False) -> None:
+    sys.stdout.write(line + "\n")
+    if flush:
+        sys.stdout.flush()
+
+
+def python_search(
+    query: str,
+    vault: str,
+    glob: str,
+    context: int,
+    limit: int,
+    ignore_case: bool,
+    *,
+    mode: str = "text",
+    as_json: bool = False,
+):
+    def docs():
+        for path in iter_md_files(vault, glob):
+            lines = read_lines(path)
+            if lines is not None:
+                yield path, lines
+
+    hits = iter_hits(docs(), query, ignore_case)
+    for line in iter_output(hits, vault, mode, as_json, context, limit):
+        emit(line, flush=as_json)
+
+
+def _rg_text(obj: dict) -> str:
+    """rg --json encodes text as {"text": ...} or, for invalid utf-8, {"bytes": <base64>}."""
+    if "text" in obj:
+        return obj["text"]
+    return base64.b64decode(obj.get("bytes", "")).decode("utf-8", errors="replace")
+
+
+def iter_rg_json(stream, vault: str, context: int):
+    """Decode `rg --json` events incrementally into match records.
+
+    A match is held back only until its after-context window closes (or its file
+    ends), so records stream out while rg is still running.
+    """
+    pending: list[dict] = []
+    recent: deque[tuple[int, str]] = deque(maxlen=context)
+    rel = ""
+    for raw in stream:
+        ev = json.loads(raw)
+        kind = ev.get("type")
+        data = ev.get("data") or {}
+        if kind == "begin":
+            rel = os.path.relpath(_rg_text(data["path"]), vault)
+            recent.clear()
+            continue
+        if kind == "end":
+            yield from pending
+            pending.clear()
+            continue
+        if kind not in ("match", "context"):
+            continue
+
+        ln = data["line_number"]
+        text = _rg_text(data["lines"]).rstrip("\r\n")
+        for p in pending:
+            if ln - p["line"] <= context:
+                p["after"].append(text)
+        if kind == "match":
+            subs = data.get("submatches") or []
+            start = subs[0]["start"] if subs else 0
+            before = [t for n, t in recent if ln - n <= context]
+            pending.append(match_record(rel, ln, start + 1, data["absolute_offset"] + start, text, before, []))
+        while pending and ln - pending[0]["line"] >= context:
+            yield pending.pop(0)
+        recent.append((ln, text))
+    yield from pending
+
+
+def rg_text_line(line: str, vault: str) -> str:
+    """`/abs/vault/rel:N:text` (or `-N-` for context) from rg -> `rel:N:text`, as the server prints it."""
+    prefix = vault.rstrip(os.sep) + os.sep
+    line = line.rstrip("\n")
+    return line[len(prefix) :] if line.startswith(prefix) else line
+
+
+def rg_search(rg: str, args, *, mode: str = "text", as_json: bool = False):
     cmd = [
         rg,
-        "--no-heading",
-        "--line-number",
         "--color",
         "never",
         "--glob",
         args.glob,
     ]
-    if args.context > 0:
+    if mode == "files":
+        cmd.append("--files-with-matches")
+    elif mode == "count":
+        cmd.append("--count")
+    elif as_json:
+        cmd.append("--json")
+    else:
+        cmd += ["--no-heading", "--line-number", "--no-context-separator"]
+    if args.context > 0 and mode == "text":
         cmd += ["-C", str(args.context)]
     if args.fixed_strings:
         cmd.append("-F")
@@ -83,10 +290,27 @@ def rg_search(rg: str, args):
     assert proc.stdout is not None
     assert proc.stderr is not None
 
+    def dump(obj: dict) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+    if mode == "files":
+        rels = (os.path.relpath(ln.rstrip("\n"), args.vault) for ln in proc.stdout)
+        out = (dump({"path": rel}) if as_json else rel for rel in rels)
+    elif mode == "count":
+        pairs = (ln.rstrip("\n").rsplit(":", 1) for ln in proc.stdout)
+        out = (
+            dump({"path": rel, "count": int(n)}) if as_json else f"{rel}:{n}"
+            for rel, n in ((os.path.relpath(p, args.vault), n) for p, n in pairs)
+        )
+    elif as_json:
+        out = (dump(rec) for rec in iter_rg_json(proc.stdout, args.vault, args.context))
+    else:
+        out = (rg_text_line(ln, args.vault) for ln in proc.stdout)
+
     printed = 0
     try:
-        for line in proc.stdout:
-            print(line, end="")
+        for line in out:
+            emit(line, flush=as_json)
             printed += 1
             if printed >= args.limit:
                 proc.terminate()
@@ -103,9 +327,194 @@ def rg_search(rg: str, args):
         print(stderr, file=sys.stderr)
 
 
-def main() -> int:
+# ---------------------------------------------------------------------------
+# Query server
+# ---------------------------------------------------------------------------
+
+
+class VaultIndex:
+    """Warm, in-memory view of the vault: file list, note contents and an LRU of results.
+
+    The file list is re-walked at most every `rescan` seconds through a long-lived
+    VaultWalker (unchanged directories are not re-listed); only files whose mtime
+    changed are re-read. Any change bumps `generation`, which is part of
+    the result-cache key, so a cached result never outlives a detected change;
+    edits made since the last walk show up after at most `rescan` seconds.
+    """
+
+    def __init__(self, vault: str, *, glob: str = "*.md", rescan: float = 5.0, cache_size: int = 256):
+        self.vault = vault
+        self.glob = glob
+        self.rescan = rescan
+        self.cache_size = cache_size
+        self.generation = 0
+        self.files: dict[str, tuple[float, list[str]]] = {}
+        self.walker = VaultWalker(vault, pattern=glob)
+        self.results: OrderedDict[tuple, list[str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._scanned_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, *, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._scanned_at < self.rescan:
+            return
+        seen: dict[str, tuple[float, list[str]]] = {}
+        changed = False
+        self.walker.refresh()
+        for mtime, rel in self.walker.iter_entries():
+            path = os.path.join(self.vault, rel)
+            old = self.files.get(path)
+            if old is not None and old[0] == mtime:
+                seen[path] = old
+                continue
+            lines = read_lines(path)
+            if lines is None:
+                continue
+            seen[path] = (mtime, lines)
+            changed = True
+        if changed or len(seen) != len(self.files):
+            self.files = seen
+            self.generation += 1
+            self.results.clear()
+        self._scanned_at = now
+
+    def search(self, req: dict) -> list[str]:
+        query = req["query"]
+        context = int(req.get("context", 0))
+        limit = int(req.get("limit", 50))
+        ignore_case = bool(req.get("ignore_case"))
+        mode = req.get("mode", "text")
+        as_json = bool(req.get("json"))
+        with self._lock:
+            self.refresh()
+            key = (self.generation, query, context, limit, ignore_case, mode, as_json)
+            cached = self.results.get(key)
+            if cached is not None:
+                self.results.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+            docs = ((path, entry[1]) for path, entry in sorted(self.files.items()))
+            hits = iter_hits(docs, query, ignore_case)
+            out = list(iter_output(hits, self.vault, mode, as_json, context, limit))
+            self.results[key] = out
+            if len(self.results) > self.cache_size:
+                self.results.popitem(last=False)
+            return out
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self.files),
+            "generation": self.generation,
+            "cached": len(self.results),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        index: VaultIndex = self.server.index  # type: ignore[attr-defined]
+        raw = self.rfile.readline()
+        try:
+            req = json.loads(raw)
+            if req.get("op") == "stats":
+                resp = {"ok": True, "stats": index.stats()}
+            elif expand(req.get("vault", "")) != index.vault:
+                resp = {"ok": False, "error": "vault_mismatch"}
+            elif req.get("glob", index.glob) != index.glob:
+                resp = {"ok": False, "error": "glob_mismatch"}
+            else:
+                resp = {"ok": True, "lines": index.search(req)}
+        except Exception as e:
+            resp = {"ok": False, "error": str(e)}
+        self.wfile.write(json.dumps(resp, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class VaultSearchServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, sock_path: str, index: VaultIndex):
+        self.index = index
+        super().__init__(sock_path, _Handler)
+
+    def server_bind(self) -> None:
+        # Create the socket owner-only right away instead of chmod-ing it after bind.
+        old = os.umask(0o077)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(old)
+
+
+def server_request(sock_path: str, req: dict, *, timeout: float = 10.0) -> dict | None:
+    """Send one request to a running server; return None if no server is reachable."""
+    if not os.path.exists(sock_path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout)
+            s.connect(sock_path)
+            s.sendall(json.dumps(req, ensure_ascii=False).encode("utf-8") + b"\n")
+            with s.makefile("rb") as f:
+                raw = f.readline()
+    except OSError:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+def serve_main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(prog="vault_search.py serve")
+    ap.add_argument("--vault", default="~/obsidian/obsidian_huaigu")
+    ap.add_argument("--glob", default="*.md", help="files to keep warm (default: *.md)")
+    ap.add_argument("--socket", default=default_socket_path(), help="unix socket path")
+    ap.add_argument("--rescan", type=float, default=5.0, help="seconds between vault re-walks")
+    ap.add_argument("--cache-size", type=int, default=256, help="LRU size for query results")
+    args = ap.parse_args(argv)
+
+    vault = expand(args.vault)
+    if not os.path.isdir(vault):
+        print(f"ERROR: vault not found: {vault}", file=sys.stderr)
+        return 1
+
+    sock_path = expand(args.socket)
+    if os.path.exists(sock_path):
+        if server_request(sock_path, {"op": "stats"}, timeout=1.0) is not None:
+            print(f"ERROR: server already running on {sock_path}", file=sys.stderr)
+            return 1
+        os.unlink(sock_path)
+
+    os.makedirs(os.path.dirname(sock_path), mode=0o700, exist_ok=True)
+    index = VaultIndex(vault, glob=args.glob, rescan=args.rescan, cache_size=args.cache_size)
+    index.refresh(force=True)
+
+    server = VaultSearchServer(sock_path, index)
+    print(f"[vault_search] serving {vault} ({len(index.files)} files) on {sock_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(sock_path)
+        except FileNotFoundError:
+            pass
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "serve":
+        return serve_main(argv[1:])
+
     ap = argparse.ArgumentParser()
-    ap.add_argument("query", help="search query")
+    ap.add_argument("query", help="search query (or `serve` to start the query server)")
     ap.add_argument(
         "--vault",
         default="~/obsidian/obsidian_huaigu",
@@ -113,7 +522,12 @@ def main() -> int:
     )
     ap.add_argument("--glob", default="*.md", help="file glob (default: *.md)")
     ap.add_argument("--context", type=int, default=0, help="lines of context")
-    ap.add_argument("--limit", type=int, default=50, help="max lines to print")
+    ap.add_argument(
+        "--limit",
+        type=int,
+        default=50,
+        help="max lines to print (with --json/-l/-c: max match objects/files)",
+    )
     ap.add_argument(
         "--fixed-strings",
         action="store_true",
@@ -124,22 +538,71 @@ def main() -> int:
         action="store_true",
         help="case-insensitive",
     )
-    args = ap.parse_args()
+    ap.add_argument(
+        "--json",
+        action="store_true",
+        help="stream one JSON object per line (path, line, column, offset, text, before, after)",
+    )
+    only = ap.add_mutually_exclusive_group()
+    only.add_argument(
+        "-l",
+        "--files-with-matches",
+        action="store_true",
+        help="print only paths of matching files",
+    )
+    only.add_argument("-c", "--count", action="store_true", help="print per-file matching line counts")
+    ap.add_argument("--socket", default=default_socket_path(), help="query server socket path")
+    ap.add_argument("--no-server", action="store_true", help="never use the query server")
+    args = ap.parse_args(argv)
 
     vault = expand(args.vault)
     if not os.path.isdir(vault):
         print(f"ERROR: vault not found: {vault}", file=sys.stderr)
         return 1
 
+    mode = "files" if args.files_with_matches else "count" if args.count else "text"
+
+    if not args.no_server:
+        # The server does literal matching; regex queries only go there when they
+        # contain no metacharacters (otherwise rg semantics would differ).
+        literal = args.fixed_strings or not REGEX_META.search(args.query)
+        if literal:
+            resp = server_request(
+                expand(args.socket),
+                {
+                    "vault": vault,
+                    "query": args.query,
+                    "glob": args.glob,
+                    "context": args.context,
+                    "limit": args.limit,
+                    "ignore_case": args.ignore_case,
+                    "mode": mode,
+                    "json": args.json,
+                },
+            )
+            if resp and resp.get("ok"):
+                for line in resp["lines"]:
+                    emit(line)
+                return 0
+
     rg = shutil.which("rg")
     if rg:
         # Use rg for speed.
         args.vault = vault
-        rg_search(rg, args)
+        rg_search(rg, args, mode=mode, as_json=args.json)
         return 0
 
     # Python fallback.
-    python_search(args.query, vault, args.glob, args.context, args.limit, args.ignore_case)
+    python_search(
+        args.query,
+        vault,
+        args.glob,
+        args.context,
+        args.limit,
+        args.ignore_case,
+        mode=mode,
+        as_json=args.json,
+    )
     return 0
 
 
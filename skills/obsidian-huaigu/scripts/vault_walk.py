@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""Shared vault file walker: os.scandir, ignore rules and cached directory listings.
+
+One walker for every script that enumerates vault files (vault_search, vault_recent,
+obsidian-link-builder's analyze_vault, zlt-trade-sync), so they agree on what is
+part of the vault:
+
+- hidden entries (`.git`, `.obsidian`, `.trash`, dotfiles) and SKIP_DIRS are never walked;
+- `.gitignore` files (root and nested; `*`, `**`, `?`, `[..]`, `!negation`, `dir/`,
+  `/anchored`) and Obsidian's "Excluded files" (`userIgnoreFilters` in
+  `.obsidian/app.json`) are honoured unless `ignore=False`.
+
+The other skills import it as a plain `from vault_walk import ...` through a
+`scripts/vault_walk.py` symlink to this file; when a skill is installed without
+obsidian-huaigu the symlink dangles, the import fails and they fall back to glob.
+
+Listings are cached per directory, keyed by the directory's st_mtime_ns: a
+directory whose mtime is unchanged is not listed again. File mtimes in such
+directories are still re-stat'ed (in-place edits do not touch the directory
+mtime) unless `trust_dir_mtime=True`. The cache lives in memory and, with a
+`path`, in a JSON file.
+
+Example:
+  walker = VaultWalker(vault, cache_path, pattern="*.md")
+  walker.load(); walker.refresh(); walker.save()
+  for mtime, rel in walker.iter_entries(): ...
+
+CLI (list files, mostly for debugging ignore rules):
+  python3 vault_walk.py --vault ~/obsidian/obsidian_huaigu --pattern "*.md"
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import os
+import re
+
+SKIP_DIRS = {".git", ".obsidian", ".claude", "node_modules"}
+WALK_VERSION = 2
+
+
+def expand(path: str) -> str:
+    return os.path.abspath(os.path.expanduser(path))
+
+
+def _under(rel: str, root: str) -> bool:
+    return not root or rel == root or rel.startswith(root + os.sep)
+
+
+def _glob_regex(pattern: str) -> str:
+    """Translate a gitignore glob (without anchoring) into a regex over '/'-paths."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = pattern.find("]", i + 1)
+            if j < 0:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1 : j]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = j
+        elif c == "\\" and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class IgnoreRules:
+    """gitignore-style rules (scoped to the directory of their .gitignore) plus
+    Obsidian excluded-file filters. Paths are vault-relative, os.sep-separated."""
+
+    def __init__(self):
+        # (base dir, compiled regex, negated, dir_only)
+        self.rules: list[tuple[str, re.Pattern, bool, bool]] = []
+        self.prefixes: list[str] = []
+        self.regexes: list[re.Pattern] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.rules or self.prefixes or self.regexes)
+
+    def add_gitignore(self, base: str, text: str) -> None:
+        base = base.replace(os.sep, "/")
+        for raw in text.splitlines():
+            line = raw.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.strip("/") if dir_only else line
+            if not line:
+                continue
+            if "/" in line:
+                rx = "^" + _glob_regex(line.lstrip("/")) + "$"
+            else:
+                rx = "^(?:.*/)?" + _glob_regex(line) + "$"
+            self.rules.append((base, re.compile(rx), negate, dir_only))
+
+    def add_obsidian_filters(self, filters: list[str]) -> None:
+        for f in filters:
+            if len(f) > 2 and f.startswith("/") and f.endswith("/"):
+                try:
+                    self.regexes.append(re.compile(f[1:-1]))
+                except re.error:
+                    continue
+            elif f:
+                self.prefixes.append(f.lstrip("/"))
+
+    def ignored(self, rel: str, is_dir: bool) -> bool:
+        path = rel.replace(os.sep, "/")
+        if any(path.startswith(p) for p in self.prefixes) or any(r.search(path) for r in self.regexes):
+            return True
+        result = False
+        for base, rx, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not path.startswith(base + "/"):
+                    continue
+                sub = path[len(base) + 1 :]
+            else:
+                sub = path
+            if rx.match(sub):
+                result = not negate
+        return result
+
+
+def load_obsidian_filters(root: str) -> list[str]:
+    try:
+        with open(os.path.join(root, ".obsidian", "app.json"), "r", encoding="utf-8") as f:
+            filters = json.load(f).get("userIgnoreFilters") or []
+    except (OSError, ValueError, AttributeError):
+        return []
+    return [f for f in filters if isinstance(f, str)]
+
+
+class VaultWalker:
+    """Directory-level cache of the files under `root` matching `pattern`.
+
+    `dirs` maps a root-relative directory to
+    `{"mtime": <dir st_mtime_ns>, "dirs": [subdir names], "files": {name: mtime}, "gitignore": bool}`.
+    Only non-ignored directories are kept; ignored files are filtered when iterating.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        path: str | None = None,
+        *,
+        pattern: str | None = None,
+        ignore: bool = True,
+        recursive: bool = True,
+        stat: bool = True,
+    ):
+        self.root = root
+        self.path = path
+        self.pattern = pattern
+        self.ignore = ignore
+        self.recursive = recursive
+        # Without `stat`, file mtimes are not collected (reported as 0.0): a plain listing.
+        self.stat = stat
+        # Case-insensitive like the old `.lower().endswith(".md")` checks.
+        self._match = re.compile(fnmatch.translate(pattern), re.I).match if pattern else None
+        self.dirs: dict[str, dict] = {}
+        self.rules: IgnoreRules | None = None
+        self.listed = 0
+        self.reused = 0
+        self.dirty = False
+
+    def _stamp(self) -> dict:
+        return {"version": WALK_VERSION, "root": self.root, "pattern": self.pattern, "ignore": self.ignore, "stat": self.stat}
+
+    def load(self) -> None:
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if all(data.get(k) == v for k, v in self._stamp().items()):
+            self.dirs = data.get("dirs") or {}
+            self._load_extra(data)
+
+    def _extra(self) -> dict:
+        """Top-level keys a subclass stores next to `dirs` in the cache file."""
+        return {}
+
+    def _load_extra(self, data: dict) -> None:
+        pass
+
+    def save(self) -> None:
+        if not self.path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({**self._stamp(), **self._extra(), "dirs": self.dirs}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    # -- ignore rules -----------------------------------------------------------
+
+    def _new_rules(self) -> IgnoreRules:
+        rules = IgnoreRules()
+        if self.ignore:
+            rules.add_obsidian_filters(load_obsidian_filters(self.root))
+        return rules
+
+    def _add_gitignore(self, rules: IgnoreRules, rel: str) -> None:
+        try:
+            with open(os.path.join(self.root, rel, ".gitignore"), "r", encoding="utf-8", errors="ignore") as f:
+                rules.add_gitignore(rel, f.read())
+        except OSError:
+            pass
+
+    def _add_parent_gitignores(self, rules: IgnoreRules, root: str) -> None:
+        """Rules from .gitignore files above `root` still apply inside it."""
+        parts = root.split(os.sep)
+        for i in range(len(parts)):
+            rel = os.sep.join(parts[:i])
+            if os.path.isfile(os.path.join(self.root, rel, ".gitignore")):
+                self._add_gitignore(rules, rel)
+
+    def _ensure_rules(self, root: str = "") -> IgnoreRules:
+        if self.rules is not None:
+            return self.rules
+        rules = self._new_rules()
+        if self.ignore:
+            if root:
+                self._add_parent_gitignores(rules, root)
+            for rel, entry in self.dirs.items():
+                if _under(rel, root) and entry.get("gitignore"):
+                    self._add_gitignore(rules, rel)
+        if not root:
+            self.rules = rules
+        return rules
+
+    # -- walking ----------------------------------------------------------------
+
+    def _list(self, rel: str, abs_dir: str, mtime_ns: int) -> dict | None:
+        subdirs: list[str] = []
+        files: dict[str, float] = {}
+        has_gitignore = False
+        try:
+            with os.scandir(abs_dir) as it:
+                for de in it:
+                    name = de.name
+                    if name == ".gitignore":
+                        has_gitignore = True
+                    if name.startswith(".") or name in SKIP_DIRS:
+                        continue
+                    try:
+                        if de.is_dir(follow_symlinks=False):
+                            subdirs.append(name)
+                        elif (self._match is None or self._match(name)) and de.is_file():
+                            files[name] = de.stat().st_mtime if self.stat else 0.0
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        subdirs.sort()
+        return {"mtime": mtime_ns, "dirs": subdirs, "files": dict(sorted(files.items())), "gitignore": has_gitignore}
+
+    def refresh(self, root: str = "", *, trust_dir_mtime: bool = False) -> None:
+        """Bring the subtree `root` (relative, "" = everything) up to date."""
+        rules = self._new_rules()
+        if self.ignore and root:
+            self._add_parent_gitignores(rules, root)
+
+        seen: set[str] = set()
+        stack = [root]
+        while stack:
+            rel = stack.pop()
+            abs_dir = os.path.join(self.root, rel)
+            try:
+                st = os.stat(abs_dir)
+            except OSError:
+                continue
+            seen.add(rel)
+            entry = self.dirs.get(rel)
+            if entry is not None and entry["mtime"] == st.st_mtime_ns:
+                # Same entries as last time: no need to list the directory again.
+                self.reused += 1
+                if self.stat and not trust_dir_mtime:
+                    files = entry["files"]
+                    for name, old in list(files.items()):
+                        try:
+                            mtime = os.stat(os.path.join(abs_dir, name)).st_mtime
+                        except OSError:
+                            del files[name]
+                            self.dirty = True
+                            continue
+                        if mtime != old:
+                            files[name] = mtime
+                            self.dirty = True
+            else:
+                self.listed += 1
+                entry = self._list(rel, abs_dir, st.st_mtime_ns)
+                if entry is None:
+                    continue
+                self.dirs[rel] = entry
+                self.dirty = True
+
+            if self.ignore and entry.get("gitignore"):
+                self._add_gitignore(rules, rel)
+            if self.recursive:
+                for d in reversed(entry["dirs"]):
+                    sub = os.path.join(rel, d)
+                    if not (rules and rules.ignored(sub, True)):
+                        stack.append(sub)
+
+        for rel in [r for r in self.dirs if _under(r, root) and r not in seen]:
+            del self.dirs[rel]
+            self.dirty = True
+        self.rules = rules if not root else None
+
+    def iter_entries(self, root: str = ""):
+        """Yield `(mtime, relative path)` for every non-ignored file under `root`."""
+        rules = self._ensure_rules(root)
+        for rel, entry in self.dirs.items():
+            if not _under(rel, root):
+                continue
+            prefix = rel + os.sep if rel else ""
+            for name, mtime in entry["files"].items():
+                path = prefix + name
+                if rules and rules.ignored(path, False):
+                    continue
+                yield mtime, path
+
+
+def iter_files(root: str, pattern: str | None = None, *, ignore: bool = True, recursive: bool = True):
+    """Uncached one-shot walk: yield absolute paths of matching files under `root`."""
+    walker = VaultWalker(root, pattern=pattern, ignore=ignore, recursive=recursive, stat=False)
+    walker.refresh()
+    prefix = os.path.join(root, "")
+    for _, rel in walker.iter_entries():
+        yield prefix + rel
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vault", default="~/obsidian/obsidian_huaigu")
+    ap.add_argument("--pattern", default=None, help="filename glob, e.g. *.md (default: all files)")
+    ap.add_argument("--no-ignore", action="store_true", help="do not apply .gitignore / Obsidian excluded files")
+    args = ap.parse_args()
+
+    root = expand(args.vault)
+    walker = VaultWalker(root, pattern=args.pattern, ignore=not args.no_ignore)
+    walker.refresh()
+    for _, rel in sorted(walker.iter_entries(), key=lambda e: e[1]):
+        print(rel)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -11,6 +11,11 @@ from collections import defaultdict, Counter
 from typing import Dict, List, Set, Tuple
 import argparse
 
+try:
+    from vault_walk import iter_files  # symlink to obsidian-huaigu/scripts/vault_walk.py
+except ImportError:
+    iter_files = None
+
 
 class VaultAnalyzer:
     def __init__(self, vault_path: str):
@@ -22,12 +27,13 @@ class VaultAnalyzer:
 
     def analyze(self) -> Dict:
         """Analyze all markdown files in the vault."""
-        md_files = list(self.vault_path.rglob("*.md"))
+        if iter_files is not None:
+            # Skips hidden dirs/files and honours .gitignore / Obsidian excluded files.
+            md_files = sorted(Path(p) for p in iter_files(str(self.vault_path), "*.md"))
+        else:
+            md_files = [p for p in self.vault_path.rglob("*.md") if not self._should_skip(p)]
 
         for md_file in md_files:
-            if self._should_skip(md_file):
-                continue
-
             rel_path = str(md_file.relative_to(self.vault_path))
             file_data = self._analyze_file(md_file)
             self.files_data[rel_path] = file_data
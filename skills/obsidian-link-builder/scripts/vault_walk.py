@@ -0,0 +1 @@
+../../obsidian-huaigu/scripts/vault_walk.py
\ No newline at end of file
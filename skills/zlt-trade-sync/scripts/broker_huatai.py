@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Huatai (涨乐通) "订单执行情况通知" execution emails."""
+
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+from brokers import BrokerParser, register
+from html_table import extract_tables, table_records
+
+# Columns of the Huatai execution table, in their usual order.
+EXPECTED_COLUMNS = ["股份代码", "订单编号", "币种", "买卖方向", "委托数量", "委托价格", "最新成交数量", "最新成交价格"]
+
+
+def direction_map(raw: str) -> str:
+    raw = (raw or "").strip().lower()
+    if raw == "bid":
+        return "买入"
+    if raw == "ask":
+        return "卖出"
+    return raw
+
+
+def extract_table_rows(html: str) -> List[Dict[str, str]]:
+    """Execution rows as `{column name: value}`, located by the table's header row."""
+    rows = table_records(html, EXPECTED_COLUMNS)
+    if rows:
+        return rows
+    # No recognisable header row: fall back to the documented column order.
+    return [
+        dict(zip(EXPECTED_COLUMNS, r))
+        for table in extract_tables(html)
+        for r in table
+        if len(r) >= len(EXPECTED_COLUMNS) and any(r)
+    ]
+
+
+@register
+class Huatai(BrokerParser):
+    name = "huatai"
+    sender = "qqt_ufg_client@htsc.com"
+    subject = "订单执行情况通知"
+    version = 3
+
+    def extract_rows(self, html: str) -> List[Dict[str, str]]:
+        return extract_table_rows(html)
+
+    def row_trade(self, row: Dict[str, str]) -> Tuple[Dict[str, str] | None, str | None]:
+        # Looked up by header name, so blank cells (e.g. 订单编号) cannot shift the columns.
+        symbol = row.get("股份代码", "")
+        side = direction_map(row.get("买卖方向", ""))
+        qty = row.get("最新成交数量", "")
+        price = row.get("最新成交价格", "")
+        if not symbol or not side:
+            return None, "short_row"
+        # Not filled (最新成交数量/价格 <= 0): review, don't write.
+        try:
+            if float(str(qty).strip() or "0") <= 0:
+                return None, "qty_le_0"
+            if float(str(price).strip() or "0") <= 0:
+                return None, "price_le_0"
+        except ValueError:
+            pass  # keep; but still write (rare)
+        return {"交易标的": symbol, "代码": symbol, "方向": side, "点位": str(price), "仓位": str(qty)}, None
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Broker parser registry for trade-email ingestion.
+
+Each broker / email template is a `BrokerParser` subclass in a `broker_*.py`
+module next to this file, registered with `@register`:
+
+    @register
+    class MyBroker(BrokerParser):
+        name = "mybroker"
+        sender = "notify@mybroker.com"
+        subject = "成交回报"
+        version = 1                      # bump when extract_rows/row_trade change
+
+        def extract_rows(self, html): ...   # -> [{column: value}, ...]
+        def row_trade(self, row): ...       # -> (fields, None) or (None, review reason)
+
+`summarize()` runs the registry over a fetched message in one pass (headers
+read once, the first matching parser extracts the rows); the result is what
+the shared message cache stores. The sync takes care of dates, week files,
+dedup and git for every broker alike.
+"""
+
+from __future__ import annotations
+
+import importlib
+import pkgutil
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+from message_store import body_sha
+
+TRADE_FIELDS = ("交易标的", "代码", "方向", "点位", "仓位")
+
+
+class BrokerParser:
+    name = ""
+    sender = ""
+    subject = ""
+    version = 1
+
+    def query(self) -> str:
+        return f"from:{self.sender}"
+
+    def matches(self, headers: Dict[str, str]) -> bool:
+        sender = headers.get("from", "")
+        return headers.get("subject", "") == self.subject and (not sender or self.sender in sender)
+
+    def extract_rows(self, html: str) -> List[Dict[str, str]]:
+        raise NotImplementedError
+
+    def row_trade(self, row: Dict[str, str]) -> Tuple[Dict[str, str] | None, str | None]:
+        """`(fields, None)` with TRADE_FIELDS for a fill, or `(None, reason)` to send the row to review."""
+        raise NotImplementedError
+
+
+REGISTRY: Dict[str, BrokerParser] = {}
+
+
+def register(cls):
+    REGISTRY[cls.name] = cls()
+    return cls
+
+
+def load_plugins() -> Dict[str, BrokerParser]:
+    """Import every `broker_*.py` next to this module (each registers itself)."""
+    for mod in pkgutil.iter_modules([str(Path(__file__).resolve().parent)]):
+        if mod.name.startswith("broker_"):
+            importlib.import_module(mod.name)
+    return REGISTRY
+
+
+def registry_version(parsers: Sequence[BrokerParser]) -> str:
+    """Cache version for records produced by `parsers` (changes when any parser is bumped)."""
+    return ",".join(f"{p.name}:{p.version}" for p in sorted(parsers, key=lambda p: p.name))
+
+
+def summarize(parsers: Sequence[BrokerParser], msg_json: Dict[str, Any]) -> Dict[str, Any]:
+    """What the message cache keeps of a fetched message: headers, body hash, broker, rows."""
+    raw_headers = msg_json.get("headers", {})
+    headers = {k: raw_headers.get(k, "") for k in ("date", "subject", "from")}
+    html = msg_json.get("body", "")
+    record: Dict[str, Any] = {"headers": headers, "body_sha": body_sha(html), "broker": None, "rows": []}
+    for parser in parsers:
+        if parser.matches(headers):
+            record["broker"] = parser.name
+            record["rows"] = parser.extract_rows(html)
+            break
+    return record
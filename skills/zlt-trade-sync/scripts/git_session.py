@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Git session for one zlt-trade-sync run against the vault repo.
+
+- `pull()`   : `git pull --rebase` (a conflict stops the run; resolve by hand).
+- `commit()` : stages only the given files and commits them with a pathspec
+  commit, so unrelated staged work stays out; an empty diff is not an error,
+  it just skips the commit.
+- `push()`   : retries a rejected push (another writer pushed first) by
+  rebasing onto the remote and pushing again, with exponential backoff.
+  Any other failure (no remote, auth, network) is raised at once.
+  Also pushes commits left behind by an earlier run whose push failed.
+
+Every git call is timed; `timings` holds seconds per step for the run summary.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+# `git push` stderr when the remote has commits we do not (worth a rebase + retry).
+REJECTED_MARKERS = ("[rejected]", "fetch first", "non-fast-forward")
+
+
+class GitError(RuntimeError):
+    pass
+
+
+class GitSession:
+    def __init__(
+        self,
+        repo: Path,
+        *,
+        retries: int = 3,
+        backoff: float = 1.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.repo = Path(repo)
+        self.retries = retries
+        self.backoff = backoff
+        self.sleep = sleep
+        self.timings: Dict[str, float] = {}
+        self.push_attempts = 0
+
+    def _git(self, step: str, *args: str, check: bool = True) -> subprocess.CompletedProcess:
+        t0 = time.perf_counter()
+        p = subprocess.run(["git", *args], cwd=str(self.repo), text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.timings[step] = round(self.timings.get(step, 0.0) + time.perf_counter() - t0, 4)
+        if check and p.returncode != 0:
+            raise GitError(f"git {' '.join(args)} failed:\n{(p.stderr or p.stdout).strip()}")
+        return p
+
+    def pull(self) -> None:
+        self._git("pull", "pull", "--rebase")
+
+    def commit(self, paths: Iterable[Path], message: str) -> str | None:
+        """Commit exactly `paths` (if they changed); returns the new HEAD sha or None."""
+        rels: List[str] = sorted({str(Path(p).resolve().relative_to(self.repo.resolve())) for p in paths})
+        if not rels:
+            return None
+        self._git("add", "add", "--", *rels)
+        if self._git("diff", "diff", "--cached", "--quiet", "--", *rels, check=False).returncode == 0:
+            return None
+        self._git("commit", "commit", "-m", message, "--", *rels)
+        return self._git("commit", "rev-parse", "HEAD").stdout.strip()
+
+    def ahead(self) -> int:
+        """Local commits not on the upstream branch (0 without an upstream)."""
+        p = self._git("status", "rev-list", "--count", "@{u}..HEAD", check=False)
+        return int(p.stdout.strip() or 0) if p.returncode == 0 else 0
+
+    def push(self) -> None:
+        for attempt in range(self.retries + 1):
+            self.push_attempts += 1
+            p = self._git("push", "push", check=False)
+            if p.returncode == 0:
+                return
+            if not any(m in p.stderr for m in REJECTED_MARKERS):
+                raise GitError(f"git push failed:\n{(p.stderr or p.stdout).strip()}")
+            if attempt == self.retries:
+                break
+            self.sleep(self.backoff * 2**attempt)
+            rebase = self._git("pull", "pull", "--rebase", check=False)
+            if rebase.returncode != 0:
+                self._git("pull", "rebase", "--abort", check=False)
+                raise GitError(f"git pull --rebase failed while retrying push:\n{(rebase.stderr or rebase.stdout).strip()}")
+        raise GitError(f"git push failed after {self.push_attempts} attempts:\n{(p.stderr or p.stdout).strip()}")
+
+    def summary(self) -> str:
+        return " ".join(f"{k}={v:.2f}s" for k, v in self.timings.items())
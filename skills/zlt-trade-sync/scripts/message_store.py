@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Bounded message cache for zlt-trade-sync.
+
+Replaces the old one-raw-JSON-file-per-message cache. For each Gmail message
+the store keeps only what a sync needs:
+
+- the parsed record (Date/Subject headers and the extracted table rows),
+  tagged with the parser version that produced it (`brokers.registry_version`,
+  e.g. "huatai:1");
+- a sha256 of the HTML body;
+- optionally the raw message, gzip-compressed under `raw/<id>.json.gz`, so a
+  parser change can re-parse without refetching.
+
+All records live in one index file (`index.json`), loaded once per run, so
+membership checks are dict lookups rather than a stat per message id. The
+index is merged with the on-disk copy and replaced atomically on save;
+entries older than `max_age` are dropped, then the oldest entries until the
+store (index + raw files) is under `max_bytes`.
+
+Legacy `<id>.json` files from the old cache are imported on first use.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from fileutil import atomic_write_text
+
+STORE_VERSION = 1
+DEFAULT_MAX_AGE = 180 * 24 * 3600
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def body_sha(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class MessageStore:
+    def __init__(
+        self,
+        cache_dir: Path,
+        *,
+        parser_version: str,
+        keep_raw: bool = True,
+        max_age: float = DEFAULT_MAX_AGE,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.dir = Path(cache_dir)
+        self.parser_version = parser_version
+        self.keep_raw = keep_raw
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.index_path = self.dir / "index.json"
+        self.raw_dir = self.dir / "raw"
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.removed: set[str] = set()
+        self.evicted = 0
+        self.dirty = False
+        self._lock = threading.Lock()
+        self.raw_dir.mkdir(parents=True, exist_ok=True)
+        self.entries = self._read_index()
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != STORE_VERSION:
+            return {}
+        return data.get("entries") or {}
+
+    # -- read -----------------------------------------------------------------
+
+    def get(self, mid: str) -> Dict[str, Any] | None:
+        """The parsed record for `mid` if cached by the current parser."""
+        entry = self.entries.get(mid)
+        if entry is None or entry.get("v") != self.parser_version:
+            return None
+        return entry["record"]
+
+    def _raw_path(self, mid: str) -> Path:
+        return self.raw_dir / f"{mid}.json.gz"
+
+    def get_raw(self, mid: str) -> str | None:
+        """The raw message JSON, from the compressed copy or a legacy `<id>.json` file."""
+        paths = [self._raw_path(mid)] if mid in self.entries and self.entries[mid].get("raw") else []
+        paths.append(self.dir / f"{mid}.json")
+        for path in paths:
+            try:
+                opener = gzip.open if path.suffix == ".gz" else open
+                with opener(path, "rt", encoding="utf-8") as f:
+                    return f.read()
+            except (OSError, EOFError):
+                continue
+        return None
+
+    # -- write ----------------------------------------------------------------
+
+    def put(self, mid: str, record: Dict[str, Any], raw: str | None = None) -> None:
+        """Store a parsed record (thread-safe); `raw` is compressed when keep_raw is on."""
+        raw_size = 0
+        if raw is not None and self.keep_raw:
+            path = self._raw_path(mid)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                    f.write(raw)
+                os.replace(tmp, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+            raw_size = path.stat().st_size
+        elif mid in self.entries:
+            raw_size = self.entries[mid].get("raw", 0)
+        entry = {
+            "t": int(time.time()),
+            "v": self.parser_version,
+            "record": record,
+            "raw": raw_size,
+            "n": len(json.dumps(record, ensure_ascii=False)),
+        }
+        with self._lock:
+            self.entries[mid] = entry
+            self.removed.discard(mid)
+            self.dirty = True
+        legacy = self.dir / f"{mid}.json"
+        try:
+            legacy.unlink()
+        except OSError:
+            pass
+
+    def _drop(self, mid: str) -> None:
+        entry = self.entries.pop(mid, None)
+        self.removed.add(mid)
+        if entry and entry.get("raw"):
+            try:
+                self._raw_path(mid).unlink()
+            except OSError:
+                pass
+        self.evicted += 1
+        self.dirty = True
+
+    def evict(self, now: float | None = None) -> int:
+        """Drop entries older than max_age, then the oldest until under max_bytes."""
+        before = self.evicted
+        now = time.time() if now is None else now
+        for mid in [m for m, e in self.entries.items() if now - e.get("t", 0) > self.max_age]:
+            self._drop(mid)
+        total = sum(e.get("n", 0) + e.get("raw", 0) for e in self.entries.values())
+        for mid, entry in sorted(self.entries.items(), key=lambda kv: kv[1].get("t", 0)):
+            if total <= self.max_bytes:
+                break
+            total -= entry.get("n", 0) + entry.get("raw", 0)
+            self._drop(mid)
+        return self.evicted - before
+
+    def save(self) -> None:
+        self.evict()
+        if not self.dirty:
+            return
+        # Merge entries another run stored meanwhile (last writer would otherwise win).
+        on_disk = self._read_index()
+        merged = {m: e for m, e in on_disk.items() if m not in self.removed}
+        merged.update(self.entries)
+        self.entries = merged
+        self.evict()
+        atomic_write_text(
+            self.index_path,
+            json.dumps({"version": STORE_VERSION, "entries": self.entries}, ensure_ascii=False, separators=(",", ":")),
+        )
+        self.dirty = False
+
+    def size(self) -> int:
+        return sum(e.get("n", 0) + e.get("raw", 0) for e in self.entries.values())
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""Offline replay for zlt-trade-sync: fixture mailbox, fake vault, synthetic emails, benchmark.
+
+- `ReplayMail(dir)` stands in for `gog`: `search()` answers
+  `from:<sender> after:<date|epoch> before:<date>` from the `<id>.json`
+  message files in `dir` (same JSON as `gog gmail get --json`), newest first;
+  `get()` returns a file's text. `sync_zlt_trades.py --replay DIR` uses it.
+- `make_fake_vault(root)` creates a vault git repo with a local bare remote,
+  so pull/commit/push run for real without network.
+- `generate(dir, n)` writes `n` deterministic Huatai execution notices:
+  1-3 rows each, blank 订单编号 cells, ~10% non-fills and ~5% fills repeated
+  in a later email (dedup must drop them).
+
+Usage:
+  python3 replay.py generate --out /tmp/zlt-fixtures -n 5000
+  python3 replay.py bench -n 2000            # cold sync, re-sync (--full), summary
+  python3 replay.py bench-dates -n 10000     # Date: header -> week file only
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from pathlib import Path
+from typing import Any, Dict, List
+from zoneinfo import ZoneInfo
+
+from broker_huatai import EXPECTED_COLUMNS, Huatai
+
+TZ = ZoneInfo("Asia/Shanghai")
+_TERM = re.compile(r"(\w+):(\S+)")
+
+
+def _bound(value: str, tz: ZoneInfo = TZ) -> float:
+    """Gmail `after:`/`before:` value (epoch seconds or YYYY/MM/DD in `tz`) -> epoch."""
+    if value.isdigit():
+        return float(value)
+    y, m, d = (int(x) for x in value.split("/"))
+    return datetime(y, m, d, tzinfo=tz).timestamp()
+
+
+class ReplayMail:
+    def __init__(self, fixture_dir: Path, *, tz: ZoneInfo = TZ):
+        self.dir = Path(fixture_dir)
+        self.tz = tz
+        self._index: List[Dict[str, Any]] | None = None
+
+    def _load_index(self) -> List[Dict[str, Any]]:
+        if self._index is None:
+            from sync_zlt_trades import parse_email_datetime
+
+            index = []
+            for path in sorted(self.dir.glob("*.json")):
+                msg = json.loads(path.read_text(encoding="utf-8"))
+                headers = msg.get("headers", {})
+                try:
+                    ts = parse_email_datetime(headers.get("date", "")).timestamp()
+                except ValueError:
+                    ts = 0.0
+                index.append(
+                    {"id": path.stem, "subject": headers.get("subject", ""), "from": headers.get("from", ""), "date": headers.get("date", ""), "_ts": ts}
+                )
+            index.sort(key=lambda m: (-m["_ts"], m["id"]))
+            self._index = index
+        return self._index
+
+    def search(self, query: str, max_results: int) -> Dict[str, Any]:
+        terms = dict(_TERM.findall(query))
+        after = _bound(terms["after"], self.tz) if "after" in terms else float("-inf")
+        before = _bound(terms["before"], self.tz) if "before" in terms else float("inf")
+        sender = terms.get("from", "")
+        hits = [
+            {k: v for k, v in m.items() if not k.startswith("_")}
+            for m in self._load_index()
+            if sender in m["from"] and after <= m["_ts"] < before
+        ]
+        return {"messages": hits[:max_results]}
+
+    def get(self, mid: str) -> str:
+        return (self.dir / f"{mid}.json").read_text(encoding="utf-8")
+
+
+def make_fake_vault(root: Path) -> Path:
+    """`root/vault` (git clone of `root/remote.git`) with an initial commit; returns the vault path."""
+    root.mkdir(parents=True, exist_ok=True)
+
+    def git(cwd: Path, *args: str) -> None:
+        subprocess.run(["git", *args], cwd=str(cwd), check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    git(root, "init", "-q", "--bare", "-b", "main", "remote.git")
+    git(root, "clone", "-q", "remote.git", "vault")
+    vault = root / "vault"
+    git(vault, "config", "user.name", "replay")
+    git(vault, "config", "user.email", "replay@example.com")
+    (vault / "01-Projects").mkdir()
+    (vault / "01-Projects" / "README.md").write_text("# Projects\n", encoding="utf-8")
+    git(vault, "add", "-A")
+    git(vault, "commit", "-q", "-m", "init")
+    git(vault, "push", "-q", "-u", "origin", "main")
+    return vault
+
+
+def _message(when: datetime, rows: List[List[str]]) -> Dict[str, Any]:
+    header = "".join(f"<th>{c}</th>" for c in EXPECTED_COLUMNS)
+    body = "".join("<tr>" + "".join(f"<td>{c}</td>" for c in r) + "</tr>" for r in rows)
+    html = (
+        "<html><head><style>td{padding:4px}</style></head><body><p>尊敬的客户：您的委托有新的成交。</p>"
+        f"<table><tr><td><table><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table></td></tr></table>"
+        "</body></html>"
+    )
+    return {
+        "headers": {
+            "date": format_datetime(when) + " (CST)",
+            "subject": Huatai.subject,
+            "from": f"涨乐通 <{Huatai.sender}>",
+        },
+        "body": html,
+    }
+
+
+def generate(out_dir: Path, n: int, *, seed: int = 7, end: datetime | None = None, days: int = 25) -> int:
+    """Write `n` synthetic execution notices spread over the `days` before `end`; returns rows written."""
+    rng = random.Random(seed)
+    end = end or datetime.now(TZ).replace(microsecond=0)
+    start = end - timedelta(days=days)
+    codes = [f"{600000 + i}" for i in range(80)] + [f"{i:06d}" for i in range(1, 40)]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sent: List[List[str]] = []
+    total = 0
+    for i in range(n):
+        when = start + timedelta(seconds=int((end - start).total_seconds() * i / max(n, 1)))
+        rows = []
+        for _ in range(rng.choice((1, 1, 2, 3))):
+            if sent and rng.random() < 0.05:
+                rows.append(rng.choice(sent))  # the same fill reported again
+                continue
+            qty = rng.choice((100, 200, 300, 500, 1000))
+            price = f"{rng.uniform(3, 80):.2f}"
+            filled = rng.random() >= 0.1
+            order_id = "" if rng.random() < 0.3 else str(rng.randrange(10**8))
+            row = [
+                rng.choice(codes), order_id, "CNY", rng.choice(("bid", "ask")), str(qty), price,
+                str(qty) if filled else "0", price if filled else "0",
+            ]
+            if filled:
+                sent.append(row)
+            rows.append(row)
+        total += len(rows)
+        (out_dir / f"replay-{i:06d}.json").write_text(json.dumps(_message(when, rows), ensure_ascii=False), encoding="utf-8")
+    return total
+
+
+def bench(n: int, *, jobs: int = 4) -> Dict[str, Any]:
+    from sync_zlt_trades import build_parser, sync
+
+    root = Path(tempfile.mkdtemp(prefix="zlt-replay-"))
+    try:
+        fixtures = root / "fixtures"
+        t0 = time.perf_counter()
+        rows = generate(fixtures, n)
+        gen_s = time.perf_counter() - t0
+        vault = make_fake_vault(root / "git")
+        base = [
+            "--vault", str(vault), "--replay", str(fixtures), "--cache-dir", str(root / "cache"),
+            "--out-dir", str(root), "--rate", "0", "--jobs", str(jobs), "--days", "30", "--max", str(n),
+        ]
+        runs = {}
+        for name, extra in (("cold", []), ("resync_full", ["--full"]), ("incremental", [])):
+            t0 = time.perf_counter()
+            report = sync(build_parser().parse_args(base + extra))
+            report["seconds"] = time.perf_counter() - t0
+            runs[name] = report
+        return {"messages": n, "rows": rows, "generate_seconds": gen_s, "runs": runs}
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_dates(n: int, *, seed: int = 7) -> Dict[str, float]:
+    """Seconds to turn `n` backfill `Date:` headers into (trade date, week file), old vs current path.
+
+    `strptime` is the previous implementation (locale-sensitive `%a`/`%b`, no
+    week-file cache); `current` is parse_email_datetime + the cached week_filename.
+    """
+    from sync_zlt_trades import compute_week_range, parse_email_datetime, week_filename, ymd_md
+
+    rng = random.Random(seed)
+    end = datetime.now(TZ).replace(microsecond=0)
+    headers = [format_datetime(end - timedelta(seconds=rng.randrange(400 * 86400))) + " (CST)" for _ in range(n)]
+
+    def old(h: str) -> tuple:
+        d = datetime.strptime(h.split(" (")[0].strip(), "%a, %d %b %Y %H:%M:%S %z").astimezone(TZ).date()
+        s, e = compute_week_range(d)
+        return ymd_md(d), f"{s.year}-{s.month}-{s.day}-{e.year}-{e.month}-{e.day}.md"
+
+    def new(h: str) -> tuple:
+        d = parse_email_datetime(h).astimezone(TZ).date()
+        return ymd_md(d), week_filename(d)
+
+    out = {}
+    for name, fn in (("strptime", old), ("current", new)):
+        week_filename.cache_clear()
+        t0 = time.perf_counter()
+        results = [fn(h) for h in headers]
+        out[name] = time.perf_counter() - t0
+        out.setdefault("_results", results)
+        assert results == out["_results"], name
+    del out["_results"]
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    g = sub.add_parser("generate", help="write synthetic execution notices")
+    g.add_argument("--out", required=True)
+    g.add_argument("-n", type=int, default=1000)
+    g.add_argument("--seed", type=int, default=7)
+    b = sub.add_parser("bench", help="replay synthetic mail into a fake vault and time each stage")
+    b.add_argument("-n", type=int, default=2000)
+    b.add_argument("--jobs", type=int, default=4)
+    d = sub.add_parser("bench-dates", help="time Date: header parsing + week-file mapping")
+    d.add_argument("-n", type=int, default=10000)
+    v = sub.add_parser("fake-vault", help="create a vault git repo with a local bare remote")
+    v.add_argument("--root", required=True)
+    args = ap.parse_args()
+
+    if args.cmd == "generate":
+        rows = generate(Path(args.out), args.n, seed=args.seed)
+        print(f"messages={args.n} rows={rows} dir={args.out}")
+    elif args.cmd == "bench-dates":
+        res = bench_dates(args.n)
+        print(" ".join(f"{k}={v * 1000:.1f}ms ({v * 1e6 / args.n:.2f}us/msg)" for k, v in res.items()))
+    elif args.cmd == "fake-vault":
+        print(make_fake_vault(Path(args.root)))
+    else:
+        res = bench(args.n, jobs=args.jobs)
+        print(f"messages={res['messages']} rows={res['rows']} generate={res['generate_seconds']:.2f}s")
+        for name, r in res["runs"].items():
+            stages = " ".join(f"{k}={v:.3f}s" for k, v in r["stages"].items())
+            print(
+                f"{name:12s} total={r['seconds']:.3f}s msgs/s={r['messages'] / r['seconds']:.0f} "
+                f"parsed={r['parsed']} missing={r['missing']} written={r.get('written', 0)} {stages}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Incremental-sync cursor for zlt-trade-sync.
+
+Remembers, per (sender, subject), the newest message timestamp a sync has
+processed plus the message ids seen in the last `overlap` seconds before it.
+The next run searches `after:<epoch of cursor - overlap>` instead of the whole
+`--days` window, and skips the overlap ids it has already handled. The overlap
+absorbs delivery lag (a message indexed late with an older Date header).
+
+Gmail's search accepts epoch seconds in `after:`; `gog` exposes no history-id
+API, so the cursor is date-based.
+
+Default location: `<vault>/.git/zlt-sync-cursor.json` (never committed), else
+~/.cache/zlt-trade-sync/.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+from fileutil import atomic_write_text
+
+DEFAULT_OVERLAP = 24 * 3600
+
+
+def default_cursor_path(vault: Path) -> Path:
+    git_dir = vault / ".git"
+    if git_dir.is_dir():
+        return git_dir / "zlt-sync-cursor.json"
+    base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    key = hashlib.sha1(str(vault).encode("utf-8")).hexdigest()[:12]
+    return base / "zlt-trade-sync" / f"sync-cursor-{key}.json"
+
+
+class SyncCursor:
+    def __init__(self, path: Path, key: str, *, overlap: int = DEFAULT_OVERLAP):
+        self.path = Path(path)
+        self.key = key
+        self.overlap = overlap
+        self.ts: int | None = None
+        self.ids: Dict[str, int] = {}
+
+    def load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            entry = data.get(self.key) or {}
+        except (OSError, ValueError, AttributeError):
+            return
+        if isinstance(entry.get("ts"), int):
+            self.ts = entry["ts"]
+            self.ids = {str(k): int(v) for k, v in (entry.get("ids") or {}).items()}
+
+    def save(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if not isinstance(data, dict):
+                data = {}
+        except (OSError, ValueError):
+            data = {}
+        data[self.key] = {"ts": self.ts, "ids": self.ids}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path, json.dumps(data, ensure_ascii=False, indent=2))
+
+    def after_epoch(self) -> int | None:
+        """Lower bound for the next search, or None without a cursor."""
+        return None if self.ts is None else self.ts - self.overlap
+
+    def seen(self, mid: str) -> bool:
+        return mid in self.ids
+
+    def advance(self, processed: Iterable[Tuple[str, int]]) -> None:
+        """Move past `(message id, epoch seconds)` pairs that were fully handled."""
+        ids = dict(self.ids)
+        ids.update(processed)
+        if not ids:
+            return
+        self.ts = max([self.ts or 0, *ids.values()])
+        floor = self.ts - self.overlap
+        self.ids = {mid: ts for mid, ts in sorted(ids.items()) if ts >= floor}
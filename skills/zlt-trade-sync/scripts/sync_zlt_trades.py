@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
-"""Sync Huatai (涨乐通) trade execution emails into Obsidian weekly trading notes.
+"""Sync broker trade execution emails into Obsidian weekly trading notes.
 
 Defaults are opinionated for cjie:
 - Gmail via gog (OAuth)
 - Vault: ~/obsidian/obsidian_huaigu
-- Sender: qqt_ufg_client@htsc.com
-- Subject: 订单执行情况通知
-- Timezone: Asia/Shanghai
+- Brokers: every `broker_*.py` plugin (see brokers.py); Huatai (涨乐通):
+  qqt_ufg_client@htsc.com, 订单执行情况通知
+- Timezone: Asia/Shanghai (--tz)
 
 Writes Markdown table rows into 01-Projects/trading-YYYY/<week>.md
 Then commits + pushes the vault git repo (unless --no-commit/--no-push).
@@ -20,25 +20,38 @@ Outputs:
 from __future__ import annotations
 
 import argparse
+import copy
 import json
 import os
 import re
 import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime, timedelta, date
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
-
 from zoneinfo import ZoneInfo
 
+from brokers import BrokerParser, load_plugins, registry_version, summarize
+from git_session import GitSession
+from mail_fetch import MessageFetcher
+from message_store import DEFAULT_MAX_AGE, DEFAULT_MAX_BYTES, MessageStore
+from sync_cursor import SyncCursor, default_cursor_path
+from trade_index import TradeIndex, default_index_path, row_keys
+from week_note import flush_weeks
+
+try:
+    from vault_walk import VaultWalker  # symlink to obsidian-huaigu/scripts/vault_walk.py
+except ImportError:
+    VaultWalker = None
+
 TZ = ZoneInfo("Asia/Shanghai")
 
 DEFAULT_VAULT = Path.home() / "obsidian" / "obsidian_huaigu"
-DEFAULT_SENDER = "qqt_ufg_client@htsc.com"
-DEFAULT_SUBJECT = "订单执行情况通知"
-
-TABLE_HEADER = "|交易日期|交易标的|代码|方向|点位|仓位|Plan Risk|Plan Reward|计划盈亏比|result|盈利|交易理由|\n"
-TABLE_SEP = "|---|---|---|---|---|---|---|---|---|---|---|---|\n"
 
 
 def run(cmd: List[str], *, cwd: Path | None = None, check: bool = True) -> str:
@@ -48,8 +61,8 @@ def run(cmd: List[str], *, cwd: Path | None = None, check: bool = True) -> str:
     return p.stdout
 
 
-def shanghai_today() -> date:
-    return datetime.now(TZ).date()
+def local_today(tz: ZoneInfo = TZ) -> date:
+    return datetime.now(tz).date()
 
 
 def ymd_slash(d: date) -> str:
@@ -66,77 +79,55 @@ def compute_week_range(d: date) -> Tuple[date, date]:
     return start, end
 
 
+@lru_cache(maxsize=1024)
 def week_filename(d: date) -> str:
     s, e = compute_week_range(d)
     return f"{s.year}-{s.month}-{s.day}-{e.year}-{e.month}-{e.day}.md"
 
 
-def direction_map(raw: str) -> str:
-    raw = (raw or "").strip().lower()
-    if raw == "bid":
-        return "买入"
-    if raw == "ask":
-        return "卖出"
-    return raw
-
-
-def parse_email_date(headers_date: str) -> date:
-    # Example: Fri, 6 Feb 2026 23:18:04 +0800 (CST)
-    # We drop the parenthetical timezone name.
-    base = headers_date.split(" (")[0].strip()
-    dt = datetime.strptime(base, "%a, %d %b %Y %H:%M:%S %z")
-    return dt.astimezone(TZ).date()
-
-
-def strip_html(html: str) -> str:
-    html = re.sub(r"<script.*?</script>", "", html, flags=re.S | re.I)
-    html = re.sub(r"<style.*?</style>", "", html, flags=re.S | re.I)
-    html = re.sub(r"<br\s*/?>", "\n", html, flags=re.I)
-    html = re.sub(r"</p>", "\n", html, flags=re.I)
-    html = re.sub(r"<[^>]+>", " ", html)
-    html = html.replace("&nbsp;", " ")
-    html = re.sub(r"\s+", " ", html)
-    return html.strip()
-
-
-def extract_table_rows(html: str) -> List[List[str]]:
-    tbodies = re.findall(r"<tbody[^>]*>(.*?)</tbody>", html, flags=re.S | re.I)
-    rows: List[List[str]] = []
-    for tbody in tbodies:
-        trs = re.findall(r"<tr[^>]*>(.*?)</tr>", tbody, flags=re.S | re.I)
-        for tr in trs:
-            tds = re.findall(r"<t[dh][^>]*>(.*?)</t[dh]>", tr, flags=re.S | re.I)
-            tds_clean = [strip_html(td) for td in tds]
-            tds_clean = [t for t in tds_clean if t != ""]
-            if tds_clean:
-                rows.append(tds_clean)
-    return rows
-
-
-def ensure_week_file(path: Path) -> None:
-    if path.exists():
-        return
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(TABLE_HEADER + TABLE_SEP)
-
-
-def parse_existing_keys(trading_dir: Path) -> set[Tuple[str, str, str, str, str]]:
-    existing: set[Tuple[str, str, str, str, str]] = set()
+CHINA_STANDARD_TIME = timezone(timedelta(hours=8), "CST")
+_CST_ONLY = re.compile(r"\s+\(?CST\)?\s*$")
+_NUMERIC_ZONE = re.compile(r"[+-]\d{4}(?:\s*\(.*\))?\s*$")
+
+
+def parse_email_datetime(headers_date: str) -> datetime:
+    """RFC 2822 `Date:` header -> aware datetime (locale-independent).
+
+    Example: Fri, 6 Feb 2026 23:18:04 +0800 (CST). The numeric offset wins; a
+    bare `CST` zone (no offset) is China Standard Time, not the US Central time
+    email.utils would assume. `-0000` (no zone information) is read as UTC.
+    """
+    value = headers_date.strip()
+    if not _NUMERIC_ZONE.search(value):
+        m = _CST_ONLY.search(value)
+        if m:
+            return parsedate_to_datetime(value[: m.start()]).replace(tzinfo=CHINA_STANDARD_TIME)
+    dt = parsedate_to_datetime(value)
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+def parse_email_date(headers_date: str, tz: ZoneInfo = TZ) -> date:
+    return parse_email_datetime(headers_date).astimezone(tz).date()
+
+
+def list_week_files(vault: Path, trading_dir: Path) -> List[Path]:
+    """Week notes directly in `trading_dir`, minus what the vault's .gitignore files and
+    Obsidian excluded files hide (walked from the vault root so those rules apply)."""
     if not trading_dir.exists():
-        return existing
-    for p in sorted(trading_dir.glob("*.md")):
-        txt = p.read_text(errors="ignore")
-        for l in txt.splitlines():
-            l = l.strip()
-            if not l.startswith("|"):
-                continue
-            if l.startswith("|交易日期|") or l.startswith("|---"):
-                continue
-            parts = [c.strip() for c in l.strip("|").split("|")]
-            if len(parts) < 6:
-                continue
-            d, code, side, price, qty = parts[0], parts[2], parts[3], parts[4], parts[5]
-            existing.add((d, code, side, price, qty))
+        return []
+    if VaultWalker is None:
+        return sorted(trading_dir.glob("*.md"))
+    rel = os.path.relpath(trading_dir, vault)
+    walker = VaultWalker(str(vault), pattern="*.md", recursive=False, stat=False)
+    walker.refresh(rel)
+    return sorted(vault / p for _, p in walker.iter_entries(rel))
+
+
+def parse_existing_keys(vault: Path, trading_dir: Path) -> set[Tuple[str, str, str, str, str]]:
+    """Full re-parse of every week file (used with --no-index)."""
+    existing: set[Tuple[str, str, str, str, str]] = set()
+    for p in list_week_files(vault, trading_dir):
+        existing.update(row_keys(p.read_text(errors="ignore")))
     return existing
 
 
@@ -144,40 +135,89 @@ def trade_key(t: Dict[str, str]) -> Tuple[str, str, str, str, str]:
     return (t["交易日期"], t["代码"], t["方向"], t["点位"], t["仓位"])
 
 
-def append_trades(path: Path, trades: List[Dict[str, str]]) -> None:
-    ensure_week_file(path)
-    txt = path.read_text(errors="ignore")
-    if not txt.endswith("\n"):
-        txt += "\n"
-    for t in trades:
-        row = (
-            f"|{t['交易日期']}|{t['交易标的']}|{t['代码']}|{t['方向']}|{t['点位']}|{t['仓位']}|"
-            f"{t['Plan Risk']}|{t['Plan Reward']}|{t['计划盈亏比']}|{t['result']}|{t['盈利']}|{t['交易理由']}|\n"
-        )
-        txt += row
-    path.write_text(txt)
+def select_brokers(names: List[str] | None, sender: str | None, subject: str | None) -> List[BrokerParser]:
+    registry = load_plugins()
+    unknown = sorted(set(names or []) - set(registry))
+    if unknown:
+        raise SystemExit(f"unknown broker(s): {', '.join(unknown)} (available: {', '.join(sorted(registry))})")
+    parsers = [registry[n] for n in (names or sorted(registry))]
+    if sender or subject:
+        if len(parsers) != 1:
+            raise SystemExit("--sender/--subject override a single --broker")
+        parsers[0] = copy.copy(parsers[0])
+        parsers[0].sender = sender or parsers[0].sender
+        parsers[0].subject = subject or parsers[0].subject
+    return parsers
+
+
+class GogMail:
+    """Gmail through the `gog` CLI (replay.ReplayMail is the offline stand-in)."""
+
+    def search(self, query: str, max_results: int) -> Dict[str, Any]:
+        return json.loads(run(["gog", "gmail", "messages", "search", query, "--max", str(max_results), "--json"]))
+
+    def get(self, mid: str) -> str:
+        return run(["gog", "gmail", "get", mid, "--format=full", "--json"])
 
 
-def main() -> int:
+def build_parser() -> argparse.ArgumentParser:
     ap = argparse.ArgumentParser()
     ap.add_argument("--vault", default=str(DEFAULT_VAULT))
     ap.add_argument("--days", type=int, default=30)
-    ap.add_argument("--after", default=None, help="YYYY/MM/DD (Asia/Shanghai) override")
-    ap.add_argument("--before", default=None, help="YYYY/MM/DD (Asia/Shanghai) override")
-    ap.add_argument("--sender", default=DEFAULT_SENDER)
-    ap.add_argument("--subject", default=DEFAULT_SUBJECT)
+    ap.add_argument("--tz", default=str(TZ), help="IANA timezone for trade dates, week files and --after/--before")
+    ap.add_argument("--after", default=None, help="YYYY/MM/DD (--tz) override")
+    ap.add_argument("--before", default=None, help="YYYY/MM/DD (--tz) override")
+    ap.add_argument("--broker", action="append", default=None, help="broker plugin to run (repeatable; default: all)")
+    ap.add_argument("--sender", default=None, help="override the sender of a single --broker")
+    ap.add_argument("--subject", default=None, help="override the subject of a single --broker")
     ap.add_argument("--max", type=int, default=500)
     ap.add_argument("--cache-dir", default="/tmp/zlt_mail_cache")
+    ap.add_argument("--cache-max-age-days", type=float, default=DEFAULT_MAX_AGE / 86400)
+    ap.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024))
+    ap.add_argument("--no-raw", action="store_true", help="do not keep compressed raw messages in the cache")
+    ap.add_argument("--jobs", type=int, default=4, help="concurrent `gog gmail get` fetches")
+    ap.add_argument("--rate", type=float, default=5.0, help="max fetches per second (0 = unlimited)")
+    ap.add_argument("--full", action="store_true", help="ignore the sync cursor and search the whole --days window")
+    ap.add_argument("--cursor", default=None, help="sync cursor (default: <vault>/.git/zlt-sync-cursor.json)")
+    ap.add_argument("--index", default=None, help="trade-key index (default: <vault>/.git/zlt-trade-index.sqlite)")
+    ap.add_argument("--no-index", action="store_true", help="re-parse all week files for dedup instead")
     ap.add_argument("--dry-run", action="store_true")
     ap.add_argument("--no-commit", action="store_true")
     ap.add_argument("--no-push", action="store_true")
-    args = ap.parse_args()
+    ap.add_argument("--push-retries", type=int, default=3, help="rebase + retry a rejected push (exponential backoff)")
+    ap.add_argument("--replay", default=None, help="read messages from a fixture dir instead of gog (see replay.py)")
+    ap.add_argument("--out-dir", default="/tmp", help="where zlt-mail-index/missing-trades/review JSON go")
+    return ap
+
+
+def sync(args: argparse.Namespace, mail: Any = None) -> Dict[str, Any]:
+    """One sync run; returns the report that main() prints."""
+    try:
+        tz = ZoneInfo(args.tz)
+    except (ValueError, KeyError) as e:
+        raise SystemExit(f"unknown --tz {args.tz!r}: {e}")
+    if mail is None:
+        if args.replay:
+            from replay import ReplayMail
+
+            mail = ReplayMail(Path(args.replay), tz=tz)
+        else:
+            mail = GogMail()
+    stages: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    out_dir = Path(args.out_dir)
 
     vault = Path(args.vault).expanduser()
-    cache_dir = Path(args.cache_dir)
-    cache_dir.mkdir(parents=True, exist_ok=True)
-
-    today = shanghai_today()
+    brokers = select_brokers(args.broker, args.sender, args.subject)
+    store = MessageStore(
+        Path(args.cache_dir),
+        parser_version=registry_version(brokers),
+        keep_raw=not args.no_raw,
+        max_age=args.cache_max_age_days * 86400,
+        max_bytes=int(args.cache_max_mb * 1024 * 1024),
+    )
+
+    today = local_today(tz)
     if args.after:
         after = args.after
     else:
@@ -188,125 +228,207 @@ def main() -> int:
     else:
         before = ymd_slash(today + timedelta(days=1))
 
-    query = f"from:{args.sender} after:{after} before:{before}"
+    # Incremental by default: per broker, search only after its last synced message (minus an overlap).
+    cursor_path = Path(args.cursor) if args.cursor else default_cursor_path(vault)
+    cursors: Dict[str, SyncCursor] = {}
+    queries: Dict[str, str] = {}
+    for b in brokers:
+        cursor = cursors[b.name] = SyncCursor(cursor_path, f"{b.sender}|{b.subject}")
+        cursor.load()
+        use_cursor = not args.full and not args.after and cursor.after_epoch() is not None
+        queries[b.name] = f"{b.query()} after:{cursor.after_epoch() if use_cursor else after} before:{before}"
 
     # 1) Sync repo first
-    run(["git", "pull", "--rebase"], cwd=vault)
-
-    # 2) Search messages
-    out = run(["gog", "gmail", "messages", "search", query, "--max", str(args.max), "--json"])
-    idx = json.loads(out)
-    Path("/tmp/zlt-mail-index.json").write_text(out)
-
-    messages = idx.get("messages") or []
-    messages = [m for m in messages if m.get("subject") == args.subject]
+    git = GitSession(vault, retries=args.push_retries)
+    git.pull()
+
+    # 2) Search messages (all brokers concurrently)
+    def search(b: BrokerParser) -> Dict[str, Any]:
+        return mail.search(queries[b.name], args.max)
+
+    with ThreadPoolExecutor(max_workers=len(brokers)) as pool:
+        indexes = dict(zip([b.name for b in brokers], pool.map(search, brokers)))
+    out_dir.joinpath("zlt-mail-index.json").write_text(json.dumps(indexes, ensure_ascii=False, indent=2))
+
+    messages: List[Dict[str, Any]] = []
+    seen_ids: set[str] = set()
+    skipped_cursor = 0
+    for b in brokers:
+        for m in indexes[b.name].get("messages") or []:
+            if m.get("subject") != b.subject or m["id"] in seen_ids:
+                continue
+            if not args.full and not args.after and cursors[b.name].seen(m["id"]):
+                skipped_cursor += 1
+                continue
+            seen_ids.add(m["id"])
+            messages.append({**m, "_broker": b.name})
 
     review: List[Dict[str, Any]] = []
     parsed: List[Dict[str, str]] = []
+    processed: Dict[str, List[Tuple[str, int]]] = {b.name: [] for b in brokers}
+    fetch_failed: set[str] = set()
+    by_name = {b.name: b for b in brokers}
+    broker_of = {m["id"]: m["_broker"] for m in messages}
+
+    # 3) Fetch (uncached ones concurrently) and parse each message with the registry, in index order
+    fetcher = MessageFetcher(
+        store,
+        mail.get,
+        lambda msg: summarize(brokers, msg),
+        jobs=args.jobs,
+        rate=args.rate,
+    )
+    for mid, record, err in fetcher.iter_messages(m["id"] for m in messages):
+        if record is None:
+            review.append({"id": mid, "reason": f"fetch_failed:{err}"})
+            fetch_failed.add(broker_of[mid])
+            continue
 
-    # 3) Parse each message
-    for m in messages:
-        mid = m["id"]
-        cache = cache_dir / f"{mid}.json"
-        if cache.exists():
-            msg_json = json.loads(cache.read_text())
-        else:
-            msg_raw = run(["gog", "gmail", "get", mid, "--format=full", "--json"])
-            cache.write_text(msg_raw)
-            msg_json = json.loads(msg_raw)
-
-        headers = msg_json.get("headers", {})
+        headers = record["headers"]
         try:
-            d = parse_email_date(headers.get("date", ""))
+            dt = parse_email_datetime(headers.get("date", ""))
         except Exception as e:
             review.append({"id": mid, "reason": f"bad_date:{e}", "headers": headers})
             continue
+        d = dt.astimezone(tz).date()
+        processed[broker_of[mid]].append((mid, int(dt.timestamp())))
 
-        html = msg_json.get("body", "")
-        rows = extract_table_rows(html)
+        broker = by_name.get(record["broker"] or "")
+        if broker is None:
+            review.append({"id": mid, "reason": "no_parser", "date": headers.get("date"), "subject": headers.get("subject")})
+            continue
+        rows = record["rows"]
         if not rows:
             review.append({"id": mid, "reason": "no_rows", "date": headers.get("date"), "subject": headers.get("subject")})
             continue
 
         for r in rows:
-            # Expected: 股份代码,订单编号,币种,买卖方向,委托数量,委托价格,最新成交数量,最新成交价格,...
-            if len(r) < 8:
-                review.append({"id": mid, "reason": "short_row", "row": r})
+            fields, reason = broker.row_trade(r)
+            if fields is None:
+                review.append({"id": mid, "broker": broker.name, "reason": reason, "row": r})
                 continue
-            symbol = r[0]
-            side = direction_map(r[3])
-            qty = r[6]
-            price = r[7]
-
-            try:
-                if float(str(qty).strip() or "0") <= 0:
-                    review.append({"id": mid, "reason": "qty_le_0", "row": r, "symbol": symbol})
-                    continue
-                if float(str(price).strip() or "0") <= 0:
-                    review.append({"id": mid, "reason": "price_le_0", "row": r, "symbol": symbol})
-                    continue
-            except Exception:
-                # keep; but still write (rare)
-                pass
-
             parsed.append(
                 {
                     "交易日期": ymd_md(d),
-                    "交易标的": symbol,
-                    "代码": symbol,
-                    "方向": side,
-                    "点位": str(price),
-                    "仓位": str(qty),
+                    **fields,
                     "Plan Risk": "",
                     "Plan Reward": "",
                     "计划盈亏比": "",
                     "result": "",
                     "盈利": "",
                     "交易理由": "",
+                    "_broker": broker.name,
                     "_week_file": week_filename(d),
                     "_year": str(d.year),
                 }
             )
 
+    store.save()
+    stages["search_fetch_parse"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+
     # 4) Dedup vs existing
     bydir: Dict[Path, List[Dict[str, str]]] = {}
     missing: List[Dict[str, str]] = []
 
-    # Build existing keys per year directory as needed
+    # Existing keys per year directory: from the persistent index (only week files whose
+    # stat changed are re-parsed), or a full re-parse with --no-index.
+    index = None if args.no_index else TradeIndex(Path(args.index) if args.index else default_index_path(vault))
     existing_cache: Dict[Path, set[Tuple[str, str, str, str, str]]] = {}
+    new_keys: set[Tuple[Path, Tuple[str, str, str, str, str]]] = set()
 
     for t in parsed:
         trading_dir = vault / "01-Projects" / f"trading-{t['_year']}"
+        key = trade_key(t)
         if trading_dir not in existing_cache:
-            existing_cache[trading_dir] = parse_existing_keys(trading_dir)
-        if trade_key(t) in existing_cache[trading_dir]:
+            if index is not None:
+                index.refresh(list_week_files(vault, trading_dir), trading_dir)
+                existing_cache[trading_dir] = set()
+            else:
+                existing_cache[trading_dir] = parse_existing_keys(vault, trading_dir)
+        if key in existing_cache[trading_dir] or (index is not None and index.contains(key, trading_dir)):
+            continue
+        # The same fill can arrive in more than one email; write it once.
+        if (trading_dir, key) in new_keys:
             continue
+        new_keys.add((trading_dir, key))
         missing.append(t)
         fpath = trading_dir / t["_week_file"]
         bydir.setdefault(fpath, []).append(t)
 
-    Path("/tmp/zlt-missing-trades.json").write_text(json.dumps({"missing": missing}, ensure_ascii=False, indent=2))
-    Path("/tmp/zlt-review.json").write_text(json.dumps(review, ensure_ascii=False, indent=2))
+    out_dir.joinpath("zlt-missing-trades.json").write_text(json.dumps({"missing": missing}, ensure_ascii=False, indent=2))
+    out_dir.joinpath("zlt-review.json").write_text(json.dumps(review, ensure_ascii=False, indent=2))
+
+    stages["dedup"] = time.perf_counter() - t0
+    report: Dict[str, Any] = {
+        "brokers": list(by_name),
+        "messages": len(messages),
+        "skipped_cursor": skipped_cursor,
+        "fetched": fetcher.fetched,
+        "cached": fetcher.cached,
+        "reparsed": fetcher.reparsed,
+        "evicted": store.evicted,
+        "parsed": len(parsed),
+        "missing": len(missing),
+        "review": len(review),
+        "stages": stages,
+    }
 
     if args.dry_run:
-        print(f"[dry-run] messages={len(messages)} parsed={len(parsed)} missing={len(missing)} review={len(review)}")
-        for fp, ts in sorted(bydir.items(), key=lambda x: str(x[0])):
-            print(f"[dry-run] would_write {len(ts)} -> {fp}")
-        return 0
+        report["would_write"] = {str(fp): len(ts) for fp, ts in sorted(bydir.items(), key=lambda x: str(x[0]))}
+        if index is not None:
+            index.close()
+        return report
+
+    # 5) Write: each week file merged in date order and replaced once (weeks in parallel)
+    t0 = time.perf_counter()
+    added = flush_weeks(bydir, jobs=args.jobs)
+    if index is not None:
+        for fp in sorted(added):
+            index.refresh_file(fp)
+    if index is not None:
+        index.close()
+    stages["write"] = time.perf_counter() - t0
+
+    # 6) Commit only the touched week files (nothing changed: no commit) + push
+    sha = None
+    if not args.no_commit:
+        sha = git.commit([fp for fp, n in added.items() if n], f"kb: sync zlt trades last{args.days}d")
+        if not args.no_push and (sha or git.ahead()):
+            git.push()
 
-    # 5) Write
-    for fp, ts in bydir.items():
-        append_trades(fp, ts)
+    # 7) Advance the cursors (not for explicit windows, and not past messages we failed to fetch)
+    if not args.before and not args.after:
+        for b in brokers:
+            if b.name not in fetch_failed:
+                cursors[b.name].advance(processed[b.name])
+                cursors[b.name].save()
 
-    # 6) Commit + push
-    if not args.no_commit:
-        run(["git", "add", "01-Projects"], cwd=vault)
-        msg = f"kb: sync zlt trades last{args.days}d"
-        run(["git", "commit", "-m", msg], cwd=vault)
-        if not args.no_push:
-            run(["git", "push"], cwd=vault)
+    report["written"] = sum(added.values())
+    report["git"] = {"commit": sha, "push_attempts": git.push_attempts, "timings": git.timings}
+    return report
 
-    print(f"messages={len(messages)} parsed={len(parsed)} missing={len(missing)} review={len(review)}")
+
+def _summary_line(report: Dict[str, Any]) -> str:
+    keys = ["messages", "skipped_cursor", "fetched", "cached", "reparsed", "evicted", "parsed", "missing", "review"]
+    return f"brokers={','.join(report['brokers'])} " + " ".join(f"{k}={report[k]}" for k in keys)
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    report = sync(args)
+    stages = " ".join(f"{k}={v:.2f}s" for k, v in report["stages"].items())
+    if args.dry_run:
+        print(f"[dry-run] {_summary_line(report)}")
+        for fp, n in report["would_write"].items():
+            print(f"[dry-run] would_write {n} -> {fp}")
+        print(f"[dry-run] stages: {stages}")
+        return 0
+    g = report["git"]
+    git_timings = " ".join(f"{k}={v:.2f}s" for k, v in g["timings"].items())
+    print(f"git: commit={g['commit'] or 'none'} push_attempts={g['push_attempts']} {git_timings}")
+    print(f"stages: {stages}")
+    print(_summary_line(report))
     return 0
 
 
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the broker parser registry and the Huatai plugin.
+"""
+
+from unittest import TestCase, main
+
+from broker_huatai import EXPECTED_COLUMNS, Huatai
+from brokers import BrokerParser, load_plugins, register, registry_version, summarize
+
+
+def huatai_message(*cells, subject="订单执行情况通知"):
+    header = "<tr>" + "".join(f"<th>{c}</th>" for c in EXPECTED_COLUMNS) + "</tr>"
+    rows = "".join("<tr>" + "".join(f"<td>{c}</td>" for c in r) + "</tr>" for r in cells)
+    return {
+        "headers": {"date": "Fri, 6 Feb 2026 23:18:04 +0800 (CST)", "subject": subject, "from": "涨乐通 <qqt_ufg_client@htsc.com>"},
+        "body": f"<table>{header}{rows}</table>",
+    }
+
+
+class Other(BrokerParser):
+    name = "other"
+    sender = "fills@other.example"
+    subject = "Trade confirmation"
+
+    def extract_rows(self, html):
+        return [{"raw": html}]
+
+    def row_trade(self, row):
+        return None, "unsupported"
+
+
+class TestRegistry(TestCase):
+    def test_huatai_is_discovered(self):
+        self.assertIsInstance(load_plugins()["huatai"], Huatai)
+
+    def test_summarize_picks_the_matching_parser(self):
+        parsers = [Other(), Huatai()]
+        rec = summarize(parsers, huatai_message(["600036", "", "CNY", "bid", "100", "35.2", "100", "35.2"]))
+        self.assertEqual(rec["broker"], "huatai")
+        self.assertEqual(rec["rows"][0]["买卖方向"], "bid")
+        self.assertEqual(summarize(parsers, huatai_message(subject="newsletter"))["broker"], None)
+
+    def test_version_changes_with_any_parser(self):
+        before = registry_version([Huatai(), Other()])
+        Bumped = type("Bumped", (Other,), {"version": 2})
+        self.assertNotEqual(before, registry_version([Huatai(), Bumped()]))
+
+    def test_register(self):
+        registry = load_plugins()
+        Temp = register(type("Temp", (Other,), {"name": "temp"}))
+        try:
+            self.assertIsInstance(registry["temp"], Temp)
+        finally:
+            del registry["temp"]
+
+
+class TestHuatai(TestCase):
+    def test_row_trade(self):
+        h = Huatai()
+        row = dict(zip(EXPECTED_COLUMNS, ["600036", "", "CNY", "ask", "100", "35.2", "100", "35.20"]))
+        fields, reason = h.row_trade(row)
+        self.assertIsNone(reason)
+        self.assertEqual((fields["代码"], fields["方向"], fields["点位"], fields["仓位"]), ("600036", "卖出", "35.20", "100"))
+        self.assertEqual(h.row_trade({**row, "最新成交数量": "0"}), (None, "qty_le_0"))
+        self.assertEqual(h.row_trade({**row, "最新成交价格": "0"}), (None, "price_le_0"))
+        self.assertEqual(h.row_trade({"股份代码": "600036"}), (None, "short_row"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the vault git session (pathspec commits, push retry).
+"""
+
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main
+
+from git_session import GitError, GitSession
+
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE).stdout
+
+
+class TestGitSession(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        git(self.tmp, "init", "-q", "--bare", "-b", "main", "remote.git")
+        self.a = self.clone("a")
+        (self.a / "README.md").write_text("vault\n", encoding="utf-8")
+        git(self.a, "add", "README.md")
+        git(self.a, "commit", "-q", "-m", "init")
+        git(self.a, "push", "-q", "-u", "origin", "main")
+        self.b = self.clone("b")
+        self.sleeps = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def clone(self, name):
+        git(self.tmp, "clone", "-q", "remote.git", name)
+        path = self.tmp / name
+        git(path, "config", "user.name", "test")
+        git(path, "config", "user.email", "test@example.com")
+        return path
+
+    def session(self, repo, retries=3):
+        return GitSession(repo, retries=retries, backoff=0.5, sleep=self.sleeps.append)
+
+    def test_commit_only_touched_files_and_skip_empty(self):
+        week = self.a / "01-Projects" / "trading-2026" / "w.md"
+        week.parent.mkdir(parents=True)
+        week.write_text("|x|\n", encoding="utf-8")
+        (self.a / "other.md").write_text("wip\n", encoding="utf-8")
+        git(self.a, "add", "other.md")
+
+        s = self.session(self.a)
+        self.assertIsNotNone(s.commit([week], "kb: sync"))
+        self.assertEqual(git(self.a, "show", "--name-only", "--format=", "HEAD").split(), ["01-Projects/trading-2026/w.md"])
+        self.assertIn("A  other.md", git(self.a, "status", "--porcelain"))
+        self.assertIsNone(s.commit([week], "kb: sync"))
+        self.assertIsNone(s.commit([], "kb: sync"))
+        self.assertIn("commit", s.timings)
+
+    def test_push_retries_after_remote_moved(self):
+        (self.b / "b.md").write_text("b\n", encoding="utf-8")
+        git(self.b, "add", "b.md")
+        git(self.b, "commit", "-q", "-m", "b")
+        git(self.b, "push", "-q")
+
+        (self.a / "a.md").write_text("a\n", encoding="utf-8")
+        s = self.session(self.a)
+        s.commit([self.a / "a.md"], "a")
+        self.assertEqual(s.ahead(), 1)
+        s.push()
+        self.assertEqual(s.push_attempts, 2)
+        self.assertEqual(self.sleeps, [0.5])
+        self.assertEqual(s.ahead(), 0)
+        self.assertTrue((self.a / "b.md").exists())
+
+    def test_push_gives_up(self):
+        (self.b / "b.md").write_text("b\n", encoding="utf-8")
+        git(self.b, "add", "b.md")
+        git(self.b, "commit", "-q", "-m", "b")
+        git(self.b, "push", "-q")
+
+        (self.a / "a.md").write_text("a\n", encoding="utf-8")
+        s = self.session(self.a, retries=0)
+        s.commit([self.a / "a.md"], "a")
+        with self.assertRaisesRegex(GitError, "after 1 attempts"):
+            s.push()
+        self.assertEqual(s.ahead(), 1)
+
+    def test_push_to_missing_remote_is_not_retried(self):
+        (self.a / "a.md").write_text("a\n", encoding="utf-8")
+        s = self.session(self.a, retries=2)
+        s.commit([self.a / "a.md"], "a")
+        git(self.a, "remote", "set-url", "origin", str(self.tmp / "missing.git"))
+        with self.assertRaises(GitError):
+            s.push()
+        self.assertEqual((s.push_attempts, self.sleeps), (1, []))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-pass HTML table parser used on execution emails.
+"""
+
+from unittest import TestCase, main
+
+from broker_huatai import EXPECTED_COLUMNS, extract_table_rows
+from html_table import extract_tables, table_records
+
+HEADER = "<tr>" + "".join(f"<th>{c}</th>" for c in EXPECTED_COLUMNS) + "</tr>"
+
+
+class TestExtractTables(TestCase):
+    def test_cells_text_and_blanks(self):
+        html = (
+            "<table><tr><td><b>600036</b>&nbsp;</td><td></td><td>a<br/>b</td>"
+            "<td colspan='2'>wide</td><td>x &amp; y</td></tr></table>"
+        )
+        self.assertEqual(extract_tables(html), [[["600036", "", "a b", "wide", "", "x & y"]]])
+
+    def test_nested_tables_and_skipped_content(self):
+        html = (
+            "<html><head><style>td > p {color: red}</style></head><body>"
+            "<table><tr><td>outer<table><tr><td>inner</td></tr></table></td></tr></table>"
+            "<script>if (a < b) {}</script><!-- <table><tr><td>no</td></tr></table> -->"
+        )
+        self.assertEqual(extract_tables(html), [[["inner"]], [["outer"]]])
+
+    def test_unclosed_cells_and_rows(self):
+        html = "<TABLE><TR><TD>1<TD>2<TR><TD>3</TABLE>"
+        self.assertEqual(extract_tables(html), [[["1", "2"], ["3"]]])
+
+    def test_stray_lt_is_kept_in_cell_text(self):
+        html = "<table><tr><td>x<5 y</td><td>a < b</td><td>1 <<2</td></tr></table>"
+        self.assertEqual(extract_tables(html), [[["x<5 y", "a < b", "1 <<2"]]])
+
+    def test_records_by_header(self):
+        html = "<table><tr><td>layout</td></tr></table><table><tr><th>a</th><th>b</th></tr><tr><td>1</td></tr><tr><td></td><td></td></tr><tr><th>a</th><th>b</th></tr></table>"
+        self.assertEqual(table_records(html, ["a", "b"]), [{"a": "1", "b": ""}])
+
+
+class TestExecutionRows(TestCase):
+    def test_blank_cell_does_not_shift_columns(self):
+        row = "<tr><td>600036</td><td></td><td>CNY</td><td>bid</td><td>100</td><td>35.2</td><td>100</td><td>35.20</td></tr>"
+        html = f"<table><thead>{HEADER}</thead><tbody>{row}</tbody></table>"
+        [r] = extract_table_rows(html)
+        self.assertEqual((r["股份代码"], r["买卖方向"], r["最新成交数量"], r["最新成交价格"]), ("600036", "bid", "100", "35.20"))
+
+    def test_columns_found_by_name_in_any_order(self):
+        html = (
+            "<table><tr><th>最新成交价格</th><th>股份代码</th><th>买卖方向</th><th>最新成交数量</th></tr>"
+            "<tr><td>9.9</td><td>000001</td><td>ask</td><td>300</td></tr></table>"
+        )
+        self.assertEqual(
+            extract_table_rows(html),
+            [{"最新成交价格": "9.9", "股份代码": "000001", "买卖方向": "ask", "最新成交数量": "300"}],
+        )
+
+    def test_headerless_table_uses_documented_order(self):
+        html = "<table><tbody><tr><td>600036</td><td>1</td><td>CNY</td><td>bid</td><td>100</td><td>35.2</td><td>100</td><td>35.2</td></tr></tbody></table>"
+        self.assertEqual(extract_table_rows(html)[0]["最新成交数量"], "100")
+
+
+if __name__ == "__main__":
+    main()
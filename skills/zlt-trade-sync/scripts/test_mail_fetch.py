@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for the concurrent Gmail message fetcher.
+"""
+
+import json
+import random
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase, main
+
+from mail_fetch import MessageFetcher, RateLimiter
+from message_store import MessageStore
+
+
+def summarize(msg):
+    return {"id": msg["id"], "rows": []}
+
+
+class TestMessageFetcher(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.lock = threading.Lock()
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def fetcher(self, jobs=4, version="huatai:1"):
+        return MessageFetcher(MessageStore(self.tmp, parser_version=version), self.fetch, summarize, jobs=jobs, rate=0)
+
+    def fetch(self, mid):
+        with self.lock:
+            self.calls.append(mid)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(random.uniform(0, 0.02))  # finish out of order
+        with self.lock:
+            self.active -= 1
+        if mid == "bad":
+            raise RuntimeError("cmd failed: gog\nstderr: boom")
+        return json.dumps({"id": mid})
+
+    def test_results_follow_input_order(self):
+        mids = [f"m{i}" for i in range(20)]
+        fetcher = self.fetcher()
+        got = [mid for mid, msg, err in fetcher.iter_messages(mids)]
+        self.assertEqual(got, mids)
+        self.assertLessEqual(self.peak, 4)
+        self.assertGreater(self.peak, 1)
+        self.assertEqual(fetcher.fetched, 20)
+
+    def test_store_is_used_and_legacy_files_imported(self):
+        (self.tmp / "m1.json").write_text(json.dumps({"id": "legacy"}), encoding="utf-8")
+        fetcher = self.fetcher(jobs=2)
+        out = {mid: rec for mid, rec, err in fetcher.iter_messages(["m0", "m1", "m2"])}
+        fetcher.store.save()
+        self.assertEqual(out["m1"], {"id": "legacy", "rows": []})
+        self.assertEqual(sorted(self.calls), ["m0", "m2"])
+        self.assertEqual((fetcher.fetched, fetcher.cached, fetcher.reparsed), (2, 0, 1))
+        self.assertFalse((self.tmp / "m1.json").exists())
+        self.assertEqual(sorted(p.name for p in (self.tmp / "raw").iterdir()), ["m0.json.gz", "m1.json.gz", "m2.json.gz"])
+
+        self.calls.clear()
+        fetcher = self.fetcher()
+        list(fetcher.iter_messages(["m0", "m1", "m2"]))
+        self.assertEqual(self.calls, [])
+        self.assertEqual(fetcher.cached, 3)
+
+    def test_parser_bump_reparses_from_raw(self):
+        fetcher = self.fetcher()
+        list(fetcher.iter_messages(["m0"]))
+        fetcher.store.save()
+        self.calls.clear()
+        fetcher = self.fetcher(version="huatai:2")
+        list(fetcher.iter_messages(["m0"]))
+        self.assertEqual(self.calls, [])
+        self.assertEqual(fetcher.reparsed, 1)
+
+    def test_failures_are_reported_not_cached(self):
+        fetcher = self.fetcher(jobs=2)
+        out = list(fetcher.iter_messages(["m0", "bad"]))
+        self.assertEqual(out[1], ("bad", None, "cmd failed: gog"))
+        self.assertIsNone(fetcher.store.get("bad"))
+
+
+class TestRateLimiter(TestCase):
+    def test_spacing(self):
+        limiter = RateLimiter(50)
+        start = time.monotonic()
+        threads = [threading.Thread(target=limiter.wait) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertGreaterEqual(time.monotonic() - start, 5 / 50 - 0.01)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded message cache.
+"""
+
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main
+
+from message_store import MessageStore
+
+
+def record(n=1):
+    return {"headers": {"date": "Fri, 6 Feb 2026 23:18:04 +0800"}, "body_sha": "x", "rows": [["600036"] * n]}
+
+
+class TestMessageStore(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_round_trip_and_raw_compression(self):
+        store = MessageStore(self.tmp, parser_version="huatai:1")
+        raw = json.dumps({"body": "<table>" + "x" * 10000 + "</table>"})
+        store.put("m1", record(), raw)
+        store.save()
+        self.assertLess((self.tmp / "raw" / "m1.json.gz").stat().st_size, 1000)
+
+        again = MessageStore(self.tmp, parser_version="huatai:1")
+        self.assertEqual(again.get("m1"), record())
+        self.assertEqual(again.get_raw("m1"), raw)
+        self.assertIsNone(MessageStore(self.tmp, parser_version="huatai:2").get("m1"))
+
+    def test_no_raw(self):
+        store = MessageStore(self.tmp, parser_version="huatai:1", keep_raw=False)
+        store.put("m1", record(), "{}")
+        self.assertEqual(list((self.tmp / "raw").iterdir()), [])
+        self.assertIsNone(store.get_raw("m1"))
+
+    def test_age_and_size_eviction(self):
+        store = MessageStore(self.tmp, parser_version="huatai:1", keep_raw=False, max_age=100, max_bytes=10**6)
+        for i in range(3):
+            store.put(f"m{i}", record())
+        store.entries["m0"]["t"] -= 1000
+        self.assertEqual(store.evict(), 1)
+        self.assertEqual(set(store.entries), {"m1", "m2"})
+
+        store.entries["m1"]["t"] -= 10
+        store.max_bytes = store.entries["m2"]["n"]
+        self.assertEqual(store.evict(), 1)
+        self.assertEqual(set(store.entries), {"m2"})
+
+    def test_save_merges_concurrent_runs(self):
+        a = MessageStore(self.tmp, parser_version="huatai:1")
+        b = MessageStore(self.tmp, parser_version="huatai:1")
+        a.put("a", record())
+        b.put("b", record())
+        a.save()
+        b.save()
+        self.assertEqual(set(MessageStore(self.tmp, parser_version="huatai:1").entries), {"a", "b"})
+
+
+if __name__ == "__main__":
+    main()
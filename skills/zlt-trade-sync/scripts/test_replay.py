@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline replay harness (fixture mailbox + fake vault).
+"""
+
+import shutil
+import subprocess
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import TestCase, main
+
+from broker_huatai import Huatai
+from replay import TZ, ReplayMail, generate, make_fake_vault
+from sync_zlt_trades import build_parser, list_week_files, sync
+from week_note import WeekNote
+
+
+class TestReplay(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.fixtures = self.tmp / "fixtures"
+        self.rows = generate(self.fixtures, 40, seed=3, end=datetime.now(TZ).replace(microsecond=0), days=10)
+        self.vault = make_fake_vault(self.tmp / "git")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def run_sync(self, *extra):
+        argv = [
+            "--vault", str(self.vault), "--replay", str(self.fixtures), "--cache-dir", str(self.tmp / "cache"),
+            "--out-dir", str(self.tmp), "--rate", "0", "--days", "30", *extra,
+        ]
+        return sync(build_parser().parse_args(argv))
+
+    def test_search_filters_sender_and_dates(self):
+        mail = ReplayMail(self.fixtures)
+        everything = mail.search(f"from:{Huatai.sender}", 1000)["messages"]
+        self.assertEqual(len(everything), 40)
+        self.assertEqual(everything[-1]["id"], "replay-000000")  # newest first
+        self.assertEqual(mail.search("from:someone@else.com", 1000)["messages"], [])
+
+        cutoff = int((datetime.now(TZ) - timedelta(days=5)).timestamp())
+        recent = mail.search(f"from:{Huatai.sender} after:{cutoff}", 1000)["messages"]
+        self.assertTrue(0 < len(recent) < 40)
+        self.assertEqual(len(mail.search(f"from:{Huatai.sender}", 5)["messages"]), 5)
+        self.assertIn("<table>", mail.get("replay-000000"))
+
+    def test_replay_sync_writes_once(self):
+        first = self.run_sync()
+        self.assertEqual(first["messages"], 40)
+        self.assertGreater(first["written"], 0)
+        self.assertEqual(first["written"], first["missing"])
+        self.assertGreater(first["review"], 0)  # generated non-fills go to review
+
+        projects = self.vault / "01-Projects"
+        weeks = [p for d in projects.glob("trading-*") for p in list_week_files(self.vault, d)]
+        self.assertEqual(sum(len(WeekNote.load(p).rows) for p in weeks), first["written"])
+        self.assertIsNotNone(first["git"]["commit"])
+        log = subprocess.run(["git", "log", "--oneline", "origin/main"], cwd=self.vault, text=True, stdout=subprocess.PIPE).stdout
+        self.assertEqual(len(log.splitlines()), 2)
+
+        again = self.run_sync("--full")
+        self.assertEqual(again["parsed"], first["parsed"])
+        self.assertEqual((again["missing"], again["written"]), (0, 0))
+        self.assertIsNone(again["git"]["commit"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental-sync cursor.
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main
+
+from sync_cursor import SyncCursor
+
+
+class TestSyncCursor(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.path = self.tmp / "cursor.json"
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_no_cursor_until_saved(self):
+        cursor = SyncCursor(self.path, "a|b")
+        cursor.load()
+        self.assertIsNone(cursor.after_epoch())
+        cursor.advance([])
+        self.assertIsNone(cursor.after_epoch())
+
+    def test_advance_keeps_overlap_ids(self):
+        cursor = SyncCursor(self.path, "a|b", overlap=100)
+        cursor.advance([("old", 1000), ("mid", 1950), ("new", 2000)])
+        self.assertEqual(cursor.after_epoch(), 1900)
+        self.assertEqual(set(cursor.ids), {"mid", "new"})
+        cursor.save()
+
+        again = SyncCursor(self.path, "a|b", overlap=100)
+        again.load()
+        self.assertTrue(again.seen("new"))
+        self.assertFalse(again.seen("old"))
+        # A late-indexed older message does not move the cursor back.
+        again.advance([("late", 1500)])
+        self.assertEqual(again.after_epoch(), 1900)
+
+    def test_keys_are_independent(self):
+        a = SyncCursor(self.path, "a|b")
+        a.advance([("x", 5000)])
+        a.save()
+        b = SyncCursor(self.path, "c|d")
+        b.load()
+        self.assertIsNone(b.after_epoch())
+        b.advance([("y", 9000)])
+        b.save()
+        a = SyncCursor(self.path, "a|b")
+        a.load()
+        self.assertTrue(a.seen("x"))
+
+
+if __name__ == "__main__":
+    main()
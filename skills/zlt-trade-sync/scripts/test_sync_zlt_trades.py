@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the sync's date handling (Date: headers, week files, --tz).
+"""
+
+import json
+import shutil
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import TestCase, main
+from zoneinfo import ZoneInfo
+
+from sync_zlt_trades import (
+    build_parser,
+    list_week_files,
+    parse_email_date,
+    parse_email_datetime,
+    week_filename,
+)
+
+
+class TestDates(TestCase):
+    def test_rfc2822_with_cst_comment(self):
+        dt = parse_email_datetime("Fri, 6 Feb 2026 23:18:04 +0800 (CST)")
+        self.assertEqual((dt.year, dt.month, dt.day, dt.hour), (2026, 2, 6, 23))
+        self.assertEqual(dt.utcoffset(), timedelta(hours=8))
+
+    def test_bare_cst_is_china_standard_time(self):
+        for value in ("Fri, 6 Feb 2026 23:18:04 CST", "Fri, 06 Feb 2026 23:18:04 (CST)", "6 Feb 2026 23:18:04 CST"):
+            self.assertEqual(parse_email_datetime(value).utcoffset(), timedelta(hours=8), value)
+
+    def test_other_zones_and_errors(self):
+        self.assertEqual(parse_email_datetime("Fri, 6 Feb 2026 15:18:04 GMT").utcoffset(), timedelta(0))
+        self.assertEqual(parse_email_datetime("Fri, 6 Feb 2026 15:18:04 -0000").utcoffset(), timedelta(0))
+        for bad in ("", "garbage", "2026-02-06"):
+            with self.assertRaises(ValueError):
+                parse_email_datetime(bad)
+
+    def test_trade_date_follows_tz(self):
+        header = "Fri, 6 Feb 2026 23:18:04 +0800 (CST)"
+        self.assertEqual(parse_email_date(header), date(2026, 2, 6))
+        self.assertEqual(parse_email_date(header, ZoneInfo("America/New_York")), date(2026, 2, 6))
+        self.assertEqual(parse_email_date("Sat, 7 Feb 2026 07:30:00 +0800", ZoneInfo("UTC")), date(2026, 2, 6))
+        self.assertEqual(build_parser().parse_args(["--tz", "UTC"]).tz, "UTC")
+
+    def test_week_filename_cached(self):
+        week_filename.cache_clear()
+        self.assertEqual(week_filename(date(2026, 2, 6)), "2026-2-2-2026-2-8.md")
+        self.assertEqual(week_filename(date(2025, 12, 31)), "2025-12-29-2026-1-4.md")
+        week_filename(date(2026, 2, 6))
+        self.assertEqual(week_filename.cache_info().hits, 1)
+
+
+class TestWeekFiles(TestCase):
+    def setUp(self):
+        self.vault = Path(tempfile.mkdtemp(prefix="zlt-weeks-"))
+        self.trading = self.vault / "01-Projects" / "trading-2026"
+        (self.trading / "sub").mkdir(parents=True)
+        (self.vault / ".obsidian").mkdir()
+        for name in ("2026-2-2-2026-2-8.md", "scratch.md", "old.md", "sub/nested.md", "notes.txt"):
+            (self.trading / name).write_text("x", encoding="utf-8")
+
+    def tearDown(self):
+        shutil.rmtree(self.vault, ignore_errors=True)
+
+    def test_vault_ignore_rules_apply(self):
+        (self.vault / ".gitignore").write_text("scratch.md\n", encoding="utf-8")
+        (self.vault / ".obsidian" / "app.json").write_text(json.dumps({"userIgnoreFilters": ["01-Projects/trading-2026/old.md"]}))
+        self.assertEqual([p.name for p in list_week_files(self.vault, self.trading)], ["2026-2-2-2026-2-8.md"])
+        self.assertEqual(list_week_files(self.vault, self.vault / "01-Projects" / "trading-2025"), [])
+
+
+if __name__ == "__main__":
+    main()
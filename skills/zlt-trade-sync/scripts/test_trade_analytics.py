@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for FIFO P&L and the analytics write-back.
+"""
+
+import contextlib
+import io
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main, mock
+
+import trade_analytics
+from replay import make_fake_vault
+from trade_analytics import (
+    fill_results,
+    load_trades,
+    match_fifo,
+    position_history,
+    summary,
+    write_summaries,
+)
+from week_note import TABLE_HEADER, TABLE_SEP
+
+
+def week(*rows):
+    return TABLE_HEADER + TABLE_SEP + "".join("|" + "|".join(r) + "|" + "|" * (12 - len(r)) + "\n" for r in rows)
+
+
+class TestAnalytics(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.dir = self.tmp / "01-Projects" / "trading-2026"
+        self.dir.mkdir(parents=True)
+        self.w1 = self.dir / "2026-1-5-2026-1-11.md"
+        self.w2 = self.dir / "2026-1-12-2026-1-18.md"
+        self.w1.write_text(
+            week(
+                ["2026/1/5", "招商银行", "600036", "买入", "10", "100"],
+                ["2026/1/6", "招商银行", "600036", "买入", "12", "100"],
+                ["2026/1/7", "平安银行", "000001", "卖出", "20", "50"],  # opens a short
+            ),
+            encoding="utf-8",
+        )
+        self.w2.write_text(
+            week(
+                ["2026/1/12", "招商银行", "600036", "卖出", "11", "150", "", "", "", "", "", "止盈"],
+                ["2026/1/13", "平安银行", "000001", "买入", "18", "50", "", "", "", "manual", "999"],
+            ),
+            encoding="utf-8",
+        )
+        self.db = load_trades(sorted(self.dir.glob("*.md")))
+        match_fifo(self.db)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_fifo_realized_and_positions(self):
+        # 100 @10 closed at 11 (+100), 50 @12 closed at 11 (-50); short 50 @20 covered at 18 (+100).
+        hist = position_history(self.db, "600036")
+        self.assertEqual([h[4] for h in hist], [100, 200, 50])
+        self.assertAlmostEqual(hist[-1][5], 50.0)
+        self.assertAlmostEqual(position_history(self.db, "000001")[-1][5], 100.0)
+        avg = self.db.execute("SELECT avg_cost FROM trades JOIN fills USING (seq) WHERE day = '2026-01-06'").fetchone()
+        self.assertAlmostEqual(avg[0], 11.0)
+
+    def test_summary(self):
+        stats = summary(self.db, "2026")
+        fills, turnover, realized, closes, wins = stats["total"][0]
+        self.assertEqual((fills, closes, wins), (5, 2, 2))
+        self.assertAlmostEqual(turnover, 1000 + 1200 + 1000 + 1650 + 900)
+        self.assertAlmostEqual(realized, 150.0)
+        by_code = {r[0]: r for r in stats["symbols"]}
+        self.assertEqual(by_code["600036"][-1], 50)
+        self.assertEqual([m[0] for m in stats["months"]], ["2026-01"])
+
+    def test_write_back(self):
+        projects = self.tmp / "01-Projects"
+        [note] = write_summaries(self.db, projects, ["2026"])
+        self.assertIn("Realized P&L: 150.00", note.read_text(encoding="utf-8"))
+        self.assertEqual(write_summaries(self.db, projects, ["2026"]), [])  # unchanged: not rewritten
+
+        self.assertEqual(fill_results(self.db), [self.w2])
+        lines = self.w2.read_text(encoding="utf-8").splitlines()
+        self.assertEqual(lines[2], "|2026/1/12|招商银行|600036|卖出|11|150||||win|50.00|止盈|")
+        self.assertTrue(lines[3].endswith("|manual|999||"))  # typed-in cells kept
+
+    def test_push(self):
+        vault = make_fake_vault(self.tmp / "git")
+        shutil.copytree(self.dir, vault / "01-Projects" / "trading-2026")
+        argv = ["trade_analytics.py", "--vault", str(vault), "--push"]
+        with mock.patch("sys.argv", argv), contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(trade_analytics.main(), 0)
+        self.assertIn("push_attempts=1", out.getvalue())
+        pushed = subprocess.run(
+            ["git", "show", "--name-only", "--format=", "origin/main"], cwd=vault, text=True, stdout=subprocess.PIPE
+        ).stdout.split()
+        self.assertEqual(pushed, ["01-Projects/trading-2026/analytics/2026-summary.md"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent trade-key dedup index.
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main
+
+from trade_index import TradeIndex, row_keys
+
+HEADER = "|交易日期|标的|代码|方向|点位|仓位|\n|---|---|---|---|---|---|\n"
+
+
+def week(*rows: str) -> str:
+    return HEADER + "".join(f"|{r}|\n" for r in rows)
+
+
+class TestRowKeys(TestCase):
+    def test_skips_header_and_short_rows(self):
+        text = week("2026-02-02|平安银行|000001|买入|10.5|100", "too|short") + "plain text\n"
+        self.assertEqual(list(row_keys(text)), [("2026-02-02", "000001", "买入", "10.5", "100")])
+
+
+class TestTradeIndex(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.dir = self.tmp / "trading-2026"
+        self.dir.mkdir()
+        self.a = self.dir / "2026-W05.md"
+        self.b = self.dir / "2026-W06.md"
+        self.a.write_text(week("2026-01-28|平安银行|000001|买入|10.5|100"), encoding="utf-8")
+        self.b.write_text(week("2026-02-03|招商银行|600036|卖出|35.2|200"), encoding="utf-8")
+        self.index = TradeIndex(self.tmp / "index.sqlite")
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmp)
+
+    def files(self):
+        return sorted(self.dir.glob("*.md"))
+
+    def test_only_changed_files_are_reparsed(self):
+        self.index.refresh(self.files(), self.dir)
+        self.assertEqual(self.index.parsed, 2)
+        self.assertTrue(self.index.contains(("2026-01-28", "000001", "买入", "10.5", "100"), self.dir))
+
+        self.index.refresh(self.files(), self.dir)
+        self.assertEqual(self.index.parsed, 2)
+
+        self.b.write_text(week("2026-02-04|招商银行|600036|买入|34.0|300"), encoding="utf-8")
+        self.index.refresh(self.files(), self.dir)
+        self.assertEqual(self.index.parsed, 3)
+        self.assertFalse(self.index.contains(("2026-02-03", "600036", "卖出", "35.2", "200"), self.dir))
+        self.assertTrue(self.index.contains(("2026-02-04", "600036", "买入", "34.0", "300"), self.dir))
+
+    def test_touched_file_is_rehashed_not_reparsed(self):
+        self.index.refresh(self.files(), self.dir)
+        st = self.a.stat()
+        os.utime(self.a, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        self.index.refresh(self.files(), self.dir)
+        self.assertEqual(self.index.rehashed, 3)
+        self.assertEqual(self.index.parsed, 2)
+
+    def test_deleted_files_are_forgotten(self):
+        self.index.refresh(self.files(), self.dir)
+        self.a.unlink()
+        self.index.refresh(self.files(), self.dir)
+        self.assertEqual(self.index.count(), (1, 1))
+        self.assertFalse(self.index.contains(("2026-01-28", "000001", "买入", "10.5", "100"), self.dir))
+
+    def test_lookups_are_scoped_to_the_trading_dir(self):
+        other = self.tmp / "trading-2025"
+        other.mkdir()
+        self.index.refresh(self.files(), self.dir)
+        self.index.refresh([], other)
+        self.assertFalse(self.index.contains(("2026-01-28", "000001", "买入", "10.5", "100"), other))
+        self.assertEqual(self.index.count(), (2, 2))
+
+    def test_index_persists_across_instances(self):
+        self.index.refresh(self.files(), self.dir)
+        self.index.close()
+        self.index = TradeIndex(self.tmp / "index.sqlite")
+        self.index.refresh(self.files(), self.dir)
+        self.assertEqual(self.index.parsed, 0)
+        self.assertTrue(self.index.contains(("2026-02-03", "600036", "卖出", "35.2", "200"), self.dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the week-note table model and batched writer.
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main
+
+from week_note import TABLE_HEADER, TABLE_SEP, WeekNote, flush_weeks, write_week
+
+
+def trade(day, code="600036", side="买入", price="35.2", qty="100"):
+    t = dict.fromkeys(["Plan Risk", "Plan Reward", "计划盈亏比", "result", "盈利", "交易理由"], "")
+    t.update({"交易日期": day, "交易标的": code, "代码": code, "方向": side, "点位": price, "仓位": qty})
+    return t
+
+
+class TestWeekNote(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.path = self.tmp / "2026-2-2-2026-2-8.md"
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_new_file_gets_header(self):
+        self.assertEqual(write_week(self.path, [trade("2026/2/3")]), 1)
+        self.assertEqual(
+            self.path.read_text(encoding="utf-8"),
+            TABLE_HEADER + TABLE_SEP + "|2026/2/3|600036|600036|买入|35.2|100|||||||\n",
+        )
+
+    def test_merge_in_date_order_preserving_user_edits(self):
+        user_row = "| 2026/2/4 | 招商银行 | 600036 | 买入 | 35.2 | 100 | 1% | 3% | 3 | win | +200 | 突破 |\n"
+        text = "# Week\n\nnotes above\n" + TABLE_HEADER + TABLE_SEP + "|2026/2/2|平安银行|000001|卖出|10|100|||||||\n" + user_row + "\n复盘: ...\n"
+        self.path.write_text(text, encoding="utf-8")
+        added = write_week(self.path, [trade("2026/2/6"), trade("2026/2/4"), trade("2026/2/3", price="35")])
+        self.assertEqual(added, 2)  # 2026/2/4 is already there (hand-edited)
+        lines = self.path.read_text(encoding="utf-8").splitlines(keepends=True)
+        self.assertEqual(lines[:5], ["# Week\n", "\n", "notes above\n", TABLE_HEADER, TABLE_SEP])
+        self.assertEqual([line.split("|")[1].strip() for line in lines[5:9]], ["2026/2/2", "2026/2/3", "2026/2/4", "2026/2/6"])
+        self.assertEqual(lines[7], user_row)
+        self.assertEqual(lines[9:], ["\n", "复盘: ...\n"])
+
+    def test_unchanged_file_is_not_rewritten(self):
+        write_week(self.path, [trade("2026/2/3")])
+        mtime = self.path.stat().st_mtime_ns
+        note = WeekNote.load(self.path)
+        self.assertEqual(note.merge([trade("2026/2/3")]), 0)
+        self.assertFalse(note.save())
+        self.assertEqual(self.path.stat().st_mtime_ns, mtime)
+
+    def test_note_without_table(self):
+        self.path.write_text("just text", encoding="utf-8")
+        write_week(self.path, [trade("2026/2/3")])
+        self.assertTrue(self.path.read_text(encoding="utf-8").startswith("just text\n\n" + TABLE_HEADER))
+
+    def test_flush_many_weeks(self):
+        batches = {self.tmp / f"w{i}.md": [trade(f"2026/1/{i + 1}"), trade(f"2026/1/{i + 1}")] for i in range(6)}
+        self.assertEqual(set(flush_weeks(batches, jobs=3).values()), {1})
+        self.assertEqual(len(list(self.tmp.glob("*.md"))), 6)
+        self.assertEqual(list(self.tmp.glob(".*")), [])
+
+
+if __name__ == "__main__":
+    main()
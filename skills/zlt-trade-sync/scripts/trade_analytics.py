@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""Trade analytics over the weekly trading notes (01-Projects/trading-YYYY/*.md).
+
+Loads every week table into one in-memory SQLite table (columnar enough for a
+few years of fills, no extra dependency), then:
+
+- FIFO-matches fills per symbol (sells close the oldest buys; a sell without
+  a position opens a short that later buys close) -> realized P&L per fill,
+  running position and average cost;
+- aggregates with SQL: per-symbol position history, win rate (closing fills
+  with positive realized P&L), turnover (price x qty) per symbol / month / year.
+
+P&L is gross: `点位` x `仓位`, no fees or taxes.
+
+Write-back:
+- `trading-YYYY/analytics/YYYY-summary.md` per year (rewritten only if changed);
+- with `--fill-results`, empty `盈利`/`result` cells of closing fills in the
+  week notes are filled (cells the user typed into are never touched).
+
+Usage:
+  python3 trade_analytics.py [--vault ~/obsidian/obsidian_huaigu] [--year 2026]
+                             [--fill-results] [--dry-run] [--commit] [--push]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from fileutil import atomic_write_text
+from week_note import WeekNote, date_key
+
+SIDES = {"买入": 1, "买": 1, "bid": 1, "buy": 1, "卖出": -1, "卖": -1, "ask": -1, "sell": -1}
+EPS = 1e-9
+
+SCHEMA = """
+CREATE TABLE trades (seq INTEGER PRIMARY KEY, day TEXT, code TEXT, name TEXT, side INTEGER,
+                     price REAL, qty REAL, path TEXT, row INTEGER);
+CREATE TABLE fills (seq INTEGER PRIMARY KEY, realized REAL, closed REAL, position REAL, avg_cost REAL);
+"""
+
+
+def _num(value: str) -> float | None:
+    try:
+        return float(value.replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def load_trades(week_files: Iterable[Path]) -> sqlite3.Connection:
+    """One row per parseable fill, in file/row order (`seq` breaks same-day ties)."""
+    db = sqlite3.connect(":memory:")
+    db.executescript(SCHEMA)
+    rows = []
+    for path in week_files:
+        note = WeekNote.load(path)
+        col = {c: i for i, c in enumerate(note.columns)}
+        if not {"交易日期", "代码", "方向", "点位", "仓位"} <= set(col):
+            continue
+        for i, (cells, _) in enumerate(note.rows):
+            get = lambda c: cells[col[c]] if col[c] < len(cells) else ""  # noqa: E731
+            day = date_key(get("交易日期"))
+            side = SIDES.get(get("方向").strip().lower())
+            price, qty = _num(get("点位")), _num(get("仓位"))
+            if day is None or side is None or price is None or not qty or not get("代码"):
+                continue
+            name = get("交易标的") if "交易标的" in col else ""
+            rows.append(("%04d-%02d-%02d" % day, get("代码"), name, side, price, abs(qty), str(path), i))
+    db.executemany("INSERT INTO trades (day, code, name, side, price, qty, path, row) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    db.execute("CREATE INDEX trades_code ON trades (code, day, seq)")
+    return db
+
+
+def match_fifo(db: sqlite3.Connection) -> None:
+    """Fill the `fills` table: realized P&L, closed qty, position and average cost after each fill."""
+    books: Dict[str, deque] = defaultdict(deque)  # code -> [[signed qty, price], ...] oldest first
+    out = []
+    for seq, code, side, price, qty in db.execute("SELECT seq, code, side, price, qty FROM trades ORDER BY code, day, seq"):
+        book = books[code]
+        left, realized, closed = qty, 0.0, 0.0
+        while left > EPS and book and (book[0][0] > 0) != (side > 0):
+            lot = book[0]
+            take = min(left, abs(lot[0]))
+            # Closing a long (sell): (price - cost); closing a short (buy): (cost - price).
+            realized += take * (price - lot[1]) * -side
+            lot[0] += take * side
+            left -= take
+            closed += take
+            if abs(lot[0]) <= EPS:
+                book.popleft()
+        if left > EPS:
+            book.append([side * left, price])
+        position = sum(lot[0] for lot in book)
+        avg_cost = sum(lot[0] * lot[1] for lot in book) / position if abs(position) > EPS else 0.0
+        out.append((seq, realized, closed, position, avg_cost))
+    db.executemany("INSERT INTO fills VALUES (?, ?, ?, ?, ?)", out)
+
+
+def summary(db: sqlite3.Connection, year: str | None = None) -> Dict[str, List[tuple]]:
+    """Aggregates for one year (or everything): totals, per symbol, per month."""
+    where, params = ("WHERE substr(t.day, 1, 4) = ?", (year,)) if year else ("", ())
+    base = f"FROM trades t JOIN fills f USING (seq) {where}"
+    agg = (
+        "COUNT(*), SUM(t.price * t.qty), SUM(f.realized), "
+        "SUM(f.closed > 0), SUM(f.closed > 0 AND f.realized > 0)"
+    )
+    return {
+        "total": db.execute(f"SELECT {agg} {base}", params).fetchall(),
+        "symbols": db.execute(
+            f"""SELECT t.code, MAX(t.name), {agg},
+                       SUM(CASE WHEN t.side > 0 THEN t.qty ELSE 0 END),
+                       SUM(CASE WHEN t.side < 0 THEN t.qty ELSE 0 END),
+                       (SELECT f2.position FROM trades t2 JOIN fills f2 USING (seq)
+                         WHERE t2.code = t.code {"AND substr(t2.day, 1, 4) <= ?" if year else ""}
+                         ORDER BY t2.day DESC, t2.seq DESC LIMIT 1)
+                {base} GROUP BY t.code ORDER BY SUM(f.realized) DESC, t.code""",
+            ((year,) + params) if year else params,
+        ).fetchall(),
+        "months": db.execute(f"SELECT substr(t.day, 1, 7) AS m, {agg} {base} GROUP BY m ORDER BY m", params).fetchall(),
+    }
+
+
+def position_history(db: sqlite3.Connection, code: str) -> List[tuple]:
+    """`(day, side, qty, price, position, realized)` for every fill of `code`, in order."""
+    return db.execute(
+        """SELECT t.day, t.side, t.qty, t.price, f.position, f.realized
+           FROM trades t JOIN fills f USING (seq) WHERE t.code = ? ORDER BY t.day, t.seq""",
+        (code,),
+    ).fetchall()
+
+
+def _fmt(x: float | None) -> str:
+    return f"{x or 0:,.2f}"
+
+
+def _rate(wins: int | None, closes: int | None) -> str:
+    return f"{100.0 * (wins or 0) / closes:.1f}%" if closes else "-"
+
+
+def render_summary(year: str, stats: Dict[str, List[tuple]]) -> str:
+    fills, turnover, realized, closes, wins = stats["total"][0]
+    lines = [
+        f"# {year} 交易统计",
+        "",
+        "_Generated by trade_analytics.py from the week notes (FIFO, gross of fees)._",
+        "",
+        f"- Fills: {fills or 0}",
+        f"- Turnover: {_fmt(turnover)}",
+        f"- Realized P&L: {_fmt(realized)}",
+        f"- Win rate: {_rate(wins, closes)} ({wins or 0}/{closes or 0} closing fills)",
+        "",
+        "## By symbol",
+        "",
+        "|代码|交易标的|Fills|买入|卖出|Turnover|Realized|Win rate|Position|",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for code, name, n, turn, real, closes, wins, bought, sold, pos in stats["symbols"]:
+        lines.append(
+            f"|{code}|{name or ''}|{n}|{bought:g}|{sold:g}|{_fmt(turn)}|{_fmt(real)}|{_rate(wins, closes)}|{(pos or 0):g}|"
+        )
+    lines += ["", "## By month", "", "|Month|Fills|Turnover|Realized|Win rate|", "|---|---|---|---|---|"]
+    for month, n, turn, real, closes, wins in stats["months"]:
+        lines.append(f"|{month}|{n}|{_fmt(turn)}|{_fmt(real)}|{_rate(wins, closes)}|")
+    return "\n".join(lines) + "\n"
+
+
+def write_summaries(db: sqlite3.Connection, projects: Path, years: List[str]) -> List[Path]:
+    written = []
+    for year in years:
+        path = projects / f"trading-{year}" / "analytics" / f"{year}-summary.md"
+        text = render_summary(year, summary(db, year))
+        try:
+            if path.read_text(encoding="utf-8") == text:
+                continue
+        except FileNotFoundError:
+            pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(path, text)
+        written.append(path)
+    return written
+
+
+def fill_results(db: sqlite3.Connection, years: List[str] | None = None) -> List[Path]:
+    """Fill empty 盈利/result cells of closing fills; returns the week files rewritten."""
+    by_path: Dict[str, list] = defaultdict(list)
+    query = "SELECT t.path, t.row, f.realized FROM trades t JOIN fills f USING (seq) WHERE f.closed > 0"
+    for path, row, realized in db.execute(query):
+        by_path[path].append((row, realized))
+    written = []
+    for path, fills in sorted(by_path.items()):
+        if years and not any(f"trading-{y}" in path for y in years):
+            continue
+        note = WeekNote.load(Path(path))
+        for row, realized in fills:
+            if row < len(note.rows):
+                result = "win" if realized > EPS else "loss" if realized < -EPS else "flat"
+                note.fill_cells(row, {"盈利": f"{realized:.2f}", "result": result})
+        if note.save():
+            written.append(Path(path))
+    return written
+
+
+def main() -> int:
+    from git_session import GitSession
+    from sync_zlt_trades import DEFAULT_VAULT, list_week_files
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vault", default=str(DEFAULT_VAULT))
+    ap.add_argument("--year", action="append", default=None, help="summarise only these years (repeatable)")
+    ap.add_argument("--fill-results", action="store_true", help="fill empty 盈利/result cells of closing fills")
+    ap.add_argument("--dry-run", action="store_true", help="print the summaries, write nothing")
+    ap.add_argument("--commit", action="store_true", help="commit the written notes in the vault repo (local only)")
+    ap.add_argument("--push", action="store_true", help="pull --rebase first, then commit and push the written notes")
+    args = ap.parse_args()
+
+    vault = Path(args.vault).expanduser()
+    projects = vault / "01-Projects"
+    git = GitSession(vault)
+    if args.push and not args.dry_run:
+        git.pull()
+
+    t0 = time.perf_counter()
+    # FIFO needs the full history (positions carry across years), so always load everything.
+    week_files = [p for d in sorted(projects.glob("trading-*")) if d.is_dir() for p in list_week_files(vault, d)]
+    db = load_trades(week_files)
+    match_fifo(db)
+    years = args.year or [r[0] for r in db.execute("SELECT DISTINCT substr(day, 1, 4) FROM trades ORDER BY 1")]
+    elapsed = time.perf_counter() - t0
+
+    if args.dry_run:
+        for year in years:
+            print(render_summary(year, summary(db, year)))
+        print(f"files={len(week_files)} fills={db.execute('SELECT COUNT(*) FROM trades').fetchone()[0]} seconds={elapsed:.3f}")
+        return 0
+
+    written = write_summaries(db, projects, years)
+    if args.fill_results:
+        written += fill_results(db, years)
+    if (args.commit or args.push) and written:
+        sha = git.commit(written, f"kb: trading analytics {', '.join(years)}")
+        if args.push and (sha or git.ahead()):
+            git.push()
+        print(f"git: commit={sha or 'none'} push_attempts={git.push_attempts} {git.summary()}")
+    print(
+        f"files={len(week_files)} fills={db.execute('SELECT COUNT(*) FROM trades').fetchone()[0]} "
+        f"written={len(written)} analyse_seconds={elapsed:.3f}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
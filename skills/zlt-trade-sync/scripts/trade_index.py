@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Persistent dedup index of trade keys already written to the weekly notes.
+
+`sync_zlt_trades.py` used to re-read and re-split every `trading-YYYY/*.md` row on
+each run. This SQLite index remembers, per week file, its (mtime_ns, size, sha1)
+and the trade keys it contains; a sync only re-parses week files whose stat
+changed (and only re-extracts keys if the content hash changed too), then checks
+new trades with indexed lookups.
+
+Key: 交易日期 + 代码 + 方向 + 点位 + 仓位 (see references/md_table_schema.md).
+
+Default location: `<vault>/.git/zlt-trade-index.sqlite` (next to the vault's
+history, never committed), else ~/.cache/zlt-trade-sync/.
+
+Usage (inspect / rebuild):
+  python3 trade_index.py --vault ~/obsidian/obsidian_huaigu [--rebuild]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Iterator, Tuple
+
+TradeKey = Tuple[str, str, str, str, str]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, sha1 TEXT);
+CREATE TABLE IF NOT EXISTS keys (path TEXT, d TEXT, code TEXT, side TEXT, price TEXT, qty TEXT);
+CREATE INDEX IF NOT EXISTS keys_key ON keys (d, code, side, price, qty);
+CREATE INDEX IF NOT EXISTS keys_path ON keys (path);
+"""
+
+
+def row_keys(text: str) -> Iterator[TradeKey]:
+    """Trade keys of the table rows in a week note."""
+    for l in text.splitlines():
+        l = l.strip()
+        if not l.startswith("|"):
+            continue
+        if l.startswith("|交易日期|") or l.startswith("|---"):
+            continue
+        parts = [c.strip() for c in l.strip("|").split("|")]
+        if len(parts) < 6:
+            continue
+        yield parts[0], parts[2], parts[3], parts[4], parts[5]
+
+
+def default_index_path(vault: Path) -> Path:
+    git_dir = vault / ".git"
+    if git_dir.is_dir():
+        return git_dir / "zlt-trade-index.sqlite"
+    base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    key = hashlib.sha1(str(vault).encode("utf-8")).hexdigest()[:12]
+    return base / "zlt-trade-sync" / f"trade-index-{key}.sqlite"
+
+
+class TradeIndex:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path), timeout=30)
+        self.db.executescript(SCHEMA)
+        self.parsed = 0
+        self.rehashed = 0
+
+    def close(self) -> None:
+        self.db.close()
+
+    def clear(self) -> None:
+        with self.db:
+            self.db.execute("DELETE FROM files")
+            self.db.execute("DELETE FROM keys")
+
+    def _update_file(self, path: Path, st: os.stat_result) -> None:
+        data = path.read_bytes()
+        sha1 = hashlib.sha1(data).hexdigest()
+        row = self.db.execute("SELECT sha1 FROM files WHERE path = ?", (str(path),)).fetchone()
+        self.rehashed += 1
+        if row is None or row[0] != sha1:
+            self.parsed += 1
+            text = data.decode("utf-8", errors="ignore")
+            self.db.execute("DELETE FROM keys WHERE path = ?", (str(path),))
+            self.db.executemany(
+                "INSERT INTO keys VALUES (?, ?, ?, ?, ?, ?)", [(str(path), *k) for k in row_keys(text)]
+            )
+        self.db.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (str(path), st.st_mtime_ns, st.st_size, sha1)
+        )
+
+    def refresh(self, week_files: Iterable[Path], trading_dir: Path) -> None:
+        """Re-index week files under `trading_dir` whose stat changed; forget deleted ones."""
+        prefix = str(trading_dir) + os.sep
+        known = {
+            p: (m, s)
+            for p, m, s in self.db.execute(
+                "SELECT path, mtime_ns, size FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+            )
+        }
+        with self.db:
+            current = set()
+            for p in week_files:
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                current.add(str(p))
+                if known.get(str(p)) != (st.st_mtime_ns, st.st_size):
+                    self._update_file(p, st)
+            for gone in set(known) - current:
+                self.db.execute("DELETE FROM keys WHERE path = ?", (gone,))
+                self.db.execute("DELETE FROM files WHERE path = ?", (gone,))
+
+    def refresh_file(self, path: Path) -> None:
+        """Re-index one file right after writing it."""
+        with self.db:
+            self._update_file(path, path.stat())
+
+    def contains(self, key: TradeKey, trading_dir: Path) -> bool:
+        prefix = str(trading_dir) + os.sep
+        row = self.db.execute(
+            "SELECT 1 FROM keys WHERE d = ? AND code = ? AND side = ? AND price = ? AND qty = ? "
+            "AND substr(path, 1, ?) = ? LIMIT 1",
+            (*key, len(prefix), prefix),
+        ).fetchone()
+        return row is not None
+
+    def count(self) -> Tuple[int, int]:
+        files = self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        keys = self.db.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+        return files, keys
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vault", default=str(Path.home() / "obsidian" / "obsidian_huaigu"))
+    ap.add_argument("--index", default=None, help="index path (default: <vault>/.git/zlt-trade-index.sqlite)")
+    ap.add_argument("--rebuild", action="store_true", help="drop and re-parse every week file")
+    args = ap.parse_args()
+
+    vault = Path(args.vault).expanduser()
+    index = TradeIndex(Path(args.index) if args.index else default_index_path(vault))
+    if args.rebuild:
+        index.clear()
+    from sync_zlt_trades import list_week_files
+
+    for trading_dir in sorted((vault / "01-Projects").glob("trading-*")):
+        if trading_dir.is_dir():
+            index.refresh(list_week_files(vault, trading_dir), trading_dir)
+    files, keys = index.count()
+    print(f"index={index.path} files={files} keys={keys} parsed={index.parsed}")
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
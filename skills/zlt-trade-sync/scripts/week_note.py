@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""In-memory model of a weekly trading note's Markdown table.
+
+A week note is parsed once into: the text before the trade table, the header
+and separator lines, the rows (cells + original line), and the text after.
+`merge()` adds new trades in date order without touching existing rows, so
+anything the user filled in by hand (Plan Risk, result, 交易理由, ...) and
+their own row order survive. `save()` writes the file once, atomically, and
+only if it changed.
+
+`flush_weeks()` applies a batch of trades to many week files in parallel
+(one worker per file; files never share state).
+"""
+
+from __future__ import annotations
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from fileutil import atomic_write_text
+
+COLUMNS = ["交易日期", "交易标的", "代码", "方向", "点位", "仓位", "Plan Risk", "Plan Reward", "计划盈亏比", "result", "盈利", "交易理由"]
+TABLE_HEADER = "|" + "|".join(COLUMNS) + "|\n"
+TABLE_SEP = "|" + "---|" * len(COLUMNS) + "\n"
+KEY_COLUMNS = ["交易日期", "代码", "方向", "点位", "仓位"]
+
+_CELL_SPLIT = re.compile(r"(?<!\\)\|")
+_DATE = re.compile(r"^(\d{4})[/-](\d{1,2})[/-](\d{1,2})")
+
+
+def split_row(line: str) -> List[str]:
+    return [c.strip() for c in _CELL_SPLIT.split(line.strip().strip("|"))]
+
+
+def date_key(value: str) -> Tuple[int, int, int] | None:
+    m = _DATE.match(value)
+    return (int(m.group(1)), int(m.group(2)), int(m.group(3))) if m else None
+
+
+class WeekNote:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.exists = False
+        self.has_table = False
+        self.before: List[str] = []
+        self.header = TABLE_HEADER
+        self.sep = TABLE_SEP
+        self.columns = list(COLUMNS)
+        # (cells, original line or None for rows added by merge())
+        self.rows: List[Tuple[List[str], str | None]] = []
+        self.after: List[str] = []
+        self.added = 0
+        self.changed = 0
+
+    @classmethod
+    def load(cls, path: Path) -> "WeekNote":
+        note = cls(path)
+        try:
+            text = note.path.read_text(encoding="utf-8", errors="ignore")
+        except FileNotFoundError:
+            return note
+        note.exists = True
+        note.parse(text)
+        return note
+
+    def parse(self, text: str) -> None:
+        lines = text.splitlines(keepends=True)
+        if lines and not lines[-1].endswith("\n"):
+            lines[-1] += "\n"
+        for i, line in enumerate(lines):
+            if line.lstrip().startswith("|") and split_row(line)[:1] == ["交易日期"]:
+                break
+        else:
+            # No trade table yet: keep the note and add the table at the end.
+            self.before = lines
+            return
+        self.has_table = True
+        self.before = lines[:i]
+        self.header = lines[i]
+        self.columns = split_row(lines[i])
+        j = i + 1
+        if j < len(lines) and lines[j].lstrip().startswith("|") and set(lines[j].strip()) <= set("|-: "):
+            self.sep = lines[j]
+            j += 1
+        while j < len(lines) and lines[j].lstrip().startswith("|"):
+            self.rows.append((split_row(lines[j]), lines[j]))
+            j += 1
+        self.after = lines[j:]
+
+    def _key(self, cells: List[str]) -> Tuple[str, ...]:
+        idx = {c: i for i, c in enumerate(self.columns)}
+        return tuple(cells[idx[c]] if c in idx and idx[c] < len(cells) else "" for c in KEY_COLUMNS)
+
+    def keys(self) -> set[Tuple[str, ...]]:
+        return {self._key(cells) for cells, _ in self.rows}
+
+    def merge(self, trades: List[Dict[str, str]]) -> int:
+        """Insert trades not yet in the table, each after the last row dated on or before it."""
+        existing = self.keys()
+        date_col = self.columns.index("交易日期") if "交易日期" in self.columns else 0
+        added = 0
+        for t in sorted(trades, key=lambda t: date_key(t.get("交易日期", "")) or (9999, 0, 0)):
+            cells = [str(t.get(c, "")).replace("|", "\\|") for c in self.columns]
+            key = self._key(cells)
+            if key in existing:
+                continue
+            existing.add(key)
+            when = date_key(t.get("交易日期", ""))
+            pos = len(self.rows)
+            if when is not None:
+                for i in range(len(self.rows) - 1, -1, -1):
+                    row_cells = self.rows[i][0]
+                    d = date_key(row_cells[date_col]) if date_col < len(row_cells) else None
+                    if d is None or d <= when:
+                        pos = i + 1
+                        break
+                else:
+                    pos = 0
+            self.rows.insert(pos, (cells, None))
+            added += 1
+        self.added += added
+        return added
+
+    def fill_cells(self, i: int, values: Dict[str, str]) -> bool:
+        """Set the given columns of row `i` where they are still empty (never overwrites)."""
+        cells, line = self.rows[i]
+        cells = cells + [""] * (len(self.columns) - len(cells))
+        changed = False
+        for col, value in values.items():
+            if col in self.columns and not cells[self.columns.index(col)]:
+                cells[self.columns.index(col)] = value.replace("|", "\\|")
+                changed = True
+        if changed:
+            self.rows[i] = (cells, None)
+            self.changed += 1
+        return changed
+
+    def render(self) -> str:
+        out = list(self.before)
+        if not self.has_table and out and out[-1].strip():
+            out.append("\n")
+        out += [self.header, self.sep]
+        out += [line if line is not None else "|" + "|".join(cells) + "|\n" for cells, line in self.rows]
+        out += self.after
+        return "".join(out)
+
+    def save(self) -> bool:
+        """Write the note if rows were added or filled (or it is new); True if written."""
+        if self.exists and not self.added and not self.changed:
+            return False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path, self.render())
+        self.exists = True
+        self.added = self.changed = 0
+        return True
+
+
+def write_week(path: Path, trades: List[Dict[str, str]]) -> int:
+    """Merge `trades` into one week note and save it; returns the number of rows added."""
+    note = WeekNote.load(path)
+    added = note.merge(trades)
+    note.save()
+    return added
+
+
+def flush_weeks(batches: Dict[Path, List[Dict[str, str]]], *, jobs: int = 4) -> Dict[Path, int]:
+    """Apply each file's trades (files in parallel); returns rows added per file."""
+    items = sorted(batches.items(), key=lambda kv: str(kv[0]))
+    if jobs <= 1 or len(items) <= 1:
+        return {path: write_week(path, trades) for path, trades in items}
+    with ThreadPoolExecutor(max_workers=min(jobs, len(items))) as pool:
+        futures = [(path, pool.submit(write_week, path, trades)) for path, trades in items]
+        return {path: f.result() for path, f in futures}